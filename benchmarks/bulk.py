@@ -0,0 +1,84 @@
+"""
+Compares the throughput of the bulk endpoint with the single-item endpoints.
+
+    python -m benchmarks.bulk --items 2000 --batch 500
+"""
+
+import argparse
+import json
+import time
+
+from benchmarks.common import get_client, setup, write_report
+
+
+def throughput(items, seconds):
+    return {'items': items, 'seconds': seconds, 'items_per_second': items / seconds if seconds else None}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=2000, help='posts created, updated and deleted')
+    parser.add_argument('--batch', type=int, default=500, help='items per bulk request')
+    parser.add_argument('--output', help='write the JSON report to this file')
+    args = parser.parse_args()
+
+    setup()
+
+    from django.urls import reverse
+
+    client = get_client()
+    payload = [
+        {'title': f'Benchmark {number}', 'content': 'Benchmark content ' * 20, 'category': 'Benchmark', 'tags': ['bench']}
+        for number in range(args.items)
+    ]
+    batches = [payload[start:start + args.batch] for start in range(0, len(payload), args.batch)]
+
+    def post_json(url, data, method='post'):
+        response = getattr(client, method)(url, json.dumps(data), content_type='application/json')
+        assert response.status_code < 300, response.content
+        return response
+
+    report = {'items': args.items, 'batch': args.batch, 'single': {}, 'bulk': {}}
+
+    # One request per post
+    start = time.perf_counter()
+    ids = [post_json(reverse('post-create'), item).json()['id'] for item in payload]
+    report['single']['create'] = throughput(args.items, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for pk in ids:
+        post_json(reverse('post-update', kwargs={'pk': pk}), {'title': f'Updated {pk}'}, 'patch')
+    report['single']['update'] = throughput(args.items, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for pk in ids:
+        client.delete(reverse('post-delete', kwargs={'pk': pk}))
+    report['single']['delete'] = throughput(args.items, time.perf_counter() - start)
+
+    # One request per batch
+    url = reverse('post-bulk')
+
+    start = time.perf_counter()
+    ids = []
+    for batch in batches:
+        ids += [item['data']['id'] for item in post_json(url, batch).json()]
+    report['bulk']['create'] = throughput(args.items, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for offset in range(0, len(ids), args.batch):
+        post_json(url, [{'id': pk, 'title': f'Updated {pk}'} for pk in ids[offset:offset + args.batch]], 'patch')
+    report['bulk']['update'] = throughput(args.items, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for offset in range(0, len(ids), args.batch):
+        post_json(url, {'ids': ids[offset:offset + args.batch]}, 'delete')
+    report['bulk']['delete'] = throughput(args.items, time.perf_counter() - start)
+
+    for operation in ('create', 'update', 'delete'):
+        single = report['single'][operation]['items_per_second']
+        report['bulk'][operation]['speedup'] = report['bulk'][operation]['items_per_second'] / single
+
+    write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Shared helpers of the benchmark scripts.
+
+Run them from the project root against a scratch database, e.g.:
+
+    python -m benchmarks.search --rows 1000000 --seed
+"""
+
+import json
+import os
+import statistics
+import sys
+import time
+
+import django
+
+
+def setup():
+    """
+    Configures Django so the scripts can use the ORM
+    """
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+    # The scripts send hundreds of requests as one client, measure the endpoints and not the throttle
+    os.environ.setdefault('POSTS_THROTTLE_RATE', '0')
+
+    # The same list is requested again and again, measure the queries and not the list cache
+    os.environ.setdefault('POSTS_LIST_CACHE_TIMEOUT', '0')
+    django.setup()
+
+def get_client():
+    """
+    Returns a test client that calls the views in-process (no network, no server)
+    """
+
+    from django.test import Client
+    from django.test.utils import setup_test_environment
+
+    # Accept the `testserver` host of the test client
+    setup_test_environment()
+    return Client()
+
+def timed(func, repeat):
+    """
+    Calls `func` `repeat` times and returns the duration of each call in seconds
+    """
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def summarize(samples):
+    """
+    Returns the latency percentiles (in milliseconds) of a list of durations
+    """
+
+    ordered = sorted(samples)
+
+    def percentile(fraction):
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000
+
+    return {
+        'runs': len(ordered),
+        'mean_ms': statistics.fmean(ordered) * 1000,
+        'p50_ms': percentile(0.50),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+    }
+
+def write_report(report, path=None):
+    """
+    Writes the report as JSON to a file, or to stdout when no path is given
+    """
+
+    output = json.dumps(report, indent=2, sort_keys=True, default=str)
+
+    if path:
+        with open(path, 'w') as handle:
+            handle.write(output + '\n')
+    else:
+        sys.stdout.write(output + '\n')
@@ -0,0 +1,112 @@
+"""
+Microbenchmark of the response compression: for list pages of synthetic posts
+(seed_posts data), reports the bytes each coding saves against the CPU time
+it costs, and the time saved when the compressed body comes from the cache.
+It needs no database.
+
+    python -m benchmarks.compression --repeat 50
+"""
+
+import argparse
+
+from benchmarks.common import setup, summarize, timed, write_report
+
+
+def get_payloads(args):
+    """
+    Renders the bodies of a few typical responses, like the list view does
+    """
+
+    from posts.management.commands.seed_posts import PostGenerator
+    from posts.renderers import FastJSONRenderer
+    from posts.utils.fields import POST_FIELDS, VIEWS
+    from posts.utils.representation import represent_rows
+
+    generator = PostGenerator(seed=args.seed)
+    rows = [(number, *post) for number, post in enumerate(generator.posts(max(args.sizes)), start=1)]
+
+    payloads = {}
+    for size in args.sizes:
+        for view in ('full', 'compact'):
+            fields = VIEWS[view]
+            page = [tuple(row[POST_FIELDS.index(name)] for name in fields) for row in rows[:size]]
+            payloads[f'list-{view}-{size}'] = FastJSONRenderer().render(represent_rows(page, fields))
+
+    return payloads
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[20, 100], help='posts per page')
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the JSON report to this file')
+    args = parser.parse_args()
+
+    setup()
+
+    from core.compression import ENCODINGS, CompressionMiddleware
+    from django.conf import settings
+    from django.core.cache import caches
+
+    payloads = get_payloads(args)
+    report = {'encodings': list(ENCODINGS), 'payloads': {}}
+
+    # The posts cache as configured (LocMemCache by default, Redis/Memcached in production)
+    cache = caches[settings.POSTS_CACHE_ALIAS]
+
+    for name, body in payloads.items():
+        results = {'bytes': len(body)}
+
+        for encoding, compress in ENCODINGS.items():
+            compressed = compress(body)
+            cpu = summarize(timed(lambda: compress(body), args.repeat))
+
+            # A hit of the compressed body cache instead of compressing again
+            key = f'benchmark:compressed:{encoding}:{name}'
+            cache.set(key, compressed)
+            hit = summarize(timed(lambda: cache.get(key), args.repeat))
+            cache.delete(key)
+
+            saved = len(body) - len(compressed)
+            results[encoding] = {
+                'bytes': len(compressed),
+                'ratio': len(compressed) / len(body),
+                'saved_bytes': saved,
+                'compress': cpu,
+                'cache_hit': hit,
+                # What the CPU buys: bytes not sent per millisecond of compression
+                'saved_kb_per_cpu_ms': saved / 1024 / cpu['p50_ms'] if cpu['p50_ms'] else None,
+            }
+
+        report['payloads'][name] = results
+
+    # The whole middleware on the largest page, cold (compressing) and warm (cache hit)
+    from django.http import HttpResponse
+    from django.test import RequestFactory
+
+    body = payloads[f'list-full-{max(args.sizes)}']
+    request = RequestFactory().get('/posts/', HTTP_ACCEPT_ENCODING=', '.join(ENCODINGS))
+
+    def respond(etag=None):
+        response = HttpResponse(body, content_type='application/json')
+        if etag:
+            response['ETag'] = etag
+        return response
+
+    # Without an ETag nothing is cached, every body is compressed
+    cold = summarize(timed(lambda: CompressionMiddleware(lambda request: respond())(request), args.repeat))
+
+    middleware = CompressionMiddleware(lambda request: respond('"benchmark"'))
+    middleware(request)
+    warm = summarize(timed(lambda: middleware(request), args.repeat))
+
+    # Leave the cache as it was (it may be shared with a running API)
+    cache.delete(middleware.get_cache_key(request, respond('"benchmark"'), next(iter(ENCODINGS))))
+
+    report['middleware'] = {'payload': f'list-full-{max(args.sizes)}', 'cold': cold, 'warm': warm}
+
+    write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
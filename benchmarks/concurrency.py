@@ -0,0 +1,105 @@
+"""
+Load test of a running server: many concurrent clients hitting the same URL.
+
+Start the project once under WSGI and once under ASGI, with a single worker each,
+and point the script at both, e.g.:
+
+    gunicorn core.wsgi:application --workers 1 --threads 8 --bind 127.0.0.1:8000
+    uvicorn core.asgi:application --workers 1 --port 8001
+
+    python -m benchmarks.concurrency \\
+        --target wsgi=http://127.0.0.1:8000/posts/ \\
+        --target asgi=http://127.0.0.1:8001/async/posts/ \\
+        --concurrency 1 10 50 200
+"""
+
+import argparse
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+from benchmarks.common import summarize, write_report
+
+
+async def fetch(url, read_delay):
+    """
+    Sends a GET request and reads the response, slowly if `read_delay` is set
+    """
+
+    parts = urlsplit(url)
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+
+    path = parts.path + (f'?{parts.query}' if parts.query else '')
+    writer.write(f'GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\nConnection: close\r\n\r\n'.encode())
+    await writer.drain()
+
+    status_line = await reader.readline()
+
+    # A slow client keeps the connection (and the server's worker) busy
+    while chunk := await reader.read(16 * 1024):
+        if read_delay:
+            await asyncio.sleep(read_delay)
+
+    writer.close()
+    await writer.wait_closed()
+    return int(status_line.split()[1])
+
+async def run(url, concurrency, requests, read_delay):
+    """
+    Runs `requests` requests with `concurrency` clients, returns the latencies and errors
+    """
+
+    latencies = []
+    errors = 0
+    queue = asyncio.Queue()
+
+    for _ in range(requests):
+        queue.put_nowait(None)
+
+    async def client():
+        nonlocal errors
+        while not queue.empty():
+            queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                code = await fetch(url, read_delay)
+                if code >= 400:
+                    errors += 1
+            except OSError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[client() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+
+    return latencies, errors, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target', action='append', required=True, help='name=url, may be repeated')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 10, 50, 200])
+    parser.add_argument('--requests', type=int, default=1000, help='requests per concurrency level')
+    parser.add_argument('--read-delay', type=float, default=0.0, help='seconds a client waits between reads')
+    parser.add_argument('--output', help='write the JSON report to this file')
+    args = parser.parse_args()
+
+    report = {'requests': args.requests, 'read_delay': args.read_delay, 'targets': {}}
+
+    for target in args.target:
+        name, url = target.split('=', 1)
+        results = report['targets'][name] = {'url': url, 'levels': {}}
+
+        for concurrency in args.concurrency:
+            latencies, errors, elapsed = asyncio.run(run(url, concurrency, args.requests, args.read_delay))
+            results['levels'][concurrency] = {
+                **summarize(latencies),
+                'errors': errors,
+                'requests_per_second': len(latencies) / elapsed,
+            }
+
+    write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,288 @@
+"""
+Runs every endpoint of posts/urls.py against the configured database and reports
+the p50/p95/p99 latency, throughput and queries per request of each one.
+
+Seed a scratch database once, then compare runs (e.g. before/after a change):
+
+    python manage.py seed_posts --rows 100000 --clear
+    python -m benchmarks.endpoints --output before.json
+    python -m benchmarks.endpoints --output after.json --compare before.json
+"""
+
+import argparse
+import contextlib
+import datetime
+import json
+import platform
+import subprocess
+import time
+
+from benchmarks.common import get_client, setup, summarize, write_report
+
+# Category of the posts the benchmark creates, they are deleted at the end
+BENCHMARK_CATEGORY = 'Benchmark'
+
+
+def get_commit():
+    """
+    Returns the current git commit, to tell the reports apart
+    """
+
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def get_context(args):
+    """
+    Picks the existing posts and params the scenarios use, from the seeded data
+    """
+
+    from django.db.models import Max, Min
+    from posts.management.commands.seed_posts import make_names
+    from posts.models import Post
+    from posts.utils.pagination import encode_cursor
+
+    posts = Post.objects.order_by('-created_at', '-id')
+    total = posts.count()
+
+    if total < args.sample:
+        raise SystemExit(f'Only {total} posts, seed the database first (python manage.py seed_posts).')
+
+    # Posts spread over the whole table (one primary key lookup each), so the reads are not all in the same pages
+    bounds = Post.objects.aggregate(first=Min('id'), last=Max('id'))
+    step = (bounds['last'] - bounds['first']) / args.sample
+    ids = [
+        Post.objects.filter(pk__gte=bounds['first'] + int(index * step)).order_by('pk').values_list('pk', flat=True).first()
+        for index in range(args.sample)
+    ]
+
+    # A cursor in the middle of the list, the deep pages used to be the slow ones
+    middle = posts.values_list('created_at', 'id')[total // 2]
+
+    # A change feed consumer halfway through the backlog
+    changes = Post.objects.order_by('update_at', 'id').values_list('update_at', 'id')[total // 2]
+
+    # Posts the delete scenarios remove, one per run (sync and async)
+    victims = Post.objects.bulk_create([
+        Post(title=f'Victim {number}', content='Deleted by the benchmark', category=BENCHMARK_CATEGORY)
+        for number in range(2 * (args.repeat + args.warmup))
+    ])
+
+    return {
+        'rows': total,
+        'ids': ids,
+        'cursor': encode_cursor(middle),
+        'changes_cursor': encode_cursor(changes),
+        'victims': [post.pk for post in victims],
+        # The most common tag of seed_posts, and the rarest one to export a small part of the posts
+        'tag': make_names(1)[0],
+        # The most common category of seed_posts
+        'category': make_names(1)[0].title(),
+        'rare_tag': args.export_tag or make_names(args.tags)[-1],
+    }
+
+def get_scenarios(context, args):
+    """
+    Returns the scenarios as (name, url name, method, build) tuples.
+
+    `build(index)` returns the URL kwargs and the query params (GET) or body of the index-th request.
+    """
+
+    ids = context['ids']
+    victims = iter(context['victims'])
+
+    def pk(index):
+        return {'pk': ids[index % len(ids)]}
+
+    def post(index):
+        return {'title': f'Benchmark {index}', 'content': 'Benchmark content ' * 50, 'category': BENCHMARK_CATEGORY, 'tags': ['bench']}
+
+    return [
+        ('list', 'post-list', 'get', lambda index: ({}, {})),
+        ('list-compact', 'post-list', 'get', lambda index: ({}, {'view': 'compact'})),
+        ('list-deep-cursor', 'post-list', 'get', lambda index: ({}, {'cursor': context['cursor']})),
+        ('list-count-estimate', 'post-list', 'get', lambda index: ({}, {'count': 'estimate'})),
+        ('list-search', 'post-list', 'get', lambda index: ({}, {'search': args.term})),
+        ('list-tag', 'post-list', 'get', lambda index: ({}, {'tag': context['tag']})),
+        ('list-category', 'post-list', 'get', lambda index: ({}, {'category': context['category']})),
+        ('list-ordering-title', 'post-list', 'get', lambda index: ({}, {'ordering': 'title'})),
+        ('list-ordering-updated', 'post-list', 'get', lambda index: ({}, {'ordering': '-update_at'})),
+        ('export', 'post-export', 'get', lambda index: ({}, {'format': 'ndjson', 'tag': context['rare_tag']})),
+        ('get', 'post-get', 'get', lambda index: (pk(index), {})),
+        # A feed page of posts fetched at once instead of one request each
+        ('many', 'post-many', 'get', lambda index: ({}, {'ids': ','.join(str(ids[(index + offset) % len(ids)]) for offset in range(20))})),
+        ('create', 'post-create', 'post', lambda index: ({}, post(index))),
+        ('update', 'post-update', 'patch', lambda index: (pk(index), {'title': f'Updated {index}'})),
+        ('delete', 'post-delete', 'delete', lambda index: ({'pk': next(victims)}, None)),
+        ('bulk-create', 'post-bulk', 'post', lambda index: ({}, [post(index)] * args.bulk_size)),
+        ('cache-stats', 'post-cache-stats', 'get', lambda index: ({}, {})),
+        ('changes', 'post-changes', 'get', lambda index: ({}, {'since': context['changes_cursor'], 'limit': 100})),
+        ('facets', 'post-facets', 'get', lambda index: ({}, {})),
+        ('facets-search', 'post-facets', 'get', lambda index: ({}, {'search': args.term})),
+        # Prefixes of the search term, as typed one key at a time
+        ('autocomplete', 'post-autocomplete', 'get', lambda index: ({}, {'q': args.term[:index % len(args.term) + 1]})),
+        ('async-list', 'async-post-list', 'get', lambda index: ({}, {})),
+        ('async-get', 'async-post-get', 'get', lambda index: (pk(index), {})),
+        ('async-create', 'async-post-create', 'post', lambda index: ({}, post(index))),
+        ('async-update', 'async-post-update', 'patch', lambda index: (pk(index), {'title': f'Updated {index}'})),
+        ('async-delete', 'async-post-delete', 'delete', lambda index: ({'pk': next(victims)}, None)),
+    ]
+
+def check_coverage(scenarios):
+    """
+    Fails when an endpoint of posts/urls.py has no scenario, so new ones are not forgotten
+    """
+
+    from posts.urls import urlpatterns
+
+    missing = {pattern.name for pattern in urlpatterns} - {url_name for _, url_name, _, _ in scenarios}
+
+    if missing:
+        raise SystemExit(f'No benchmark scenario for: {", ".join(sorted(missing))}')
+
+@contextlib.contextmanager
+def capture_queries():
+    """
+    Collects the queries run on every database (primary and replicas)
+    """
+
+    from django.db import connections
+    from django.test.utils import CaptureQueriesContext
+
+    with contextlib.ExitStack() as stack:
+        contexts = [stack.enter_context(CaptureQueriesContext(connection)) for connection in connections.all()]
+        yield contexts
+
+def run_scenario(client, scenario, args):
+    """
+    Sends the requests of a scenario and returns its statistics
+    """
+
+    from django.urls import reverse
+
+    _, url_name, method, build = scenario
+
+    def send(index):
+        kwargs, data = build(index)
+        url = reverse(url_name, kwargs=kwargs)
+
+        if method == 'get':
+            response = client.get(url, data)
+        elif data is None:
+            response = getattr(client, method)(url)
+        else:
+            response = getattr(client, method)(url, json.dumps(data), content_type='application/json')
+
+        # Read streaming responses to the end, like a client would (the queries run meanwhile)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response
+
+    # Warm up (caches, connections...), the first request also counts the queries
+    with capture_queries() as contexts:
+        send(0)
+    queries = sum(len(context) for context in contexts)
+
+    for index in range(1, args.warmup):
+        send(index)
+
+    samples = []
+    statuses = {}
+
+    for index in range(args.warmup, args.warmup + args.repeat):
+        start = time.perf_counter()
+        response = send(index)
+        samples.append(time.perf_counter() - start)
+
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    return {
+        'url_name': url_name,
+        'method': method.upper(),
+        'queries': queries,
+        'statuses': statuses,
+        'requests_per_second': len(samples) / sum(samples),
+        **summarize(samples),
+    }
+
+def compare(report, path):
+    """
+    Adds the ratio to a previous report (new / old) of the main numbers of each scenario
+    """
+
+    with open(path) as handle:
+        previous = json.load(handle)
+
+    for name, result in report['scenarios'].items():
+        old = previous.get('scenarios', {}).get(name)
+        if old is None:
+            continue
+
+        result['compared'] = {
+            key: result[key] / old[key] if old[key] else None
+            for key in ('p50_ms', 'p95_ms', 'p99_ms', 'requests_per_second')
+        }
+        result['compared']['queries'] = result['queries'] - old['queries']
+
+    report['compared_to'] = previous.get('meta')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=100, help='timed requests per scenario')
+    parser.add_argument('--warmup', type=int, default=5, help='untimed requests per scenario (at least 1)')
+    parser.add_argument('--sample', type=int, default=100, help='distinct posts read/updated')
+    parser.add_argument('--term', default='python tutorial', help='search term')
+    parser.add_argument('--tags', type=int, default=500, help='--tags given to seed_posts')
+    parser.add_argument('--export-tag', help='tag of the exported posts, the rarest seeded one by default')
+    parser.add_argument('--bulk-size', type=int, default=50, help='posts per bulk request')
+    parser.add_argument('--only', nargs='+', help='run only these scenarios')
+    parser.add_argument('--compare', help='previous JSON report to compare with')
+    parser.add_argument('--output', help='write the JSON report to this file')
+    args = parser.parse_args()
+    args.warmup = max(args.warmup, 1)
+
+    setup()
+
+    import django
+    from django.db import connection
+    from posts.models import Post
+
+    context = get_context(args)
+    scenarios = get_scenarios(context, args)
+    check_coverage(scenarios)
+
+    client = get_client()
+
+    report = {
+        'meta': {
+            'commit': get_commit(),
+            'date': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'rows': context['rows'],
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'database_version': getattr(connection, 'pg_version', None),
+            'repeat': args.repeat,
+            'warmup': args.warmup,
+        },
+        'scenarios': {},
+    }
+
+    try:
+        for scenario in scenarios:
+            if args.only and scenario[0] not in args.only:
+                continue
+            report['scenarios'][scenario[0]] = run_scenario(client, scenario, args)
+    finally:
+        # Keep the seeded data as it was, so the next run is comparable
+        Post.objects.filter(category=BENCHMARK_CATEGORY).delete()
+
+    if args.compare:
+        compare(report, args.compare)
+
+    write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Compares the typical reads of the API on the posts table before and after
+partitioning it (partition_posts): latency, and the tables each plan touches
+(a pruned plan only reads the partitions of the requested dates).
+
+    python manage.py seed_posts --rows 5000000 --days 1460 --clear
+    python -m benchmarks.partitions --output before.json
+    python manage.py partition_posts --convert
+    python -m benchmarks.partitions --output after.json
+"""
+
+import argparse
+import json
+
+from benchmarks.common import setup, summarize, timed, write_report
+
+
+def get_relations(plan):
+    """
+    Returns the tables and indexes read by a plan node and its children
+    """
+
+    names = {plan[key] for key in ('Relation Name', 'Index Name') if key in plan}
+
+    for child in plan.get('Plans', []):
+        names |= get_relations(child)
+
+    return names
+
+def get_queries(args):
+    """
+    Returns the querysets of the list (first and deep page, category), detail and search reads
+    """
+
+    from django.http import QueryDict
+    from posts.models import Post
+    from posts.utils.fields import POST_FIELDS
+    from posts.utils.filters import filter_posts
+
+    posts = Post.objects.order_by('-created_at', '-id')
+    total = posts.count()
+
+    if not total:
+        raise SystemExit('No posts, seed the database first (python manage.py seed_posts).')
+
+    # The keyset position of a page in the middle of the list, and a post there
+    created_at, pk = posts.values_list('created_at', 'id')[total // 2]
+    category = posts.values_list('category', flat=True).first()
+    search, ordering = filter_posts(QueryDict(f'search={args.term}'))
+
+    return {
+        'list': posts.values_list(*POST_FIELDS)[:args.limit],
+        'list-deep-cursor': posts.filter(created_at__lt=created_at).values_list(*POST_FIELDS)[:args.limit],
+        'list-category': posts.filter(category=category).values_list(*POST_FIELDS)[:args.limit],
+        'get': Post.objects.filter(pk=pk).values_list(*POST_FIELDS),
+        'search': search.order_by(*ordering).values_list(*POST_FIELDS)[:args.limit],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--limit', type=int, default=20, help='page size of the list queries')
+    parser.add_argument('--term', default='python', help='search term')
+    parser.add_argument('--output', help='write the JSON report to this file')
+    args = parser.parse_args()
+
+    setup()
+
+    from posts.utils.partitions import get_partitions, is_partitioned
+
+    partitioned = is_partitioned()
+    report = {'partitioned': partitioned, 'partitions': len(get_partitions()) if partitioned else 0, 'queries': {}}
+
+    for name, queryset in get_queries(args).items():
+        plan = json.loads(queryset.explain(format='json', analyze=True))[0]['Plan']
+        relations = sorted(get_relations(plan))
+
+        report['queries'][name] = {
+            'relations': relations,
+            'relations_read': len(relations),
+            'latency': summarize(timed(lambda: list(queryset.all()), args.repeat)),
+        }
+
+    write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Compares the full-text search of the post list with the old icontains search.
+
+    python -m benchmarks.search --rows 1000000 --seed
+"""
+
+import argparse
+
+from benchmarks.common import setup, summarize, timed, write_report
+
+# Words used to build the seeded posts, common words and rare ones
+VOCABULARY = [
+    'python', 'django', 'postgres', 'index', 'query', 'cache', 'server', 'client',
+    'deploy', 'docker', 'testing', 'release', 'feature', 'rust', 'golang', 'async',
+    'thread', 'memory', 'latency', 'network', 'design', 'pattern', 'review', 'update',
+    'kubernetes', 'serializer', 'migration', 'benchmark', 'profiling', 'tutorial',
+]
+
+SEED_SQL = """
+INSERT INTO posts_post (title, content, category, tags, created_at, update_at)
+SELECT
+    initcap(words[1 + (i * 7) %% 30]) || ' ' || words[1 + (i * 13) %% 30] || ' ' || i,
+    (SELECT string_agg(words[1 + ((i * 31 + n * 17) %% 30)], ' ') FROM generate_series(1, 80 + i %% 200) AS n),
+    initcap(words[1 + i %% 12]),
+    ARRAY[words[1 + i %% 30], words[1 + (i / 3) %% 30]],
+    now() - (i || ' seconds')::interval,
+    now() - (i || ' seconds')::interval
+FROM generate_series(%s, %s) AS i, (SELECT %s::text[] AS words) AS vocabulary
+"""
+
+
+def seed(rows, batch=100_000):
+    """
+    Inserts `rows` synthetic posts in batches, the search trigger fills the vectors
+    """
+
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        for start in range(1, rows + 1, batch):
+            end = min(start + batch - 1, rows)
+            cursor.execute(SEED_SQL, [start, end, VOCABULARY])
+        cursor.execute('ANALYZE posts_post')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000, help='posts to seed with --seed')
+    parser.add_argument('--seed', action='store_true', help='insert the synthetic posts first')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--limit', type=int, default=20, help='page size of each query')
+    parser.add_argument('--terms', nargs='+', default=['python', 'kubernetes profiling', 'serial', 'zzz'])
+    parser.add_argument('--output', help='write the JSON report to this file')
+    args = parser.parse_args()
+
+    setup()
+
+    from django.db.models import Q
+    from posts.models import Post
+    from posts.utils.search import SEARCH_ORDERING, search_posts
+
+    if args.seed:
+        seed(args.rows)
+
+    def old_search(term):
+        return list(
+            Post.objects.filter(
+                Q(title__icontains=term) |
+                Q(content__icontains=term) |
+                Q(category__icontains=term)
+            ).order_by('-created_at', '-id')[:args.limit]
+        )
+
+    def new_search(term):
+        return list(search_posts(Post.objects.all(), term).order_by(*SEARCH_ORDERING)[:args.limit])
+
+    report = {'rows': Post.objects.count(), 'limit': args.limit, 'terms': {}}
+
+    for term in args.terms:
+        old = summarize(timed(lambda: old_search(term), args.repeat))
+        new = summarize(timed(lambda: new_search(term), args.repeat))
+        report['terms'][term] = {
+            'icontains': old,
+            'fulltext': new,
+            'speedup_p50': old['p50_ms'] / new['p50_ms'] if new['p50_ms'] else None,
+        }
+
+    write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
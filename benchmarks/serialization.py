@@ -0,0 +1,67 @@
+"""
+Microbenchmark of the list representation: ModelSerializer + JSONRenderer
+against the tuple-based fast path + FastJSONRenderer. It needs no database.
+
+    python -m benchmarks.serialization --rows 10000
+"""
+
+import argparse
+import datetime
+
+from benchmarks.common import setup, summarize, timed, write_report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--output', help='write the JSON report to this file')
+    args = parser.parse_args()
+
+    setup()
+
+    from rest_framework.renderers import JSONRenderer
+    from posts.models import Post
+    from posts.renderers import FastJSONRenderer
+    from posts.serializers import PostSerializer
+    from posts.utils.fields import POST_FIELDS
+    from posts.utils.representation import represent_rows
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    posts = [
+        Post(
+            id=number,
+            title=f'Post number {number}',
+            content='Lorem ipsum dolor sit amet, consectetur adipiscing elit. ' * 10,
+            category='Benchmark',
+            tags=['python', 'django', 'rest'],
+            created_at=now - datetime.timedelta(seconds=number),
+            update_at=now,
+        )
+        for number in range(args.rows)
+    ]
+
+    # The same rows as `values_list(*POST_FIELDS)` returns them
+    rows = [tuple(getattr(post, name) for name in POST_FIELDS) for post in posts]
+
+    def serializer_path():
+        return JSONRenderer().render(PostSerializer(posts, many=True).data)
+
+    def fast_path():
+        return FastJSONRenderer().render(represent_rows(rows, POST_FIELDS))
+
+    assert serializer_path() == fast_path(), 'the fast path output differs'
+
+    slow = summarize(timed(serializer_path, args.repeat))
+    fast = summarize(timed(fast_path, args.repeat))
+
+    write_report({
+        'rows': args.rows,
+        'model_serializer': slow,
+        'fast_path': fast,
+        'speedup_p50': slow['p50_ms'] / fast['p50_ms'],
+    }, args.output)
+
+
+if __name__ == '__main__':
+    main()
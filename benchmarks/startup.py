@@ -0,0 +1,100 @@
+"""
+Compares the default settings (core.settings) with the API-only profile
+(core.settings_api): the cold start of a worker, a new interpreter importing
+core.wsgi, and the time Django spends per request on `/post/<pk>/`. The post
+is served from the post cache, so the database is not what is measured.
+
+    python -m benchmarks.startup --repeat 10 --requests 2000
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.common import summarize, write_report
+
+PROFILES = ('core.settings', 'core.settings_api')
+
+
+def run_child(profile, *args):
+    """
+    Runs this script in a new interpreter with the given settings, returns its wall time and output
+    """
+
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': profile}
+
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, *args], env=env, capture_output=True, text=True, check=True)
+    return time.perf_counter() - start, result.stdout
+
+def measure_requests(args):
+    """
+    In the child: times `/post/<pk>/` requests through the whole middleware chain, prints the summary
+    """
+
+    from benchmarks.common import get_client, setup, timed
+
+    setup()
+
+    from django.conf import settings
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from posts.models import Post
+
+    pk = Post.objects.values_list('pk', flat=True).first()
+    if pk is None:
+        raise SystemExit('No posts, seed the database first (python manage.py seed_posts).')
+
+    client = get_client()
+    url = f'/post/{pk}/'
+
+    # The first requests fill the post cache and import what the views need
+    for _ in range(args.warmup):
+        client.get(url)
+
+    with CaptureQueriesContext(connection) as queries:
+        samples = timed(lambda: client.get(url), args.requests)
+
+    sys.stdout.write(json.dumps({
+        'latency': summarize(samples),
+        'queries_per_request': len(queries) / args.requests,
+        'apps': len(settings.INSTALLED_APPS),
+        'middleware': len(settings.MIDDLEWARE),
+        'debug': settings.DEBUG,
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=10, help='cold starts per profile')
+    parser.add_argument('--requests', type=int, default=2000, help='requests per profile')
+    parser.add_argument('--warmup', type=int, default=50)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--output', help='write the JSON report to this file')
+    args = parser.parse_args()
+
+    if args.child:
+        return measure_requests(args)
+
+    report = {}
+
+    for profile in PROFILES:
+        # Importing core.wsgi loads the settings, the apps, the middleware chain and the URLconf
+        boots = [run_child(profile, '-c', 'import core.wsgi')[0] for _ in range(args.repeat)]
+
+        _, output = run_child(profile, '-m', 'benchmarks.startup', '--child', '--requests', str(args.requests), '--warmup', str(args.warmup))
+        report[profile] = {'cold_start': summarize(boots), 'request': json.loads(output)}
+
+    default, lean = (report[profile] for profile in PROFILES)
+    report['ratio'] = {
+        'cold_start_p50': lean['cold_start']['p50_ms'] / default['cold_start']['p50_ms'],
+        'request_p50': lean['request']['latency']['p50_ms'] / default['request']['latency']['p50_ms'],
+    }
+
+    write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -14,3 +14,10 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_asgi_application()
+
+# Build the in-memory autocomplete index of each worker as soon as it serves its first request
+from django.core.signals import request_started
+
+from posts.utils.autocomplete import warm_on_first_request
+
+request_started.connect(warm_on_first_request)
@@ -0,0 +1,214 @@
+import gzip
+import hashlib
+import re
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Compression levels for responses built on the fly: most of the gain for a fraction of the CPU of the maximum
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+ZSTD_LEVEL = 3
+
+
+def compress_gzip(data):
+    # A fixed mtime, the same body always gives the same bytes
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+def compress_brotli(data):
+    return brotli.compress(data, quality=BROTLI_QUALITY, mode=brotli.MODE_TEXT)
+
+def compress_zstd(data):
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+
+# Content codings the server can produce, the preferred one first
+ENCODINGS = {
+    name: compress
+    for name, compress, available in (
+        ('zstd', compress_zstd, zstandard is not None),
+        ('br', compress_brotli, brotli is not None),
+        ('gzip', compress_gzip, True),
+    )
+    if available
+}
+
+# Strong ETags of compressed bodies end with the coding, the views compare the ETag of the identity body
+ETAG_SUFFIX_RE = re.compile(r'-(zstd|br|gzip)"')
+
+
+def parse_accept_encoding(header):
+    """
+    Returns the content codings accepted by the client, with their q-value
+    """
+
+    accepted = {}
+
+    for item in header.split(','):
+        name, _, params = item.strip().partition(';')
+        quality = 1.0
+
+        match = re.search(r'q\s*=\s*([0-9.]+)', params)
+        if match:
+            try:
+                quality = float(match.group(1))
+            except ValueError:
+                continue
+
+        if name:
+            accepted[name.strip().lower()] = quality
+
+    return accepted
+
+def choose_encoding(accepted, encodings=ENCODINGS):
+    """
+    Returns the coding to send for the accepted ones (see parse_accept_encoding), None for the identity
+    """
+
+    wildcard = accepted.get('*', 0)
+    candidates = [name for name in encodings if accepted.get(name, wildcard) > 0]
+
+    # The client's preference first, the server's order for ties
+    return max(candidates, key=lambda name: accepted.get(name, wildcard), default=None)
+
+def get_compression_cache():
+    """
+    Returns the cache backend holding the compressed bodies
+    """
+
+    return caches[settings.POSTS_CACHE_ALIAS]
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses with the best coding the client accepts (zstd and br
+    when their packages are installed, gzip otherwise).
+
+    Bodies under POSTS_COMPRESS_MIN_SIZE bytes are sent as they are. Compressed
+    bodies of responses with an ETag are cached by ETag and coding, so a page
+    requested again is not compressed again. Streamed responses (exports) are
+    compressed with gzip while they are sent.
+    """
+
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def prepare(self, request):
+        """
+        Removes the coding suffix of the ETags sent back by the client, so the views can compare them
+        """
+
+        for header in ('HTTP_IF_MATCH', 'HTTP_IF_NONE_MATCH'):
+            if header in request.META:
+                value = request.META[header]
+                request.META[header] = ETAG_SUFFIX_RE.sub('"', value)
+
+                # A 304 repeats the ETag of the body the client has
+                match = ETAG_SUFFIX_RE.search(value)
+                if header == 'HTTP_IF_NONE_MATCH' and match:
+                    request._etag_encoding = match.group(1)
+
+    def get_cache_key(self, request, response, encoding):
+        etag = response.get('ETag')
+
+        # Only a strong ETag identifies the exact bytes of the body
+        if request.method not in ('GET', 'HEAD') or response.status_code != 200 or not etag or etag.startswith('W/'):
+            return None
+
+        # The same URL and ETag can still be rendered as another media type (e.g. the browsable API)
+        digest = hashlib.sha1(f'{request.get_full_path()}|{response.get("Content-Type")}|{etag}'.encode()).hexdigest()
+        return f'posts:compressed:{encoding}:{digest}'
+
+    def compress(self, request, response):
+        """
+        Compresses the body of a response in place, if it is worth it
+        """
+
+        if response.has_header('Content-Encoding'):
+            return response
+
+        # Whether or not this one is compressed, the response depends on the header
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        if response.status_code == 304:
+            # The client keeps the body it has, with the coding it was sent with
+            encoding = getattr(request, '_etag_encoding', None)
+            return self.set_etag(response, encoding) if encoding else response
+
+        accepted = parse_accept_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        encoding = choose_encoding(accepted)
+
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            # Async streams are sent as they are, gzip is the only coding compressed piece by piece
+            if response.is_async or choose_encoding(accepted, ('gzip',)) is None:
+                return response
+
+            response.streaming_content = compress_sequence(response.streaming_content)
+            del response['Content-Length']
+            return self.set_encoding(response, 'gzip')
+
+        if len(response.content) < settings.POSTS_COMPRESS_MIN_SIZE:
+            return response
+
+        cache = get_compression_cache()
+        key = self.get_cache_key(request, response, encoding)
+        body = cache.get(key) if key else None
+
+        if body is None:
+            body = ENCODINGS[encoding](response.content)
+
+            # Only small enough bodies are cached (e.g. the 1 MB item limit of Memcached)
+            if key and len(body) <= settings.POSTS_COMPRESS_CACHE_MAX_SIZE:
+                cache.set(key, body, timeout=settings.POSTS_COMPRESS_CACHE_TIMEOUT)
+
+        # Incompressible content (already compressed, random...) is sent as it is
+        if len(body) >= len(response.content):
+            return response
+
+        response.content = body
+        response['Content-Length'] = str(len(body))
+        return self.set_encoding(response, encoding)
+
+    def set_encoding(self, response, encoding):
+        response['Content-Encoding'] = encoding
+        return self.set_etag(response, encoding)
+
+    def set_etag(self, response, encoding):
+        # Another body is another representation, so it gets another strong ETag
+        etag = response.get('ETag')
+        if etag and not etag.startswith('W/') and etag.endswith('"'):
+            response['ETag'] = f'{etag[:-1]}-{encoding}"'
+
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        self.prepare(request)
+        return self.compress(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        self.prepare(request)
+        return self.compress(request, await self.get_response(request))
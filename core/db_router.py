@@ -0,0 +1,134 @@
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.urls import Resolver404, resolve
+
+# True while the current request must read from the primary database
+_pinned = ContextVar('pinned_to_primary', default=False)
+
+# Methods that never write, they can be served by a replica
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Views that only read whatever the method (a POST body for a long list of IDs)
+READ_ONLY_URL_NAMES = {'post-many'}
+
+
+def is_pinned():
+    """
+    Returns True if the current request reads from the primary database
+    """
+
+    return _pinned.get()
+
+def get_replicas():
+    """
+    Returns the aliases of the read replicas (DATABASES entries starting with `replica`)
+    """
+
+    return [alias for alias in settings.DATABASES if alias.startswith('replica')]
+
+
+class PrimaryReplicaRouter:
+    """
+    Sends writes to the primary (`default`) and reads to a random replica,
+    unless the current request is pinned to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = get_replicas()
+
+        if is_pinned() or not replicas:
+            return 'default'
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every database holds the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary
+        return db == 'default'
+
+
+class PinPrimaryMiddleware:
+    """
+    Pins a client to the primary for POSTS_PRIMARY_PIN_SECONDS after it writes,
+    so it reads its own changes even if the replicas lag behind.
+
+    The end of the window is kept in a cookie, writes are always pinned.
+    """
+
+    cookie_name = 'pin_primary'
+
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def is_write(self, request):
+        """
+        Returns True if the request may write
+        """
+
+        if request.method in SAFE_METHODS:
+            return False
+
+        try:
+            return resolve(request.path_info).url_name not in READ_ONLY_URL_NAMES
+        except Resolver404:
+            return True
+
+    def is_pinned(self, request):
+        """
+        Returns True if the request must read from the primary
+        """
+
+        if self.is_write(request):
+            return True
+
+        try:
+            return float(request.COOKIES.get(self.cookie_name, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def process_response(self, request, response):
+        """
+        Starts (or extends) the pin window after a successful write
+        """
+
+        if self.is_write(request) and response.status_code < 400:
+            window = settings.POSTS_PRIMARY_PIN_SECONDS
+            response.set_cookie(self.cookie_name, str(time.time() + window), max_age=window, httponly=True, samesite='Lax')
+
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        token = _pinned.set(self.is_pinned(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            _pinned.reset(token)
+
+        return self.process_response(request, response)
+
+    async def __acall__(self, request):
+        token = _pinned.set(self.is_pinned(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _pinned.reset(token)
+
+        return self.process_response(request, response)
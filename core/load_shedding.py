@@ -0,0 +1,126 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+
+# Cache key prefix of the numbers of requests in flight (all the workers sharing the cache), one per window
+IN_FLIGHT_KEY = 'posts:in-flight'
+
+# Routes that do not touch the database, they are always served
+EXEMPT_URL_NAMES = frozenset({'post-autocomplete', 'post-cache-stats', 'metrics'})
+
+
+def get_shedding_cache():
+    """
+    Returns the cache backend holding the in-flight counter
+    """
+
+    return caches[settings.POSTS_THROTTLE_CACHE_ALIAS]
+
+def in_flight_key(window):
+    """
+    Returns the cache key of the counter of the requests that started in a window
+    """
+
+    return f'{IN_FLIGHT_KEY}:{window}'
+
+def current_window():
+    """
+    Returns the number of the POSTS_IN_FLIGHT_TIMEOUT seconds window of now
+    """
+
+    return int(time.time() // settings.POSTS_IN_FLIGHT_TIMEOUT)
+
+
+class LoadSheddingMiddleware:
+    """
+    Answers 503 with `Retry-After` right away when more than POSTS_MAX_IN_FLIGHT
+    requests are already running, instead of queueing more work on the database
+    and letting the latency of every request grow.
+
+    Requests are counted in the window of POSTS_IN_FLIGHT_TIMEOUT seconds they
+    started in, and counted out of that same window. The requests in flight are
+    those of the current and the previous windows: increments lost by a killed
+    worker are forgotten after two windows instead of blocking the API forever.
+    """
+
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def enter(self, request):
+        """
+        Counts the request in, returns the 503 response if there is too much in flight
+        """
+
+        cache = get_shedding_cache()
+        window = current_window()
+        key = in_flight_key(window)
+
+        # Kept for two windows, the requests of this one are counted out of it during the next one
+        timeout = 2 * settings.POSTS_IN_FLIGHT_TIMEOUT
+
+        # add() does nothing if the counter exists, incr() is atomic in the shared backends
+        cache.add(key, 0, timeout=timeout)
+        try:
+            in_flight = cache.incr(key)
+        except ValueError:
+            # Evicted in between, count this request alone
+            cache.add(key, 1, timeout=timeout)
+            in_flight = 1
+
+        request._in_flight_key = key
+
+        # Plus the requests of the previous window still running
+        in_flight += cache.get(in_flight_key(window - 1), 0)
+
+        if in_flight > settings.POSTS_MAX_IN_FLIGHT:
+            response = JsonResponse({'detail': 'The service is overloaded, try again later.'}, status=503)
+            response['Retry-After'] = str(settings.POSTS_SHED_RETRY_AFTER)
+            return response
+
+        return None
+
+    def leave(self, request):
+        """
+        Counts the request out of the window it was counted in
+        """
+
+        key = getattr(request, '_in_flight_key', None)
+
+        if key is not None:
+            try:
+                get_shedding_cache().decr(key)
+            except ValueError:
+                # Expired or evicted meanwhile, along with the other requests of its window
+                pass
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # The route is known here, so the requests that do not reach the database are not counted
+        if not settings.POSTS_MAX_IN_FLIGHT or request.resolver_match.url_name in EXEMPT_URL_NAMES:
+            return None
+
+        return self.enter(request)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        try:
+            return self.get_response(request)
+        finally:
+            self.leave(request)
+
+    async def __acall__(self, request):
+        try:
+            return await self.get_response(request)
+        finally:
+            # Cache only, not queued behind the ORM calls of the other requests in the shared thread
+            await sync_to_async(self.leave, thread_sensitive=False)(request)
@@ -0,0 +1,322 @@
+import bisect
+import functools
+import hmac
+import logging
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse
+
+logger = logging.getLogger(__name__)
+
+# Timings of the request being handled, None outside of a request
+_timings = ContextVar('request_timings', default=None)
+
+# True while a slow query is being explained, so the EXPLAIN itself is not timed
+_explaining = ContextVar('explaining_query', default=False)
+
+# Upper bounds of the histogram buckets, in seconds and in queries
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Phases timed inside a request, besides the total
+PHASES = ('db', 'serialize', 'render')
+
+
+class Timings:
+    """
+    Time spent in each phase of a request, and the number of queries it ran.
+    """
+
+    __slots__ = ('phases', 'queries', 'active')
+
+    def __init__(self):
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.queries = 0
+        # Phases being timed, a nested call of the same phase is not counted twice
+        self.active = set()
+
+
+def timed(phase):
+    """
+    Decorator that adds the duration of the calls to a phase of the current request
+    """
+
+    def decorator(func):
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            timings = _timings.get()
+
+            if timings is None or phase in timings.active:
+                return func(*args, **kwargs)
+
+            timings.active.add(phase)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timings.phases[phase] += time.perf_counter() - start
+                timings.active.discard(phase)
+
+        return wrapper
+
+    return decorator
+
+def explain_query(connection, sql, params):
+    """
+    Returns the plan of a query as text, or None if it cannot be explained
+    """
+
+    token = _explaining.set(True)
+    try:
+        # In a savepoint, a failed EXPLAIN must not break the transaction of the request
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+            return '\n'.join(' '.join(str(value) for value in row) for row in cursor.fetchall())
+    except DatabaseError:
+        return None
+    finally:
+        _explaining.reset(token)
+
+def record_query(execute, sql, params, many, context):
+    """
+    Execute wrapper that times the queries of the current request and logs the slow ones
+    """
+
+    timings = _timings.get()
+    slow_ms = settings.POSTS_SLOW_QUERY_MS
+
+    if (timings is None and not slow_ms) or _explaining.get():
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        result = execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+
+        if timings is not None:
+            timings.phases['db'] += duration
+            timings.queries += 1
+
+    # Only a sample of the slow reads is explained, the plan costs one more round trip
+    if (
+        slow_ms and duration * 1000 >= slow_ms and not many
+        and sql.lstrip()[:6].upper() in ('SELECT', 'WITH')
+        and random.random() < settings.POSTS_SLOW_QUERY_SAMPLE_RATE
+    ):
+        plan = explain_query(context['connection'], sql, params)
+        logger.warning('Slow query (%.1f ms): %s\n%s', duration * 1000, sql, plan, extra={'duration': duration, 'sql': sql, 'plan': plan})
+
+    return result
+
+def install_query_timer(connection, **kwargs):
+    """
+    Adds record_query to the execute wrappers of a connection (once)
+    """
+
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+# Every connection opened from now on (in any thread) is timed
+connection_created.connect(install_query_timer)
+
+
+class Histogram:
+    """
+    Prometheus-style histogram: count per bucket, sum and count of the observations.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        # The last slot is the +Inf bucket
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self):
+        """
+        Yields the (le, cumulative count) pairs of the buckets
+        """
+
+        total = 0
+        for bound, count in zip((*self.buckets, '+Inf'), self.counts):
+            total += count
+            yield bound, total
+
+
+class MetricsRegistry:
+    """
+    Per-route request metrics of this process, exported in the Prometheus text format.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = {}
+        self.histograms = {}
+
+    def histogram(self, name, labels, buckets):
+        key = (name, labels)
+        if key not in self.histograms:
+            self.histograms[key] = Histogram(buckets)
+        return self.histograms[key]
+
+    def observe(self, method, route, code, duration, timings):
+        """
+        Records a finished request
+        """
+
+        labels = (('method', method), ('route', route))
+
+        with self.lock:
+            key = (*labels, ('status', str(code)))
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+            self.histogram('http_request_duration_seconds', labels, DURATION_BUCKETS).observe(duration)
+            self.histogram('http_request_queries', labels, QUERY_BUCKETS).observe(timings.queries)
+
+            for phase, seconds in timings.phases.items():
+                self.histogram('http_request_phase_seconds', (*labels, ('phase', phase)), DURATION_BUCKETS).observe(seconds)
+
+    def clear(self):
+        with self.lock:
+            self.requests.clear()
+            self.histograms.clear()
+
+    def render(self):
+        """
+        Returns the metrics in the Prometheus text exposition format
+        """
+
+        def format_labels(labels):
+            return ','.join('{}="{}"'.format(name, value.replace('\\', '\\\\').replace('"', '\\"')) for name, value in labels)
+
+        lines = [
+            '# HELP http_requests_total Requests handled, by route and status.',
+            '# TYPE http_requests_total counter',
+        ]
+
+        with self.lock:
+            for labels, count in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{{{format_labels(labels)}}} {count}')
+
+            for name, help_text in (
+                ('http_request_duration_seconds', 'Time to build the response.'),
+                ('http_request_phase_seconds', 'Time spent in the database, serializing and rendering.'),
+                ('http_request_queries', 'Database queries per request.'),
+            ):
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+
+                for (metric, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0]):
+                    if metric != name:
+                        continue
+
+                    text = format_labels(labels)
+                    for bound, count in histogram.samples():
+                        lines.append(f'{name}_bucket{{{text},le="{bound}"}} {count}')
+                    lines.append(f'{name}_sum{{{text}}} {histogram.sum}')
+                    lines.append(f'{name}_count{{{text}}} {histogram.count}')
+
+        return '\n'.join(lines) + '\n'
+
+
+# Metrics of this process (each worker has its own, like the cache counters)
+registry = MetricsRegistry()
+
+
+def metrics_view(request):
+    """
+    Serves the metrics of this process for Prometheus, only to the requests
+    with the POSTS_METRICS_TOKEN bearer token (not served when it is empty)
+    """
+
+    token = settings.POSTS_METRICS_TOKEN
+
+    # Route names, timings and slow routes are not for the public
+    if not token:
+        raise Http404
+
+    if not hmac.compare_digest(request.headers.get('Authorization', '').encode(), f'Bearer {token}'.encode()):
+        return HttpResponse(status=401, headers={'WWW-Authenticate': 'Bearer'})
+
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class MetricsMiddleware:
+    """
+    Times each request (total, database, serialization, rendering), sends the
+    times in a `Server-Timing` header and adds them to the per-route metrics.
+
+    Streamed responses are timed until the response starts, not while it is sent.
+    """
+
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def start(self):
+        # Connections opened before this module was imported are not timed yet
+        for connection in connections.all(initialized_only=True):
+            install_query_timer(connection)
+
+        timings = Timings()
+        return timings, _timings.set(timings), time.perf_counter()
+
+    def finish(self, request, response, timings, start):
+        """
+        Adds the Server-Timing header and records the request
+        """
+
+        duration = time.perf_counter() - start
+
+        if settings.POSTS_SERVER_TIMING:
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={timings.phases["db"] * 1000:.2f};desc="{timings.queries} queries"',
+                *(f'{phase};dur={timings.phases[phase] * 1000:.2f}' for phase in PHASES[1:]),
+                f'total;dur={duration * 1000:.2f}',
+            ])
+
+        # The route pattern, not the path, keeps one series per endpoint
+        match = getattr(request, 'resolver_match', None)
+        route = match.route if match is not None else 'unmatched'
+
+        registry.observe(request.method, route, response.status_code, duration, timings)
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        timings, token, start = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _timings.reset(token)
+
+        return self.finish(request, response, timings, start)
+
+    async def __acall__(self, request):
+        timings, token, start = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _timings.reset(token)
+
+        return self.finish(request, response, timings, start)
@@ -24,14 +24,19 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'posts',
     'rest_framework',
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
+    'core.compression.CompressionMiddleware',
+    'core.load_shedding.LoadSheddingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'core.db_router.PinPrimaryMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -72,6 +77,36 @@ DATABASES = {
     }
 }
 
+# Read replicas, one per host in DB_REPLICA_HOSTS (same name, user and password as the primary)
+for index, host in enumerate(filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(','))):
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'HOST': host.strip(),
+        'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        # Tests use the primary's test database through this alias
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# Reads go to the replicas, writes (and reads right after a write) to the primary
+DATABASE_ROUTERS = ['core.db_router.PrimaryReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    },
+    # List responses, kept in each process by default (least recently used ones evicted first)
+    'lists': {
+        'BACKEND': os.environ.get('LIST_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('LIST_CACHE_LOCATION', 'posts-lists'),
+        'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('LIST_CACHE_MAX_ENTRIES', 1000))},
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -117,5 +152,86 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
-    ]
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'posts.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'posts.throttling.TokenBucketThrottle',
+    ],
+    # Proxies in front of the app that append the client address to X-Forwarded-For, the throttle
+    # keys anonymous clients on REMOTE_ADDR when 0 (a client can send any X-Forwarded-For)
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
 }
+
+# Posts API
+
+# Page size of the post list when no `limit` is sent, and the largest `limit` accepted
+POSTS_PAGE_SIZE = int(os.environ.get('POSTS_PAGE_SIZE', 20))
+POSTS_MAX_PAGE_SIZE = int(os.environ.get('POSTS_MAX_PAGE_SIZE', 100))
+
+# Rows fetched per round trip by the server-side cursor of the export
+POSTS_EXPORT_CHUNK_SIZE = int(os.environ.get('POSTS_EXPORT_CHUNK_SIZE', 2000))
+
+# Cache of single posts (alias in CACHES), seconds to keep a post and to remember a missing one
+POSTS_CACHE_ALIAS = os.environ.get('POSTS_CACHE_ALIAS', 'default')
+POSTS_CACHE_TIMEOUT = int(os.environ.get('POSTS_CACHE_TIMEOUT', 300))
+POSTS_CACHE_NEGATIVE_TIMEOUT = int(os.environ.get('POSTS_CACHE_NEGATIVE_TIMEOUT', 30))
+
+# Largest number of items accepted by the bulk endpoint
+POSTS_BULK_MAX_SIZE = int(os.environ.get('POSTS_BULK_MAX_SIZE', 500))
+
+# Largest number of IDs accepted by the multi-get endpoint (/posts/many/)
+POSTS_MANY_MAX_IDS = int(os.environ.get('POSTS_MANY_MAX_IDS', 100))
+
+# Fields of the post list when no `fields`/`view` is sent: `full` or `compact` (without content)
+POSTS_LIST_DEFAULT_VIEW = os.environ.get('POSTS_LIST_DEFAULT_VIEW', 'full')
+
+# Seconds a client reads from the primary after it wrote something
+POSTS_PRIMARY_PIN_SECONDS = int(os.environ.get('POSTS_PRIMARY_PIN_SECONDS', 5))
+
+# Send the time spent in the database/serializers/renderers in a Server-Timing header
+POSTS_SERVER_TIMING = os.environ.get('POSTS_SERVER_TIMING', 'True') == 'True'
+
+# Bearer token Prometheus sends to read /metrics/, the endpoint is not served without one
+POSTS_METRICS_TOKEN = os.environ.get('POSTS_METRICS_TOKEN', '')
+
+# Log queries slower than this (milliseconds) with their plan, 0 disables it, and the fraction of them logged
+POSTS_SLOW_QUERY_MS = float(os.environ.get('POSTS_SLOW_QUERY_MS', 0))
+POSTS_SLOW_QUERY_SAMPLE_RATE = float(os.environ.get('POSTS_SLOW_QUERY_SAMPLE_RATE', 0.1))
+
+# In-memory autocomplete index: posts indexed (the most recent ones), seconds before it is rebuilt
+# from the database (0 never), and the default/largest number of suggestions per kind
+POSTS_AUTOCOMPLETE_MAX_POSTS = int(os.environ.get('POSTS_AUTOCOMPLETE_MAX_POSTS', 100000))
+POSTS_AUTOCOMPLETE_MAX_AGE = int(os.environ.get('POSTS_AUTOCOMPLETE_MAX_AGE', 300))
+POSTS_AUTOCOMPLETE_LIMIT = int(os.environ.get('POSTS_AUTOCOMPLETE_LIMIT', 10))
+POSTS_AUTOCOMPLETE_MAX_LIMIT = int(os.environ.get('POSTS_AUTOCOMPLETE_MAX_LIMIT', 50))
+
+# Token bucket of each client per route: tokens refilled per second (0 disables the throttle),
+# bucket size, tokens taken by a search, and the cache alias holding the buckets and the in-flight counter
+POSTS_THROTTLE_RATE = float(os.environ.get('POSTS_THROTTLE_RATE', 20))
+POSTS_THROTTLE_BURST = float(os.environ.get('POSTS_THROTTLE_BURST', 100))
+POSTS_THROTTLE_SEARCH_COST = float(os.environ.get('POSTS_THROTTLE_SEARCH_COST', 5))
+POSTS_THROTTLE_CACHE_ALIAS = os.environ.get('POSTS_THROTTLE_CACHE_ALIAS', 'default')
+
+# Requests running at once (all workers sharing the cache) above which new ones get a 503 (0 disables it),
+# the Retry-After sent with it, and how often (seconds) the counter starts again from 0
+POSTS_MAX_IN_FLIGHT = int(os.environ.get('POSTS_MAX_IN_FLIGHT', 64))
+POSTS_SHED_RETRY_AFTER = int(os.environ.get('POSTS_SHED_RETRY_AFTER', 1))
+POSTS_IN_FLIGHT_TIMEOUT = int(os.environ.get('POSTS_IN_FLIGHT_TIMEOUT', 60))
+
+# Smallest body (bytes) worth compressing, and the compressed bodies kept in the posts cache
+# (seconds, and largest size in bytes) so a page requested again is not compressed again
+POSTS_COMPRESS_MIN_SIZE = int(os.environ.get('POSTS_COMPRESS_MIN_SIZE', 1024))
+POSTS_COMPRESS_CACHE_TIMEOUT = int(os.environ.get('POSTS_COMPRESS_CACHE_TIMEOUT', 300))
+POSTS_COMPRESS_CACHE_MAX_SIZE = int(os.environ.get('POSTS_COMPRESS_CACHE_MAX_SIZE', 1024 * 1024))
+
+# Change feed: days of deletions kept (older cursors get a 410, prune_tombstones deletes older tombstones)
+POSTS_TOMBSTONE_RETENTION_DAYS = int(os.environ.get('POSTS_TOMBSTONE_RETENTION_DAYS', 30))
+
+# Cache of the list and search responses (alias in CACHES, seconds to keep a page, 0 disables it),
+# and seconds the other requests wait while one of them computes a missing page
+POSTS_LIST_CACHE_ALIAS = os.environ.get('POSTS_LIST_CACHE_ALIAS', 'lists')
+POSTS_LIST_CACHE_TIMEOUT = int(os.environ.get('POSTS_LIST_CACHE_TIMEOUT', 60))
+POSTS_LIST_CACHE_LOCK_TIMEOUT = int(os.environ.get('POSTS_LIST_CACHE_LOCK_TIMEOUT', 5))
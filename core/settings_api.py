@@ -0,0 +1,60 @@
+"""
+Settings of API-only deployments (no admin, sessions or templates):
+
+    DJANGO_SETTINGS_MODULE=core.settings_api gunicorn core.wsgi
+
+Same as core.settings, without the apps and middleware the posts API does not
+use, without DEBUG (and its log of every query), and with persistent database
+connections. `python -m benchmarks.startup` compares both profiles.
+"""
+
+import os
+
+from core.settings import *  # noqa: F401,F403
+from core.settings import DATABASES, REST_FRAMEWORK
+
+# DEBUG keeps every query of a request in memory (connection.queries)
+DEBUG = os.environ.get('DEBUG', 'False') == 'True'
+
+ALLOWED_HOSTS = os.environ.get('ALLOWED_HOSTS', 'localhost,127.0.0.1').split(',')
+
+# The API has no users, pages nor static files: no admin, auth, sessions, messages or templates
+INSTALLED_APPS = [
+    'django.contrib.postgres',
+    'posts',
+    'rest_framework',
+]
+
+# No sessions, CSRF (there is no cookie authentication), users, messages nor frames
+MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
+    'core.compression.CompressionMiddleware',
+    'core.load_shedding.LoadSheddingMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'core.db_router.PinPrimaryMiddleware',
+]
+
+TEMPLATES = []
+
+AUTH_PASSWORD_VALIDATORS = []
+
+# English messages only, no translation catalogs to load
+USE_I18N = False
+
+# Keep the connections open between requests (seconds), checked before reuse after an error
+DATABASES = {
+    alias: {**database, 'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)), 'CONN_HEALTH_CHECKS': True}
+    for alias, database in DATABASES.items()
+}
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    # JSON only, the browsable API needs templates
+    'DEFAULT_RENDERER_CLASSES': [
+        'posts.renderers.FastJSONRenderer',
+    ],
+    # No authentication, request.user is None
+    'DEFAULT_AUTHENTICATION_CLASSES': [],
+    'UNAUTHENTICATED_USER': None,
+}
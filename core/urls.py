@@ -1,7 +1,14 @@
-from django.contrib import admin
+from django.apps import apps
 from django.urls import path, include
+from .metrics import metrics_view
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
+    path('metrics/', metrics_view, name='metrics'),
     path('', include('posts.urls')),
 ]
+
+# The API-only profile (core.settings_api) does not install the admin
+if apps.is_installed('django.contrib.admin'):
+    from django.contrib import admin
+
+    urlpatterns.insert(0, path('admin/', admin.site.urls))
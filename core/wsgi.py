@@ -14,3 +14,10 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+# Build the in-memory autocomplete index of each worker as soon as it serves its first request
+from django.core.signals import request_started
+
+from posts.utils.autocomplete import warm_on_first_request
+
+request_started.connect(warm_on_first_request)
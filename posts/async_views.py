@@ -0,0 +1,225 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.dateparse import parse_datetime
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import APIException, Throttled
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from .models import Post
+from .renderers import FastJSONRenderer
+from .serializers import PostSerializer
+from .utils.autocomplete import index_post, unindex_posts
+from .utils.cache import aget_post_data, aget_post_update_at, ainvalidate_posts
+from .utils.conditional import check_conditions, has_conditions, page_validators, post_etag, validator_headers, write_lookups
+from .utils.fields import POST_FIELDS, get_columns, get_fields, is_full
+from .utils.filters import filter_posts
+from .utils.pagination import KeysetPaginator
+from .utils.representation import represent_row, represent_rows, row_getter
+from .utils.writes import adelete_post, afailed_write_status, aupdate_post
+
+# Async versions of the views in views.py, for the ASGI entry point.
+# They use the async ORM, so a single worker serves many slow clients at once.
+
+class AsyncAPIView(View):
+    """
+    Base of the async views: JSON in and out, API errors as JSON, no CSRF (like APIView).
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # The API is not used from forms, same as DRF's APIView
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        # Wrap the request to get `query_params` and the JSON `data` of DRF
+        request = Request(request, parsers=[JSONParser()])
+
+        try:
+            await self.check_throttles(request)
+            return await super().dispatch(request, *args, **kwargs)
+        except APIException as exc:
+            # Like DRF's exception handler, tell throttled clients when to come back
+            headers = {'Retry-After': '%d' % exc.wait} if getattr(exc, 'wait', None) else None
+            return self.respond(exc.detail, exc.status_code, headers)
+
+    async def check_throttles(self, request):
+        """
+        Applies the throttles of the sync views (DEFAULT_THROTTLE_CLASSES)
+        """
+
+        for throttle_class in api_settings.DEFAULT_THROTTLE_CLASSES:
+            throttle = throttle_class()
+
+            # The buckets are in the cache, a network round trip with a shared backend. No database
+            # access, so it runs in any thread instead of waiting for the one shared by the ORM calls
+            if not await sync_to_async(throttle.allow_request, thread_sensitive=False)(request, self):
+                raise Throttled(throttle.wait())
+
+    def respond(self, data=None, code=status.HTTP_200_OK, headers=None):
+        """
+        Returns a JSON response rendered like the sync views
+        """
+
+        content = FastJSONRenderer().render(data)
+        return HttpResponse(content, status=code, headers=headers, content_type='application/json')
+
+class AsyncPostListView(AsyncAPIView):
+    """
+    Async view to list posts.
+    """
+
+    async def get(self, request):
+        """
+        Handles GET requests (list posts one page at a time).
+        """
+
+        # Same params, filters and pagination as PostListView
+        fields = get_fields(request.query_params, settings.POSTS_LIST_DEFAULT_VIEW)
+        posts, ordering = filter_posts(request.query_params)
+        paginator = KeysetPaginator(request, ordering)
+
+        if has_conditions(request):
+
+            # Compare the versions of the page rows first, without loading nor serializing them
+            columns = get_columns(('id', 'update_at'), paginator.fields)
+            versions = await KeysetPaginator(request, ordering).apaginate_queryset(
+                posts.values_list(*columns), key=row_getter(columns, paginator.fields), count=False
+                )
+
+            response = check_conditions(request, *page_validators(request, versions, columns))
+            if response is not None:
+                return response
+
+        columns = get_columns(fields, paginator.fields)
+        rows = await paginator.apaginate_queryset(posts.values_list(*columns), key=row_getter(columns, paginator.fields))
+
+        headers = paginator.get_headers()
+        headers.update(validator_headers(*page_validators(request, rows, columns)))
+        return self.respond(represent_rows(rows, fields, columns), headers=headers)
+
+class AsyncPostCreateView(AsyncAPIView):
+    """
+    Async view to create a post.
+    """
+
+    async def post(self, request):
+        """
+        Handles POST requests (create a post).
+        """
+
+        # Validation does not touch the database, only the insert is awaited
+        serializer = PostSerializer(data=request.data)
+
+        if not serializer.is_valid():
+            return self.respond(serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+        post = await Post.objects.acreate(**serializer.validated_data)
+
+        # Forget a cached 404 for the new ID, suggest the new title and tags
+        await ainvalidate_posts(post.pk)
+        index_post(post.pk, post.title, post.tags)
+        return self.respond(PostSerializer(post).data, status.HTTP_201_CREATED)
+
+class AsyncPostGetView(AsyncAPIView):
+    """
+    Async view to retrieve a specific post by primary key (pk).
+    """
+
+    async def get(self, request, pk):
+        """
+        Handles GET request to return a single post.
+        """
+
+        fields = get_fields(request.query_params)
+        variant = None if is_full(fields) else fields
+
+        if has_conditions(request):
+
+            # Compare the version of the post first, without loading nor serializing it
+            update_at = await aget_post_update_at(pk)
+
+            if update_at is not None:
+                response = check_conditions(request, post_etag(pk, update_at, variant), update_at)
+                if response is not None:
+                    return response
+
+        data = await aget_post_data(pk)
+
+        if data is None:
+            return self.respond(code=status.HTTP_404_NOT_FOUND)
+
+        update_at = parse_datetime(data['update_at'])
+
+        if variant is not None:
+            data = {name: data[name] for name in fields}
+
+        return self.respond(data, headers=validator_headers(post_etag(pk, update_at, variant), update_at))
+
+class AsyncPostUpdateView(AsyncAPIView):
+    """
+    Async view to update a post by primary key (pk).
+    """
+
+    async def put(self, request, pk):
+        """
+        Handles PUT request to update a post.
+        """
+
+        return await self.update(request, pk, partial=False)
+
+    async def patch(self, request, pk):
+        """
+        Handles PATCH request to partially update a post.
+        """
+
+        return await self.update(request, pk, partial=True)
+
+    async def update(self, request, pk, partial):
+        """
+        Validates the data, then writes it with a single UPDATE that also checks the preconditions.
+        """
+
+        # Validation does not touch the database, the post is not read first
+        serializer = PostSerializer(data=request.data, partial=partial)
+
+        if not serializer.is_valid():
+            return self.respond(serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+        # The client's copy (If-Match) must still be the current one when the row is written
+        lookups = write_lookups(request, pk)
+        row = await aupdate_post(pk, serializer.validated_data, lookups)
+
+        if row is None:
+            return self.respond(code=await afailed_write_status(pk, lookups))
+
+        # Forget the cached copy, suggest the new title and tags
+        data = represent_row(row, POST_FIELDS)
+        await ainvalidate_posts(pk)
+        index_post(pk, data['title'], data['tags'])
+
+        update_at = row[POST_FIELDS.index('update_at')]
+        return self.respond(data, headers=validator_headers(post_etag(pk, update_at), update_at))
+
+class AsyncPostDeleteView(AsyncAPIView):
+    """
+    Async view to delete a post by primary key (pk).
+    """
+
+    async def delete(self, request, pk):
+        """
+        Handles DELETE request to delete a post.
+        """
+
+        # Delete the post with a single query, only if it is the client's copy (If-Match)
+        lookups = write_lookups(request, pk)
+
+        if not await adelete_post(pk, lookups):
+            return self.respond(code=await afailed_write_status(pk, lookups))
+
+        await ainvalidate_posts(pk)
+        unindex_posts(pk)
+        return self.respond(code=status.HTTP_204_NO_CONTENT)
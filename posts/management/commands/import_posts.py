@@ -0,0 +1,392 @@
+import collections
+import csv
+import io
+import json
+import multiprocessing
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.validators import ProhibitSurrogateCharactersValidator
+
+from posts.models import Post, PostImport
+from posts.serializers import PostSerializer
+
+# Columns written by COPY, the id comes from the sequence and the search vector from the trigger
+COLUMNS = ('title', 'content', 'category', 'tags', 'created_at', 'update_at')
+
+# Progress of an import, saved with the rows of each batch (PostImport)
+PROGRESS_FIELDS = ('position', 'rows', 'imported', 'rejected')
+
+
+class SurrogateValidator(ProhibitSurrogateCharactersValidator):
+    """
+    Same check as DRF's, done by the UTF-8 codec instead of a Python loop over every character.
+    """
+
+    def __call__(self, value):
+        try:
+            str(value).encode('utf-8')
+        except UnicodeEncodeError:
+            # Only a surrogate fails to encode, DRF's validator builds the same error
+            super().__call__(value)
+
+
+class PostImportSerializer(PostSerializer):
+    """
+    PostSerializer rules, plus the original timestamps of the archived posts.
+    """
+
+    created_at = serializers.DateTimeField(required=False)
+    update_at = serializers.DateTimeField(required=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # The per-character check of the text fields was most of the validation time of long contents
+        for field in [*self.fields.values(), *[field.child for field in self.fields.values() if hasattr(field, 'child')]]:
+            field.validators = [
+                SurrogateValidator() if isinstance(validator, ProhibitSurrogateCharactersValidator) else validator
+                for validator in field.validators
+            ]
+
+
+def array_literal(values):
+    """
+    Formats a list of strings as a PostgreSQL array literal (`{"a","b"}`)
+    """
+
+    return '{%s}' % ','.join('"%s"' % value.replace('\\', '\\\\').replace('"', '\\"') for value in values)
+
+def copy_value(value):
+    """
+    Escapes a value for the text format of COPY
+    """
+
+    return value.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+def copy_line(data, now):
+    """
+    Returns the COPY line (text format) of a validated row
+    """
+
+    created_at = data.get('created_at', now)
+    values = (
+        data['title'],
+        data['content'],
+        data['category'],
+        array_literal(data.get('tags', [])),
+        created_at.isoformat(),
+        data.get('update_at', created_at).isoformat(),
+    )
+    return '\t'.join(copy_value(value) for value in values) + '\n'
+
+# Serializer of the process that validates the rows (each worker builds its own)
+_serializer = None
+
+def validate_chunk(chunk):
+    """
+    Validates a chunk of (row number, raw row, item) and returns the COPY lines and the rejects (JSON lines)
+    """
+
+    global _serializer
+    if _serializer is None:
+        _serializer = PostImportSerializer()
+
+    now = timezone.now()
+    lines, rejects = [], []
+
+    for number, raw, item in chunk:
+        if item is None:
+            errors = {'non_field_errors': ['Invalid row.']}
+        else:
+            try:
+                lines.append(copy_line(_serializer.run_validation(item), now))
+                continue
+            except serializers.ValidationError as exc:
+                errors = exc.detail
+
+        rejects.append(json.dumps({'row': number, 'data': raw, 'errors': errors}, ensure_ascii=False) + '\n')
+
+    return lines, rejects
+
+def read_chunks(rows, first_number, size):
+    """
+    Groups the rows of a reader into chunks of `size`, yields (chunk, offset after its last row)
+    """
+
+    chunk = []
+
+    for number, (raw, item, end) in enumerate(rows, first_number):
+        chunk.append((number, raw, item))
+
+        if len(chunk) == size:
+            yield chunk, end
+            chunk = []
+
+    if chunk:
+        yield chunk, end
+
+def read_lines(handle, offset):
+    """
+    Yields the lines of a binary file from a byte offset, with the offset after each one
+    """
+
+    handle.seek(offset)
+
+    for line in handle:
+        offset += len(line)
+        yield line.decode('utf-8'), offset
+
+def read_jsonl(handle, offset):
+    """
+    Yields (raw line, item or None if it is not a JSON object, offset after it) from a JSONL file
+    """
+
+    for line, end in read_lines(handle, offset):
+        if not line.strip():
+            continue
+
+        try:
+            item = json.loads(line)
+        except ValueError:
+            item = None
+
+        yield line.rstrip('\n'), item if isinstance(item, dict) else None, end
+
+def read_csv(handle, offset):
+    """
+    Yields (raw record, item, offset after it) from a CSV file with a header line.
+
+    Lists (tags) are read as JSON arrays, like the CSV export writes them, or as comma separated values.
+    """
+
+    handle.seek(0)
+    header_line = handle.readline()
+    header = next(csv.reader([header_line.decode('utf-8')]), [])
+
+    # The offset of each record, a quoted value may span several lines
+    position = max(offset, len(header_line))
+    lines = read_lines(handle, position)
+
+    def text():
+        nonlocal position
+        for line, end in lines:
+            position = end
+            yield line
+
+    for record in csv.reader(text()):
+        raw = json.dumps(record, ensure_ascii=False)
+
+        if len(record) != len(header):
+            yield raw, None, position
+            continue
+
+        item = {name: value for name, value in zip(header, record) if value != '' or name not in ('created_at', 'update_at')}
+
+        if 'tags' in item:
+            tags = item['tags'].strip()
+            try:
+                item['tags'] = json.loads(tags) if tags.startswith('[') else [tag for tag in tags.split(',') if tag.strip()]
+            except ValueError:
+                pass
+
+        yield raw, item, position
+
+def load_checkpoint(path):
+    """
+    Returns the checkpoint of an interrupted import (the dropped indexes, and the
+    progress of the imports that saved it there), or None when there is none
+    """
+
+    try:
+        with open(path) as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return None
+
+def save_checkpoint(path, checkpoint):
+    """
+    Saves the checkpoint of an import (atomically, a crash leaves the previous one)
+    """
+
+    with open(f'{path}.tmp', 'w') as handle:
+        json.dump(checkpoint, handle)
+    os.replace(f'{path}.tmp', path)
+
+
+class Command(BaseCommand):
+    help = (
+        'Imports posts from a JSONL or CSV file with COPY, in batches. '
+        'Rows are validated with the PostSerializer rules, the rejected ones are written to a file, '
+        'and an interrupted import continues where it stopped with --resume.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='JSONL or CSV file to import')
+        parser.add_argument('--format', choices=['jsonl', 'csv'], help='format of the file, from its extension by default')
+        parser.add_argument('--batch', type=int, default=10_000, help='rows per COPY (and per checkpoint)')
+        parser.add_argument('--rejects', help='file of the rejected rows (default: <path>.rejects.jsonl)')
+        parser.add_argument('--checkpoint', help='progress file (default: <path>.checkpoint)')
+        parser.add_argument('--resume', action='store_true', help='continue an interrupted import from its checkpoint')
+        parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1), help='processes validating the rows')
+        parser.add_argument('--drop-indexes', action='store_true', help='drop the secondary indexes during the import and rebuild them at the end')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+        checkpoint_path = options['checkpoint'] or f'{path}.checkpoint'
+        source = os.path.abspath(path)
+        rejects_path = options['rejects'] or f'{path}.rejects.jsonl'
+
+        if connection.vendor != 'postgresql':
+            raise CommandError('import_posts loads the rows with COPY, it needs PostgreSQL.')
+        if options['batch'] < 1 or options['workers'] < 1:
+            raise CommandError('--batch and --workers must be at least 1.')
+
+        checkpoint = load_checkpoint(checkpoint_path)
+
+        if checkpoint is not None and not options['resume']:
+            raise CommandError(f'{checkpoint_path} exists, use --resume to continue that import or delete it.')
+        if checkpoint is None:
+            checkpoint = {'position': 0, 'rows': 0, 'imported': 0, 'rejected': 0, 'indexes': []}
+
+            # Progress left by an import that was given up (its checkpoint deleted)
+            PostImport.objects.filter(source=source).delete()
+        else:
+            # The progress committed with the last batch is the one matching the imported rows
+            progress = PostImport.objects.using('default').filter(source=source).values(*PROGRESS_FIELDS).first()
+            checkpoint.update(progress or {})
+
+        # Written now, so another run of an interrupted import asks for --resume
+        save_checkpoint(checkpoint_path, checkpoint)
+
+        if options['drop_indexes'] and not checkpoint['indexes']:
+            # Saved first, so an interrupted import still knows what to rebuild
+            checkpoint['indexes'] = self.get_indexes()
+            save_checkpoint(checkpoint_path, checkpoint)
+            self.drop_indexes(checkpoint['indexes'])
+
+        reader = read_csv if file_format == 'csv' else read_jsonl
+        started = time.perf_counter()
+        start_rows = checkpoint['rows']
+
+        # The workers are forked, they should not inherit an open connection (they never query)
+        workers = options['workers']
+        if workers > 1:
+            if not connection.in_atomic_block:
+                connection.close()
+            pool = multiprocessing.get_context('fork').Pool(workers)
+
+        with open(path, 'rb') as handle, open(rejects_path, 'a' if options['resume'] else 'w') as rejects:
+            chunks = read_chunks(reader(handle, checkpoint['position']), checkpoint['rows'] + 1, options['batch'])
+
+            if workers == 1:
+                for chunk, end in chunks:
+                    self.flush(*validate_chunk(chunk), end, checkpoint, source, rejects)
+                    self.report(checkpoint, checkpoint['rows'] - start_rows, started)
+            else:
+                # The workers validate the next chunks while this process loads the current one,
+                # in order, with only a few chunks in memory at a time
+                pending = collections.deque()
+
+                with pool:
+                    for chunk, end in chunks:
+                        pending.append((pool.apply_async(validate_chunk, (chunk,)), end))
+
+                        if len(pending) > workers:
+                            result, end = pending.popleft()
+                            self.flush(*result.get(), end, checkpoint, source, rejects)
+                            self.report(checkpoint, checkpoint['rows'] - start_rows, started)
+
+                    while pending:
+                        result, end = pending.popleft()
+                        self.flush(*result.get(), end, checkpoint, source, rejects)
+                        self.report(checkpoint, checkpoint['rows'] - start_rows, started)
+
+        if checkpoint['indexes']:
+            self.stdout.write(f'Rebuilding {len(checkpoint["indexes"])} indexes...')
+            self.rebuild_indexes(checkpoint['indexes'])
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Post._meta.db_table}')
+
+        # The import is complete, a new run of the same file starts over
+        PostImport.objects.filter(source=source).delete()
+        os.remove(checkpoint_path)
+
+        self.report(checkpoint, checkpoint['rows'] - start_rows, started)
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {checkpoint["imported"]} posts, rejected {checkpoint["rejected"]} rows'
+            + (f' (see {rejects_path}).' if checkpoint['rejected'] else '.')
+        ))
+
+    def flush(self, lines, rejected, end, checkpoint, source, rejects):
+        """
+        Writes the rejected rows of a chunk, then loads its valid rows with COPY and
+        saves the progress in the same transaction
+        """
+
+        # Written before the commit: a crash in between lists these rejects twice, never loses them
+        rejects.writelines(rejected)
+        rejects.flush()
+
+        checkpoint['position'] = end
+        checkpoint['rows'] += len(lines) + len(rejected)
+        checkpoint['imported'] += len(lines)
+        checkpoint['rejected'] += len(rejected)
+
+        # The rows and the progress are committed together, a resumed import never loads a row twice
+        with transaction.atomic():
+            if lines:
+                with connection.cursor() as cursor:
+                    cursor.copy_expert(
+                        f'COPY {Post._meta.db_table} ({", ".join(COLUMNS)}) FROM STDIN',
+                        io.StringIO(''.join(lines))
+                        )
+
+            PostImport.objects.update_or_create(source=source, defaults={field: checkpoint[field] for field in PROGRESS_FIELDS})
+
+    def report(self, checkpoint, rows, started):
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{checkpoint["rows"]} rows read, {checkpoint["imported"]} imported, {checkpoint["rejected"]} rejected'
+            f' ({rows / elapsed if elapsed else 0:.0f} rows/s)'
+        )
+
+    def get_indexes(self):
+        """
+        Returns the (name, definition) of the indexes of the posts table, except the ones of constraints
+        """
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                '''
+                SELECT indexname, indexdef FROM pg_indexes
+                WHERE schemaname = current_schema() AND tablename = %s
+                AND indexname NOT IN (SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass)
+                ORDER BY indexname
+                ''',
+                [Post._meta.db_table, Post._meta.db_table]
+                )
+            return cursor.fetchall()
+
+    def drop_indexes(self, indexes):
+        with connection.cursor() as cursor:
+            for name, _ in indexes:
+                cursor.execute(f'DROP INDEX IF EXISTS {connection.ops.quote_name(name)}')
+
+    def rebuild_indexes(self, indexes):
+        """
+        Creates the dropped indexes again, the ones that already exist are skipped
+        """
+
+        with connection.cursor() as cursor:
+            # One sort in memory instead of many on disk, for this session only
+            cursor.execute("SET maintenance_work_mem = '512MB'")
+
+            for _, definition in indexes:
+                cursor.execute(definition.replace(' INDEX ', ' INDEX IF NOT EXISTS ', 1))
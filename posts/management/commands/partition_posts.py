@@ -0,0 +1,56 @@
+import argparse
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from posts.utils.partitions import archive_partitions, convert_table, create_partitions, is_partitioned
+
+
+def parse_month(value):
+    try:
+        return datetime.datetime.strptime(value, '%Y-%m').replace(tzinfo=datetime.timezone.utc)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'expected a month as YYYY-MM, got {value!r}')
+
+
+class Command(BaseCommand):
+    help = (
+        'Partitions the posts table by month of creation (optional, for tables of tens of millions of posts). '
+        'Run it once with --convert, then regularly (e.g. daily) to create the partitions of the coming months, '
+        'and with --archive-before to detach the old ones.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--convert', action='store_true', help='turn the posts table into a partitioned table (locks it while the posts are copied)')
+        parser.add_argument('--months-ahead', type=int, default=3, help='months of partitions to create in advance')
+        parser.add_argument('--archive-before', type=parse_month, help='detach the partitions of the months before this one (YYYY-MM)')
+        parser.add_argument('--drop-archived', action='store_true', help='drop the detached partitions instead of keeping them as posts_post_archive_YYYY_MM')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('partition_posts uses declarative partitioning, it needs PostgreSQL.')
+        if connection.pg_version < 130000:
+            raise CommandError('The search vector trigger needs row triggers on partitioned tables, PostgreSQL 13 or later.')
+        if options['months_ahead'] < 0:
+            raise CommandError('--months-ahead must be positive.')
+
+        if options['convert']:
+            if is_partitioned():
+                raise CommandError('The posts table is already partitioned.')
+
+            copied = convert_table(options['months_ahead'])
+            self.stdout.write(f'Copied {copied} posts into the partitioned table.')
+        elif not is_partitioned():
+            raise CommandError('The posts table is not partitioned, run partition_posts --convert first.')
+
+        created = create_partitions(options['months_ahead'])
+        self.stdout.write(f'Created {len(created)} partitions.')
+
+        if options['archive_before']:
+            # The archived posts leave the cached lists (single posts expire with POSTS_CACHE_TIMEOUT)
+            archived = archive_partitions(options['archive_before'], drop=options['drop_archived'])
+            months = ', '.join(f'{month:%Y-%m}' for month in archived)
+            self.stdout.write(f'Archived {len(archived)} partitions' + (f': {months}.' if archived else '.'))
+
+        self.stdout.write(self.style.SUCCESS('Partitions are up to date.'))
@@ -0,0 +1,20 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts.models import PostTombstone
+
+
+class Command(BaseCommand):
+    help = 'Deletes the tombstones of posts deleted longer ago than the retention of the change feed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.POSTS_TOMBSTONE_RETENTION_DAYS, help='days of deletions to keep')
+
+    def handle(self, *args, **options):
+        # The feed answers 410 to cursors older than POSTS_TOMBSTONE_RETENTION_DAYS, keep at least that much
+        horizon = timezone.now() - datetime.timedelta(days=max(options['days'], settings.POSTS_TOMBSTONE_RETENTION_DAYS))
+        count, _ = PostTombstone.objects.filter(deleted_at__lt=horizon).delete()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {count} tombstones.'))
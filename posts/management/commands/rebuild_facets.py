@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts.utils.facets import rebuild_facets
+
+
+class Command(BaseCommand):
+    help = 'Recounts the category and tag facets from the posts (the triggers keep them up to date afterwards).'
+
+    def handle(self, *args, **options):
+        count = rebuild_facets()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} facets.'))
@@ -0,0 +1,144 @@
+import bisect
+import datetime
+import itertools
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from posts.models import Post
+
+# Words the synthetic titles, contents, categories and tags are made of
+VOCABULARY = [
+    'python', 'django', 'postgres', 'index', 'query', 'cache', 'server', 'client',
+    'deploy', 'docker', 'testing', 'release', 'feature', 'rust', 'golang', 'async',
+    'thread', 'memory', 'latency', 'network', 'design', 'pattern', 'review', 'update',
+    'kubernetes', 'serializer', 'migration', 'benchmark', 'profiling', 'tutorial',
+    'security', 'frontend', 'backend', 'database', 'career', 'startup', 'linux', 'cloud',
+    'compiler', 'editor', 'search', 'storage', 'queue', 'stream', 'api', 'graph',
+]
+
+INSERT_SQL = 'INSERT INTO posts_post (title, content, category, tags, created_at, update_at) VALUES '
+
+
+def make_names(count, prefix=''):
+    """
+    Returns `count` distinct names built from the vocabulary (`python`, ..., `python-2`, ...)
+    """
+
+    names = []
+    for round_ in itertools.count(1):
+        for word in VOCABULARY:
+            if len(names) == count:
+                return names
+            names.append(f'{prefix}{word}' if round_ == 1 else f'{prefix}{word}-{round_}')
+
+def zipf_weights(count, exponent):
+    """
+    Returns the cumulative Zipf weights of `count` ranks, the first rank is the most common
+    """
+
+    return list(itertools.accumulate(1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+class PostGenerator:
+    """
+    Generates reproducible synthetic posts.
+
+    Categories and tags follow a Zipf distribution (a few are very common,
+    most are rare), content lengths a log-normal one and creation dates are
+    spread over the last `days` days.
+    """
+
+    def __init__(self, seed=0, categories=50, tags=500, exponent=1.1, days=730, now=None):
+        self.random = random.Random(seed)
+        self.categories = [name.title() for name in make_names(categories)]
+        self.tags = make_names(tags)
+        self.category_weights = zipf_weights(len(self.categories), exponent)
+        self.tag_weights = zipf_weights(len(self.tags), exponent)
+        self.span = days * 86400
+        self.now = now or timezone.now()
+
+    def pick(self, values, weights):
+        return values[bisect.bisect(weights, self.random.random() * weights[-1])]
+
+    def words(self, count):
+        return ' '.join(self.random.choices(VOCABULARY, k=count))
+
+    def post(self):
+        """
+        Returns the (title, content, category, tags, created_at, update_at) values of a post
+        """
+
+        # Mostly short posts, with a long tail of very long ones
+        length = min(5000, max(10, int(self.random.lognormvariate(5, 0.8))))
+        tags = sorted({self.pick(self.tags, self.tag_weights) for _ in range(self.random.randint(0, 5))})
+
+        created_at = self.now - datetime.timedelta(seconds=self.random.random() * self.span)
+        # One post out of four was edited after it was created
+        update_at = created_at
+        if self.random.random() < 0.25:
+            update_at += (self.now - created_at) * self.random.random()
+
+        return (
+            self.words(self.random.randint(3, 8)).capitalize()[:100],
+            self.words(length),
+            self.pick(self.categories, self.category_weights),
+            tags,
+            created_at,
+            update_at,
+        )
+
+    def posts(self, count):
+        for _ in range(count):
+            yield self.post()
+
+
+class Command(BaseCommand):
+    help = 'Inserts reproducible synthetic posts, e.g. to run the benchmarks on 100k or 10M posts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000, help='number of posts to insert')
+        parser.add_argument('--batch', type=int, default=5000, help='posts per INSERT statement')
+        parser.add_argument('--seed', type=int, default=0, help='random seed, the same seed gives the same posts')
+        parser.add_argument('--categories', type=int, default=50, help='number of distinct categories')
+        parser.add_argument('--tags', type=int, default=500, help='number of distinct tags')
+        parser.add_argument('--zipf', type=float, default=1.1, help='exponent of the category/tag distribution')
+        parser.add_argument('--days', type=int, default=730, help='posts are created over this many days')
+        parser.add_argument('--clear', action='store_true', help='delete the existing posts first')
+
+    def handle(self, *args, **options):
+        if options['rows'] < 0 or options['batch'] < 1:
+            raise CommandError('--rows must be positive and --batch at least 1.')
+
+        generator = PostGenerator(
+            seed=options['seed'],
+            categories=options['categories'],
+            tags=options['tags'],
+            exponent=options['zipf'],
+            days=options['days'],
+            )
+        posts = generator.posts(options['rows'])
+
+        if options['clear']:
+            with connection.cursor() as cursor:
+                cursor.execute(f'TRUNCATE {Post._meta.db_table} RESTART IDENTITY')
+
+        inserted = 0
+
+        # Raw multi-row INSERTs: bulk_create would overwrite the timestamps (auto_now)
+        while batch := list(itertools.islice(posts, options['batch'])):
+            placeholders = ', '.join(['(%s, %s, %s, %s, %s, %s)'] * len(batch))
+
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(INSERT_SQL + placeholders, list(itertools.chain.from_iterable(batch)))
+
+            inserted += len(batch)
+            self.stdout.write(f'{inserted}/{options["rows"]} posts inserted', ending='\r')
+
+        # Fresh statistics, so the planner (and `count=estimate`) see the new rows
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Post._meta.db_table}')
+
+        self.stdout.write(self.style.SUCCESS(f'Inserted {inserted} posts.'))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:23
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0003_post_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['tags'], name='posts_post_tags_idx'),
+        ),
+    ]
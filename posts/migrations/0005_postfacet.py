@@ -0,0 +1,90 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:42
+
+from django.db import migrations, models
+
+# Statement-level triggers: a bulk insert, a COPY or a bulk update changes each facet once,
+# with the net difference of the whole statement (transition tables need one trigger per event)
+CREATE_TRIGGERS = """
+CREATE FUNCTION posts_postfacet_update() RETURNS trigger AS $$
+DECLARE
+    -- Facets of the rows of a transition table (%1$s) with their change (%2$s)
+    facets constant text := 'SELECT ''category'', category, %2$s FROM %1$s '
+        'UNION ALL SELECT ''tag'', tag, %2$s FROM %1$s, LATERAL (SELECT DISTINCT unnest(%1$s.tags)) AS tags (tag)';
+    changes text[] := '{}';
+BEGIN
+    -- Only the transition tables of the event exist, so the query is built for it
+    IF TG_OP <> 'DELETE' THEN
+        changes := changes || format(facets, 'new_rows', 1);
+    END IF;
+    IF TG_OP <> 'INSERT' THEN
+        changes := changes || format(facets, 'old_rows', -1);
+    END IF;
+
+    EXECUTE 'INSERT INTO posts_postfacet (kind, value, count) '
+        'SELECT kind, value, sum(delta) FROM (' || array_to_string(changes, ' UNION ALL ') || ') AS changes (kind, value, delta) '
+        'GROUP BY kind, value HAVING sum(delta) <> 0 '
+        'ON CONFLICT (kind, value) DO UPDATE SET count = posts_postfacet.count + EXCLUDED.count';
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION posts_postfacet_clear() RETURNS trigger AS $$
+BEGIN
+    DELETE FROM posts_postfacet;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER posts_postfacet_insert_trigger
+    AFTER INSERT ON posts_post REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION posts_postfacet_update();
+
+CREATE TRIGGER posts_postfacet_update_trigger
+    AFTER UPDATE ON posts_post REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION posts_postfacet_update();
+
+CREATE TRIGGER posts_postfacet_delete_trigger
+    AFTER DELETE ON posts_post REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION posts_postfacet_update();
+
+CREATE TRIGGER posts_postfacet_truncate_trigger
+    AFTER TRUNCATE ON posts_post
+    FOR EACH STATEMENT EXECUTE FUNCTION posts_postfacet_clear();
+
+INSERT INTO posts_postfacet (kind, value, count)
+SELECT 'category', category, count(*) FROM posts_post GROUP BY category
+UNION ALL
+SELECT 'tag', tag, count(*) FROM posts_post, LATERAL (SELECT DISTINCT unnest(posts_post.tags)) AS tags (tag) GROUP BY tag;
+"""
+
+DROP_TRIGGERS = """
+DROP TRIGGER IF EXISTS posts_postfacet_insert_trigger ON posts_post;
+DROP TRIGGER IF EXISTS posts_postfacet_update_trigger ON posts_post;
+DROP TRIGGER IF EXISTS posts_postfacet_delete_trigger ON posts_post;
+DROP TRIGGER IF EXISTS posts_postfacet_truncate_trigger ON posts_post;
+DROP FUNCTION IF EXISTS posts_postfacet_update();
+DROP FUNCTION IF EXISTS posts_postfacet_clear();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0004_post_tags_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostFacet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('category', 'Category'), ('tag', 'Tag')], max_length=10)),
+                ('value', models.CharField()),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'value'), name='posts_postfacet_kind_value_uniq')],
+            },
+        ),
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:05
+
+from django.db import migrations, models
+
+# Same normalization as posts.utils.helpers.normalize_category, for the posts written before it
+NORMALIZE_CATEGORIES = r"""
+UPDATE posts_post
+SET category = btrim(regexp_replace(category, '\s+', ' ', 'g'))
+WHERE category <> btrim(regexp_replace(category, '\s+', ' ', 'g'));
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0005_postfacet'),
+    ]
+
+    operations = [
+        migrations.RunSQL(NORMALIZE_CATEGORIES, migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['category', '-created_at', '-id'], name='posts_post_category_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-update_at', '-id'], name='posts_post_updated_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['title', 'id'], name='posts_post_title_id_idx'),
+        ),
+    ]
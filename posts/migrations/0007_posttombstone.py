@@ -0,0 +1,46 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:40
+
+from django.db import migrations, models
+
+# One tombstone per deleted row, whatever deletes it (API, bulk endpoint, admin, SQL).
+# clock_timestamp() rather than now(): the time of the delete, not of the start of its transaction.
+CREATE_TRIGGER = """
+CREATE FUNCTION posts_posttombstone_insert() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO posts_posttombstone (post_id, deleted_at)
+    SELECT id, clock_timestamp() FROM old_rows;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER posts_posttombstone_trigger
+    AFTER DELETE ON posts_post REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION posts_posttombstone_insert();
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER IF EXISTS posts_posttombstone_trigger ON posts_post;
+DROP FUNCTION IF EXISTS posts_posttombstone_insert();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_post_category_ordering_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['deleted_at', 'post_id'], name='posts_tombstone_deleted_idx')],
+            },
+        ),
+        migrations.RunSQL(CREATE_TRIGGER, DROP_TRIGGER),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-18 21:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_posttombstone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(unique=True)),
+                ('position', models.BigIntegerField(default=0)),
+                ('rows', models.BigIntegerField(default=0)),
+                ('imported', models.BigIntegerField(default=0)),
+                ('rejected', models.BigIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.6 on 2026-10-18 21:40
+
+from django.db import migrations, models
+
+# The transaction of every write, from the database: a change feed reader only goes past the
+# transactions that are over (pg_snapshot_xmin), whatever the clocks and the commit delays.
+# Existing posts and tombstones (and the rows written without the triggers) have 0, they come first.
+CREATE_TRIGGER = """
+CREATE FUNCTION posts_post_change_id_update() RETURNS trigger AS $$
+BEGIN
+    NEW.change_id := pg_current_xact_id()::text::bigint;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER posts_post_change_id_trigger
+    BEFORE INSERT OR UPDATE ON posts_post
+    FOR EACH ROW EXECUTE FUNCTION posts_post_change_id_update();
+
+CREATE OR REPLACE FUNCTION posts_posttombstone_insert() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO posts_posttombstone (post_id, deleted_at, change_id)
+    SELECT id, clock_timestamp(), pg_current_xact_id()::text::bigint FROM old_rows;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+"""
+
+# Back to the tombstone function of migration 0007
+DROP_TRIGGER = """
+DROP TRIGGER IF EXISTS posts_post_change_id_trigger ON posts_post;
+DROP FUNCTION IF EXISTS posts_post_change_id_update();
+
+CREATE OR REPLACE FUNCTION posts_posttombstone_insert() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO posts_posttombstone (post_id, deleted_at)
+    SELECT id, clock_timestamp() FROM old_rows;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_postimport'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='change_id',
+            field=models.BigIntegerField(db_default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='posttombstone',
+            name='change_id',
+            field=models.BigIntegerField(db_default=0),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER, DROP_TRIGGER),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['change_id', 'id'], name='posts_post_change_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='posttombstone',
+            index=models.Index(fields=['change_id', 'post_id'], name='posts_tombstone_change_idx'),
+        ),
+    ]
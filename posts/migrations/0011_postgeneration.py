@@ -0,0 +1,45 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:43
+
+from django.db import migrations, models
+
+# Statement-level trigger: each statement writing posts (insert, COPY, update, delete, truncate) bumps the
+# generation once, in its own transaction, so the lists are outdated exactly when the write commits.
+# One of 16 rows per backend: concurrent writes seldom wait for each other. A new row starts from the clock,
+# so a lost table (e.g. flushed) does not go back to a generation that may still have lists cached.
+CREATE_TRIGGER = """
+CREATE FUNCTION posts_postgeneration_bump() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO posts_postgeneration (slot, value)
+    VALUES (pg_backend_pid() % 16, (extract(epoch FROM clock_timestamp()) * 1000000)::bigint)
+    ON CONFLICT (slot) DO UPDATE SET value = posts_postgeneration.value + 1;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER posts_postgeneration_trigger
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON posts_post
+    FOR EACH STATEMENT EXECUTE FUNCTION posts_postgeneration_bump();
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER IF EXISTS posts_postgeneration_trigger ON posts_post;
+DROP FUNCTION IF EXISTS posts_postgeneration_bump();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_postfacet_lock_order'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostGeneration',
+            fields=[
+                ('slot', models.SmallIntegerField(primary_key=True, serialize=False)),
+                ('value', models.BigIntegerField()),
+            ],
+        ),
+        migrations.RunSQL(CREATE_TRIGGER, DROP_TRIGGER),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:59
+
+from django.db import migrations, models
+
+# The category is in a btree index, an unbounded value can exceed its row size (about 2.7KB).
+# The longer categories saved before the limit are cut to it, the triggers update their facets.
+TRUNCATE_CATEGORIES = "UPDATE posts_post SET category = left(category, 100) WHERE length(category) > 100"
+
+# PostgreSQL does not change the type of a column named in a trigger (the search vector one, migration 0003),
+# it is dropped around the change and created again with the same definition
+DROP_SEARCH_TRIGGER = "DROP TRIGGER posts_post_search_vector_trigger ON posts_post"
+
+CREATE_SEARCH_TRIGGER = """
+CREATE TRIGGER posts_post_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, category, content ON posts_post
+    FOR EACH ROW EXECUTE FUNCTION posts_post_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_postgeneration'),
+    ]
+
+    operations = [
+        migrations.RunSQL(TRUNCATE_CATEGORIES, migrations.RunSQL.noop),
+        migrations.RunSQL(DROP_SEARCH_TRIGGER, CREATE_SEARCH_TRIGGER),
+        migrations.AlterField(
+            model_name='post',
+            name='category',
+            field=models.CharField(max_length=100),
+        ),
+        migrations.RunSQL(CREATE_SEARCH_TRIGGER, DROP_SEARCH_TRIGGER),
+    ]
@@ -1,11 +1,19 @@
 from django.db import models
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+
+class PostManager(models.Manager):
+    
+    def get_queryset(self):
+        # The search vector is only used inside SQL, never load it into Python
+        return super().get_queryset().defer('search_vector')
 
 # Create your models here.
 class Post(models.Model):
     title = models.CharField(max_length=100)
     content = models.TextField()
-    category = models.CharField()
+    category = models.CharField(max_length=100)
     tags = ArrayField(
         models.CharField(max_length=50),
         blank=True,
@@ -14,5 +22,104 @@ class Post(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     update_at = models.DateTimeField(auto_now=True)
     
+    # Weighted title/category/content document, kept up to date by a database trigger
+    search_vector = SearchVectorField(null=True, editable=False)
+    
+    # Transaction of the last write (its 64-bit ID), set by a database trigger; the change feed reads the posts in this order
+    change_id = models.BigIntegerField(db_default=0, editable=False)
+    
+    objects = PostManager()
+    
+    class Meta:
+        indexes = [
+            # Serves the keyset pagination of the post list (newest first)
+            models.Index(fields=['-created_at', '-id'], name='posts_post_created_id_idx'),
+            # Exact category filter with the default ordering, and the other `?ordering=` values
+            # (read backwards for the ascending ones)
+            models.Index(fields=['category', '-created_at', '-id'], name='posts_post_category_date_idx'),
+            models.Index(fields=['-update_at', '-id'], name='posts_post_updated_id_idx'),
+            models.Index(fields=['title', 'id'], name='posts_post_title_id_idx'),
+            # Full-text search and the trigram fallback for short or partial terms
+            GinIndex(fields=['search_vector'], name='posts_post_search_idx'),
+            GinIndex(fields=['title'], name='posts_post_title_trgm_idx', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['category'], name='posts_post_category_trgm_idx', opclasses=['gin_trgm_ops']),
+            # Tag filtering (`tags && ...` and `tags @> ...`)
+            GinIndex(fields=['tags'], name='posts_post_tags_idx'),
+            # Keyset reads of the change feed, in (change_id, id) order
+            models.Index(fields=['change_id', 'id'], name='posts_post_change_idx'),
+        ]
+    
+    def __str__(self):
+        return self.title
+
+
+class PostFacet(models.Model):
+    """
+    Number of posts per category and per tag, kept up to date by database triggers.
+    """
+    
+    CATEGORY = 'category'
+    TAG = 'tag'
+    
+    kind = models.CharField(max_length=10, choices=[(CATEGORY, 'Category'), (TAG, 'Tag')])
+    value = models.CharField()
+    count = models.BigIntegerField(default=0)
+    
+    class Meta:
+        constraints = [
+            # Target of the upserts of the triggers
+            models.UniqueConstraint(fields=['kind', 'value'], name='posts_postfacet_kind_value_uniq'),
+        ]
+    
+    def __str__(self):
+        return f'{self.kind}: {self.value} ({self.count})'
+
+class PostTombstone(models.Model):
+    """
+    ID and deletion time of a deleted post, written by a database trigger, so the change feed reports deletions.
+    """
+    
+    # Not a foreign key, the post is gone
+    post_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField()
+    # Transaction of the delete, like Post.change_id
+    change_id = models.BigIntegerField(db_default=0)
+    
+    class Meta:
+        indexes = [
+            # Pruning of the expired tombstones
+            models.Index(fields=['deleted_at', 'post_id'], name='posts_tombstone_deleted_idx'),
+            # Keyset reads of the change feed, in (change_id, post_id) order
+            models.Index(fields=['change_id', 'post_id'], name='posts_tombstone_change_idx'),
+        ]
+    
+    def __str__(self):
+        return f'{self.post_id} (deleted {self.deleted_at})'
+
+class PostImport(models.Model):
+    """
+    Progress of an import_posts run, saved in the transaction of each COPY so it always matches the imported rows.
+    """
+    
+    # Absolute path of the imported file
+    source = models.CharField(unique=True)
+    # Byte offset after the last row read, and the counters reported by the command
+    position = models.BigIntegerField(default=0)
+    rows = models.BigIntegerField(default=0)
+    imported = models.BigIntegerField(default=0)
+    rejected = models.BigIntegerField(default=0)
+    
+    def __str__(self):
+        return f'{self.source} ({self.rows} rows)'
+
+class PostGeneration(models.Model):
+    """
+    Counter of the writes to the posts, bumped by a database trigger, part of the key of every cached list.
+    """
+    
+    # Spread over a few rows, so concurrent writes rarely wait for the same one, the generation is their sum
+    slot = models.SmallIntegerField(primary_key=True)
+    value = models.BigIntegerField()
+    
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return f'{self.slot}: {self.value}'
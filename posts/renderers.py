@@ -0,0 +1,120 @@
+import abc
+import csv
+import io
+import json
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from core.metrics import timed
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Rendered rows are sent in pieces of about this size, not one write per row
+STREAM_BUFFER_SIZE = 64 * 1024
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Renders JSON with orjson when it is installed, byte for byte like DRF's JSONRenderer.
+    """
+
+    @timed('render')
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Indented or ASCII-only output keeps the standard encoder
+        if orjson is None or data is None or self.ensure_ascii or not self.compact or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Datetimes and unknown types go through DRF's encoder, like in JSONRenderer
+        encoder = self.encoder_class()
+        ret = orjson.dumps(data, default=encoder.default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+
+        # Same escaping of the line/paragraph separators as JSONRenderer
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+class StreamingRenderer(BaseRenderer, metaclass=abc.ABCMeta):
+    """
+    Base class of the export renderers, encodes rows one by one.
+    Subclasses implement `encode`, they cannot be instantiated without it.
+    """
+
+    charset = 'utf-8'
+
+    @abc.abstractmethod
+    def encode(self, rows):
+        """
+        Yields the text of the given rows (dicts), one piece per row
+        """
+
+    def stream(self, rows):
+        """
+        Yields the encoded rows in buffered chunks of bytes
+        """
+
+        buffer = io.StringIO()
+
+        for text in self.encode(rows):
+            buffer.write(text)
+
+            if buffer.tell() >= STREAM_BUFFER_SIZE:
+                yield buffer.getvalue().encode(self.charset)
+                buffer = io.StringIO()
+
+        if buffer.tell():
+            yield buffer.getvalue().encode(self.charset)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """
+        Renders a complete response (e.g. an error) at once
+        """
+
+        if data is None:
+            return b''
+
+        rows = data if isinstance(data, list) else [data]
+        return b''.join(self.stream(rows))
+
+
+class NDJSONRenderer(StreamingRenderer):
+    """
+    Renders one JSON document per line.
+    """
+
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def encode(self, rows):
+        for row in rows:
+            yield json.dumps(row, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+class CSVRenderer(StreamingRenderer):
+    """
+    Renders rows as CSV with a header line, list values are written as JSON arrays.
+    """
+
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def encode(self, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        header = None
+
+        for row in rows:
+            # The columns are the keys of the first row
+            if header is None:
+                header = list(row)
+                writer.writerow(header)
+
+            writer.writerow([
+                json.dumps(row[key], ensure_ascii=False) if isinstance(row[key], list) else row[key]
+                for key in header
+            ])
+
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
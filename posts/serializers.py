@@ -1,7 +1,107 @@
+from django.db import connection, transaction
+from django.utils import timezone
 from rest_framework import serializers
+from core.metrics import timed
 from .models import Post
+from .utils.helpers import normalize_category, normalize_tags
+
+class PostListSerializer(serializers.ListSerializer):
+    """
+    Validates many posts at once and writes them with a single query per operation.
+    """
+    
+    def validate_items(self):
+        """
+        Validates every item on its own, returns the valid data and the errors by position
+        """
+        
+        valid, errors = {}, {}
+        
+        for index, item in enumerate(self.initial_data):
+            try:
+                valid[index] = self.child.run_validation(item)
+            except serializers.ValidationError as exc:
+                errors[index] = exc.detail
+        
+        return valid, errors
+    
+    def create(self, validated_data):
+        """
+        Inserts the posts with one INSERT, the ids are returned by the database
+        """
+        
+        posts = [Post(**data) for data in validated_data]
+        
+        with transaction.atomic(savepoint=False):
+            return Post.objects.bulk_create(posts)
+    
+    def update(self, instances, validated_data):
+        """
+        Applies the validated data to the posts with one UPDATE (`validated_data` in the same order)
+        """
+        
+        fields = {'update_at'}
+        now = timezone.now()
+        
+        for post, data in zip(instances, validated_data):
+            for name, value in data.items():
+                setattr(post, name, value)
+                fields.add(name)
+            
+            # bulk_update does not touch auto_now fields by itself
+            post.update_at = now
+        
+        with transaction.atomic(savepoint=False):
+            Post.objects.bulk_update(instances, sorted(fields))
+        
+        return instances
+    
+    def delete(self, ids):
+        """
+        Deletes the posts with one DELETE, returns the ids that existed
+        """
+        
+        with transaction.atomic(savepoint=False), connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {Post._meta.db_table} WHERE id = ANY(%s) RETURNING id',
+                [list(ids)]
+                )
+            return {row[0] for row in cursor.fetchall()}
 
 class PostSerializer(serializers.ModelSerializer):
     class Meta:
         model = Post
-        fields = ['id', 'title', 'content', 'category', 'tags', 'created_at', 'update_at']
\ No newline at end of file
+        fields = ['id', 'title', 'content', 'category', 'tags', 'created_at', 'update_at']
+        list_serializer_class = PostListSerializer
+    
+    def __init__(self, *args, **kwargs):
+        # Optional subset of the fields to represent (sparse fieldsets)
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+    
+    @timed('serialize')
+    def run_validation(self, data=serializers.empty):
+        # Validation counts as serializer time in the request metrics
+        return super().run_validation(data)
+    
+    @timed('serialize')
+    def to_representation(self, instance):
+        return super().to_representation(instance)
+    
+    def validate_tags(self, value):
+        """
+        Normalizes the tags so the values in the tag index stay few and selective
+        """
+        
+        return normalize_tags(value)
+    
+    def validate_category(self, value):
+        """
+        Normalizes the category so equal categories share one value in the category index
+        """
+        
+        return normalize_category(value)
@@ -0,0 +1,92 @@
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from posts.models import Post
+from posts.utils.cache import get_cache
+
+
+class AsyncPostViewsTest(TestCase):
+
+    def setUp(self):
+
+        get_cache().clear()
+
+        self.post = Post.objects.create(
+            title = "Async title",
+            content = "Async content",
+            category = "Async"
+        )
+
+    async def test_async_list_same_as_sync(self):
+        """
+        Should return the same page as the sync list view
+        """
+
+        sync = await self.async_client.get(reverse('post-list'), {"limit": 5})
+        response = await self.async_client.get(reverse('async-post-list'), {"limit": 5})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.content, sync.content)
+        self.assertEqual(response["ETag"], sync["ETag"])
+
+    async def test_async_retrieve_post(self):
+        """
+        Should return the post, and 404 for a missing one
+        """
+
+        response = await self.async_client.get(reverse('async-post-get', kwargs={'pk': self.post.pk}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["title"], "Async title")
+
+        response = await self.async_client.get(reverse('async-post-get', kwargs={'pk': 9999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_async_create_post(self):
+        """
+        Should create a post, and fail with 400 on invalid data
+        """
+
+        data = {"title": "Created", "content": "Created content", "category": "Async", "tags": ["A"]}
+        response = await self.async_client.post(reverse('async-post-create'), data, content_type='application/json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()["tags"], ["a"])
+        self.assertEqual(await Post.objects.acount(), 2)
+
+        response = await self.async_client.post(reverse('async-post-create'), {"title": ""}, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_async_update_post(self):
+        """
+        Should partially update a post
+        """
+
+        url = reverse('async-post-update', kwargs={'pk': self.post.pk})
+        response = await self.async_client.patch(url, {"title": "Updated"}, content_type='application/json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        await self.post.arefresh_from_db()
+        self.assertEqual(self.post.title, "Updated")
+        self.assertEqual(self.post.content, "Async content")
+
+    async def test_async_delete_post(self):
+        """
+        Should delete a post, and return 404 once it is gone
+        """
+
+        url = reverse('async-post-delete', kwargs={'pk': self.post.pk})
+
+        response = await self.async_client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        response = await self.async_client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_async_invalid_params(self):
+        """
+        Should answer invalid query params with 400, like the sync views
+        """
+
+        response = await self.async_client.get(reverse('async-post-list'), {"cursor": "invalid"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("cursor", response.json())
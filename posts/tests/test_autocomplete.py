@@ -0,0 +1,180 @@
+from unittest import mock
+
+from django.core.signals import request_started
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework import status
+from posts.models import Post
+from posts.utils.autocomplete import AutocompleteIndex, PrefixIndex, clear_index, warm_on_first_request
+
+
+class PrefixIndexTest(SimpleTestCase):
+
+    def test_search_prefix(self):
+        """
+        Should return the keys starting with the prefix, in order, up to the limit
+        """
+
+        index = PrefixIndex()
+        for key in ["python", "pypi", "java", "pytest", "py"]:
+            index.add(key, key)
+
+        self.assertEqual(index.search("py", 10), [("py", 1), ("pypi", 1), ("pytest", 1), ("python", 1)])
+        self.assertEqual(index.search("pyt", 1), [("pytest", 1)])
+        self.assertEqual(index.search("rust", 10), [])
+
+    def test_remove_counts(self):
+        """
+        Should keep a key until every post that added it is removed
+        """
+
+        index = PrefixIndex()
+        index.add("django", "django")
+        index.add("django", "django")
+
+        index.remove("django")
+        self.assertEqual(index.search("dj", 10), [("django", 1)])
+
+        index.remove("django")
+        self.assertEqual(index.search("dj", 10), [])
+        self.assertEqual(index.keys, [])
+
+
+class AutocompleteIndexTest(SimpleTestCase):
+
+    def test_search_ignores_case_and_spacing(self):
+        """
+        Should match titles whatever the case and spacing of the prefix
+        """
+
+        index = AutocompleteIndex([(1, "Learning  Python", ["python"])], max_posts=10)
+
+        self.assertEqual(index.search(" learning p", limit=5), {"title": [("Learning  Python", 1)], "tag": []})
+        self.assertEqual(index.search("", limit=5), {"title": [], "tag": []})
+
+    def test_search_tags_ignores_case(self):
+        """
+        Should match tags with the same key as the prefix
+        """
+
+        index = AutocompleteIndex([(1, "Title", ["Straße", "Python"])], max_posts=10)
+
+        self.assertEqual(index.search("straß", limit=5)["tag"], [("Straße", 1)])
+        self.assertEqual(index.search("PY", limit=5)["tag"], [("Python", 1)])
+
+        index.remove(1)
+        self.assertEqual(index.search("straß", limit=5)["tag"], [])
+
+    def test_update_replaces_values(self):
+        """
+        Should forget the old title and tags of an updated post
+        """
+
+        index = AutocompleteIndex([(1, "Old title", ["old"])], max_posts=10)
+        index.add(1, "New title", ["new"])
+
+        self.assertEqual(index.search("old", limit=5), {"title": [], "tag": []})
+        self.assertEqual(index.search("new", limit=5), {"title": [("New title", 1)], "tag": [("new", 1)]})
+
+    def test_bounded(self):
+        """
+        Should forget the oldest post when full
+        """
+
+        index = AutocompleteIndex([(1, "First", []), (2, "Second", [])], max_posts=2)
+        index.add(3, "Third", [])
+
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index.search("first", limit=5)["title"], [])
+        self.assertEqual(index.search("third", limit=5)["title"], [("Third", 1)])
+
+    def test_warm_on_first_request(self):
+        """
+        Should warm the index on the first request of the process only
+        """
+
+        request_started.connect(warm_on_first_request)
+        self.addCleanup(request_started.disconnect, warm_on_first_request)
+
+        with mock.patch('posts.utils.autocomplete.warm_index') as warm_index:
+            request_started.send(sender=None)
+            request_started.send(sender=None)
+
+        warm_index.assert_called_once_with()
+
+
+class PostAutocompleteViewTest(APITestCase):
+
+    def setUp(self):
+
+        clear_index()
+        self.addCleanup(clear_index)
+
+        self.post = Post.objects.create(title="Python tips", content="Content", category="Python", tags=["python", "tips"])
+        Post.objects.create(title="Pyramid basics", content="Content", category="Python", tags=["pyramid", "python"])
+
+        self.url = reverse('post-autocomplete')
+
+    def test_autocomplete(self):
+        """
+        Should suggest titles and tags with the number of posts of each
+        """
+
+        response = self.client.get(self.url, {"q": "py"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual([item["value"] for item in response.data["titles"]], ["Pyramid basics", "Python tips"])
+        self.assertEqual(response.data["tags"], [{"value": "pyramid", "count": 1}, {"value": "python", "count": 2}])
+
+    def test_autocomplete_no_query(self):
+        """
+        Should answer from memory once the index is built
+        """
+
+        self.client.get(self.url, {"q": "py"})
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, {"q": "pyth", "kind": "tag"})
+
+        self.assertEqual(response.data, {"tags": [{"value": "python", "count": 2}]})
+
+    @override_settings(POSTS_AUTOCOMPLETE_MAX_LIMIT=1)
+    def test_autocomplete_limit(self):
+        """
+        Should cap the number of suggestions per kind
+        """
+
+        response = self.client.get(self.url, {"q": "py", "limit": 10})
+        self.assertEqual(len(response.data["titles"]), 1)
+        self.assertEqual(len(response.data["tags"]), 1)
+
+    def test_autocomplete_invalid_kind(self):
+        """
+        Should reject an unknown kind
+        """
+
+        response = self.client.get(self.url, {"q": "py", "kind": "content"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_autocomplete_follows_writes(self):
+        """
+        Should suggest created and updated posts and forget deleted ones
+        """
+
+        self.client.get(self.url, {"q": "py"})
+
+        self.client.post(reverse('post-create'), {"title": "Rust intro", "content": "Content", "category": "Rust", "tags": ["rust"]}, format='json')
+        self.client.patch(reverse('post-update', kwargs={'pk': self.post.pk}), {"title": "Ruby tips", "tags": ["ruby"]}, format='json')
+
+        response = self.client.get(self.url, {"q": "ru"})
+        self.assertEqual([item["value"] for item in response.data["titles"]], ["Ruby tips", "Rust intro"])
+        self.assertEqual([item["value"] for item in response.data["tags"]], ["ruby", "rust"])
+
+        response = self.client.get(self.url, {"q": "py", "kind": "tag"})
+        self.assertEqual(response.data["tags"], [{"value": "pyramid", "count": 1}, {"value": "python", "count": 1}])
+
+        self.client.delete(reverse('post-delete', kwargs={'pk': self.post.pk}))
+
+        response = self.client.get(self.url, {"q": "ruby"})
+        self.assertEqual(response.data, {"titles": [], "tags": []})
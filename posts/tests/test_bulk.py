@@ -0,0 +1,109 @@
+import unittest
+
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.models import Post
+
+
+class PostBulkViewTest(APITestCase):
+
+    def setUp(self):
+
+        self.post = Post.objects.create(
+            title = "First title",
+            content = "First content",
+            category = "Bulk"
+        )
+
+        self.post1 = Post.objects.create(
+            title = "Second title",
+            content = "Second content",
+            category = "Bulk"
+        )
+
+        self.url = reverse('post-bulk')
+
+    def test_bulk_create(self):
+        """
+        Should create every valid post with one INSERT and report the invalid ones
+        """
+
+        data = [
+            {"title": "New 1", "content": "Content 1", "category": "Bulk"},
+            {"content": "Missing title", "category": "Bulk"},
+            {"title": "New 2", "content": "Content 2", "category": "Bulk", "tags": ["A", "a"]},
+        ]
+
+        with self.assertNumQueries(1):
+            response = self.client.post(self.url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual([item["status"] for item in response.data], [201, 400, 201])
+        self.assertIn("title", response.data[1]["errors"])
+
+        # The created posts have their ID and normalized tags
+        self.assertEqual(response.data[2]["data"]["tags"], ["a"])
+        self.assertTrue(Post.objects.filter(pk=response.data[0]["data"]["id"]).exists())
+        self.assertEqual(Post.objects.count(), 4)
+
+    def test_bulk_update(self):
+        """
+        Should update the existing posts with one UPDATE and report the missing ones
+        """
+
+        data = [
+            {"id": self.post.pk, "title": "Updated first"},
+            {"id": 9999, "title": "Missing"},
+            {"id": self.post1.pk, "content": ""},
+        ]
+
+        # One query loads the posts, one updates them
+        with self.assertNumQueries(2):
+            response = self.client.patch(self.url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual([item["status"] for item in response.data], [200, 404, 400])
+
+        self.post.refresh_from_db()
+        self.post1.refresh_from_db()
+        self.assertEqual(self.post.title, "Updated first")
+        self.assertEqual(self.post1.content, "Second content")
+
+    @unittest.skipUnless(connection.features.has_select_for_update, 'The database cannot lock rows.')
+    def test_bulk_update_locks_posts(self):
+        """
+        Should lock the posts it reads until their UPDATE is committed
+        """
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.patch(self.url, [{"id": self.post.pk, "title": "Locked"}], format='json')
+
+        self.assertIn("FOR UPDATE", queries[0]["sql"])
+
+    def test_bulk_delete(self):
+        """
+        Should delete the posts with one DELETE and report the missing ones
+        """
+
+        with self.assertNumQueries(1):
+            response = self.client.delete(self.url, {"ids": [self.post.pk, 9999]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual([item["status"] for item in response.data], [204, 404])
+        self.assertEqual(list(Post.objects.values_list('pk', flat=True)), [self.post1.pk])
+
+    @override_settings(POSTS_BULK_MAX_SIZE=2)
+    def test_bulk_max_size(self):
+        """
+        Should refuse batches larger than the configured maximum
+        """
+
+        data = [{"title": f"Post {number}", "content": "Content", "category": "Bulk"} for number in range(3)]
+
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Post.objects.count(), 2)
@@ -0,0 +1,170 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db.models import QuerySet
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.urls import reverse
+from posts.models import Post
+from posts.utils.cache import get_cache, get_cache_stats, get_many_posts_data, get_post_data, invalidate_posts
+from posts.utils.representation import represent_row
+
+QUERYSET_USING = QuerySet.using
+
+
+def replica_using(queryset, alias):
+    """
+    Sends the queries routed to a replica to the test database, which stands in for it
+    """
+
+    return QUERYSET_USING(queryset, 'default')
+
+
+class PostCacheTest(APITestCase):
+
+    def setUp(self):
+
+        # Start every test with an empty cache
+        get_cache().clear()
+
+        self.post = Post.objects.create(
+            title = "Cached title",
+            content = "Cached content",
+            category = "Cache"
+        )
+
+        self.url = reverse('post-get', kwargs={'pk': self.post.pk})
+
+    def test_retrieve_post_from_cache(self):
+        """
+        Should read the post from the database only once
+        """
+
+        stats = get_cache_stats()
+
+        with self.assertNumQueries(1):
+            first = self.client.get(self.url)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.data, second.data)
+
+        # One miss and one hit were counted
+        self.assertEqual(get_cache_stats()["misses"], stats["misses"] + 1)
+        self.assertEqual(get_cache_stats()["hits"], stats["hits"] + 1)
+
+    def test_retrieve_missing_post_cached(self):
+        """
+        Should remember a missing post instead of querying again
+        """
+
+        url = reverse('post-get', kwargs={'pk': 9999})
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_update_invalidates_cache(self):
+        """
+        Should return the new data after an update
+        """
+
+        self.client.get(self.url)
+
+        url = reverse('post-update', kwargs={'pk': self.post.pk})
+        self.client.patch(url, {"title": "New title"}, format='json')
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["title"], "New title")
+
+    def test_delete_invalidates_cache(self):
+        """
+        Should return 404 after the post was deleted
+        """
+
+        self.client.get(self.url)
+        self.client.delete(reverse('post-delete', kwargs={'pk': self.post.pk}))
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_replica_fill_after_recent_write(self):
+        """
+        Should not cache a post read from a replica that may not have applied its last write yet
+        """
+
+        invalidate_posts(self.post.pk)
+
+        with mock.patch('core.db_router.PrimaryReplicaRouter.db_for_read', return_value='replica_0'), \
+                mock.patch.object(QuerySet, 'using', replica_using):
+            for _ in range(2):
+                with self.assertNumQueries(1):
+                    self.assertEqual(get_post_data(self.post.pk)["title"], "Cached title")
+
+            # Once the replicas caught up
+            with override_settings(POSTS_PRIMARY_PIN_SECONDS=0):
+                get_post_data(self.post.pk)
+
+            with self.assertNumQueries(0):
+                get_many_posts_data([self.post.pk])
+
+    def test_replica_fill_without_write(self):
+        """
+        Should cache a post read from a replica when no recent write is known
+        """
+
+        with mock.patch('core.db_router.PrimaryReplicaRouter.db_for_read', return_value='replica_0'), \
+                mock.patch.object(QuerySet, 'using', replica_using):
+            get_many_posts_data([self.post.pk, self.post.pk + 1])
+
+            with self.assertNumQueries(0):
+                self.assertEqual(list(get_many_posts_data([self.post.pk, self.post.pk + 1])), [self.post.pk])
+
+    def test_fill_after_write_not_kept(self):
+        """
+        Should not keep a post read before a write that committed before it was cached
+        """
+
+        def write_then_represent(row, fields):
+            # The write commits (and invalidates) between the read of the row and the fill
+            Post.objects.filter(pk=self.post.pk).update(title="Written meanwhile")
+            invalidate_posts(self.post.pk)
+            return represent_row(row, fields)
+
+        with mock.patch('posts.utils.cache.represent_row', side_effect=write_then_represent):
+            self.assertEqual(get_post_data(self.post.pk)["title"], "Cached title")
+
+        self.assertEqual(get_post_data(self.post.pk)["title"], "Written meanwhile")
+
+    def test_many_fill_after_write_not_kept(self):
+        """
+        Should not keep the posts of a multi-get read before a write either
+        """
+
+        def write_then_represent(row, fields):
+            Post.objects.filter(pk=self.post.pk).update(title="Written meanwhile")
+            invalidate_posts(self.post.pk)
+            return represent_row(row, fields)
+
+        with mock.patch('posts.utils.cache.represent_row', side_effect=write_then_represent):
+            get_many_posts_data([self.post.pk])
+
+        self.assertEqual(get_many_posts_data([self.post.pk])[self.post.pk]["title"], "Written meanwhile")
+
+    def test_cache_stats(self):
+        """
+        Should expose the hit/miss counters to the staff only
+        """
+
+        self.assertEqual(self.client.get(reverse('post-cache-stats')).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(User.objects.create_user("staff", is_staff=True))
+        response = self.client.get(reverse('post-cache-stats'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("hits", response.data)
+        self.assertIn("misses", response.data)
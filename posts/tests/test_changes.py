@@ -0,0 +1,231 @@
+import datetime
+import io
+import unittest
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITransactionTestCase
+from rest_framework import status
+from posts.models import Post, PostTombstone
+from posts.utils.changes import decode_position, get_horizon
+from posts.utils.pagination import encode_cursor
+
+
+def next_change():
+    """
+    Returns the ID of a new (finished) transaction, for the change_id of a tombstone written by hand
+    """
+
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_current_xact_id()::text::bigint')
+        return cursor.fetchone()[0]
+
+
+# The feed only reads the transactions that are over, every write of these tests is committed
+@unittest.skipUnless(connection.vendor == 'postgresql', 'The change IDs are written by a PostgreSQL trigger.')
+class PostChangesTest(APITransactionTestCase):
+
+    def setUp(self):
+
+        self.posts = [
+            Post.objects.create(title=f"Change {number}", content="Content", category="Changes")
+            for number in range(5)
+        ]
+
+        self.url = reverse('post-changes')
+
+    def test_changes_from_start(self):
+        """
+        Should return every post in the order of their changes without a cursor
+        """
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual([change["id"] for change in response.data["results"]], [post.id for post in self.posts])
+        self.assertFalse(response.data["results"][0]["deleted"])
+        self.assertFalse(response.data["has_more"])
+
+    def test_changes_batches(self):
+        """
+        Should page through the backlog in batches of `limit` with the returned cursor
+        """
+
+        seen = []
+        cursor = None
+
+        while True:
+            params = {"limit": 2, **({"since": cursor} if cursor else {})}
+            response = self.client.get(self.url, params)
+            self.assertLessEqual(len(response.data["results"]), 2)
+
+            seen += [change["id"] for change in response.data["results"]]
+            cursor = response.data["cursor"]
+
+            if not response.data["has_more"]:
+                break
+
+        self.assertEqual(seen, [post.id for post in self.posts])
+
+        # Nothing new: the cursor moves to the horizon, and still sees the next change
+        response = self.client.get(self.url, {"since": cursor})
+        self.assertEqual(response.data["results"], [])
+        self.assertNotEqual(response.data["cursor"], cursor)
+
+        self.client.patch(reverse('post-update', kwargs={'pk': self.posts[0].pk}), {"title": "Changed"}, format='json')
+        response = self.client.get(self.url, {"since": response.data["cursor"]})
+        self.assertEqual([change["id"] for change in response.data["results"]], [self.posts[0].pk])
+
+    @override_settings(POSTS_TOMBSTONE_RETENTION_DAYS=1)
+    def test_changes_caught_up_cursor(self):
+        """
+        Should keep moving the cursor of a client with nothing to read, so it does not expire
+        """
+
+        position, _ = decode_position(self.client.get(self.url).data["cursor"])
+
+        # A cursor close to the retention limit, with no change after it
+        cursor = encode_cursor([*position, timezone.now() - datetime.timedelta(hours=23)])
+        cursor = self.client.get(self.url, {"since": cursor}).data["cursor"]
+
+        horizon, now = get_horizon('default')
+        with mock.patch('posts.utils.changes.get_horizon', return_value=(horizon, now + datetime.timedelta(hours=2))):
+            response = self.client.get(self.url, {"since": cursor})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"], [])
+
+    def test_changes_after_update(self):
+        """
+        Should only return the posts updated after the cursor, with their new values
+        """
+
+        cursor = self.client.get(self.url).data["cursor"]
+        self.client.patch(reverse('post-update', kwargs={'pk': self.posts[1].pk}), {"title": "Changed"}, format='json')
+
+        response = self.client.get(self.url, {"since": cursor})
+        self.assertEqual([(change["id"], change["title"]) for change in response.data["results"]], [(self.posts[1].pk, "Changed")])
+
+    def test_changes_whatever_the_dates(self):
+        """
+        Should return a post written after the cursor with an older update_at (e.g. imported)
+        """
+
+        cursor = self.client.get(self.url).data["cursor"]
+        Post.objects.filter(pk=self.posts[2].pk).update(update_at=datetime.datetime(2019, 1, 1, tzinfo=datetime.timezone.utc))
+
+        response = self.client.get(self.url, {"since": cursor})
+        self.assertEqual([change["id"] for change in response.data["results"]], [self.posts[2].pk])
+
+    def test_changes_running_transaction(self):
+        """
+        Should leave the changes of a transaction still running for a later call, even once it commits
+        """
+
+        cursor = self.client.get(self.url).data["cursor"]
+
+        other = connections.create_connection(DEFAULT_DB_ALIAS)
+        try:
+            with other.cursor() as other_cursor:
+                other_cursor.execute('BEGIN')
+                other_cursor.execute(
+                    "INSERT INTO posts_post (title, content, category, tags, created_at, update_at) "
+                    "VALUES ('Late', 'Content', 'Changes', '{}', now(), now()) RETURNING id"
+                    )
+                late = other_cursor.fetchone()[0]
+
+                # Committed after this one, but the change of the running transaction is not skipped
+                self.client.patch(reverse('post-update', kwargs={'pk': self.posts[0].pk}), {"title": "Changed"}, format='json')
+                response = self.client.get(self.url, {"since": cursor})
+                self.assertEqual(response.data["results"], [])
+
+                other_cursor.execute('COMMIT')
+        finally:
+            other.close()
+
+        response = self.client.get(self.url, {"since": response.data["cursor"]})
+        self.assertEqual([change["id"] for change in response.data["results"]], [late, self.posts[0].pk])
+
+    def test_changes_merge_tombstones(self):
+        """
+        Should report deleted posts between the updated ones, in the order of their changes
+        """
+
+        cursor = self.client.get(self.url).data["cursor"]
+
+        PostTombstone.objects.create(post_id=999, deleted_at=timezone.now(), change_id=next_change())
+        self.client.patch(reverse('post-update', kwargs={'pk': self.posts[0].pk}), {"title": "After"}, format='json')
+
+        results = self.client.get(self.url, {"since": cursor}).data["results"]
+        self.assertEqual([(change["id"], change["deleted"]) for change in results], [(999, True), (self.posts[0].pk, False)])
+        self.assertIn("deleted_at", results[0])
+
+    def test_changes_fields(self):
+        """
+        Should keep the id when only some fields are requested
+        """
+
+        response = self.client.get(self.url, {"fields": "title"})
+        self.assertEqual(set(response.data["results"][0]), {"id", "title", "deleted"})
+
+    def test_changes_invalid_cursor(self):
+        """
+        Should fail when the cursor was not generated by the API
+        """
+
+        response = self.client.get(self.url, {"since": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(POSTS_TOMBSTONE_RETENTION_DAYS=1)
+    def test_changes_expired_cursor(self):
+        """
+        Should ask for a full resync when deletions after the cursor may have been pruned
+        """
+
+        cursor = encode_cursor([0, 0, timezone.now() - datetime.timedelta(days=2)])
+
+        response = self.client.get(self.url, {"since": cursor})
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+
+    def test_prune_tombstones(self):
+        """
+        Should delete the tombstones older than the retention only
+        """
+
+        PostTombstone.objects.create(post_id=1, deleted_at=timezone.now() - datetime.timedelta(days=60))
+        PostTombstone.objects.create(post_id=2, deleted_at=timezone.now())
+
+        call_command('prune_tombstones', stdout=io.StringIO())
+        self.assertEqual(list(PostTombstone.objects.values_list('post_id', flat=True)), [2])
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'The tombstones are written by a PostgreSQL trigger.')
+class PostTombstoneTriggerTest(APITransactionTestCase):
+
+    def test_delete_view_writes_tombstone(self):
+        """
+        Should report a post deleted through the API in the feed
+        """
+
+        post = Post.objects.create(title="Doomed", content="Content", category="Changes")
+        cursor = self.client.get(reverse('post-changes')).data["cursor"]
+
+        self.client.delete(reverse('post-delete', kwargs={'pk': post.pk}))
+
+        results = self.client.get(reverse('post-changes'), {"since": cursor}).data["results"]
+        self.assertEqual([(change["id"], change["deleted"]) for change in results], [(post.pk, True)])
+
+    def test_bulk_delete_writes_tombstones(self):
+        """
+        Should write one tombstone per post deleted by the bulk endpoint
+        """
+
+        posts = [Post.objects.create(title=f"Bulk {number}", content="Content", category="Changes") for number in range(3)]
+
+        self.client.delete(reverse('post-bulk'), {"ids": [post.pk for post in posts]}, format='json')
+
+        self.assertEqual(sorted(PostTombstone.objects.values_list('post_id', flat=True)), [post.pk for post in posts])
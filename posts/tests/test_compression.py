@@ -0,0 +1,137 @@
+import gzip
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework import status
+from core.compression import ENCODINGS, choose_encoding, parse_accept_encoding
+from posts.models import Post
+from posts.utils.cache import get_cache
+
+
+class AcceptEncodingTest(SimpleTestCase):
+
+    def test_parse_accept_encoding(self):
+        """
+        Should read the codings and their q-values
+        """
+
+        self.assertEqual(parse_accept_encoding("gzip, br;q=0.5, *;q=0"), {"gzip": 1.0, "br": 0.5, "*": 0.0})
+        self.assertEqual(parse_accept_encoding(""), {})
+
+    def test_choose_encoding(self):
+        """
+        Should pick an accepted coding the server can produce, none when everything is refused
+        """
+
+        self.assertEqual(choose_encoding(parse_accept_encoding("gzip, deflate")), "gzip")
+        self.assertEqual(choose_encoding(parse_accept_encoding("identity")), None)
+        self.assertEqual(choose_encoding(parse_accept_encoding("gzip;q=0")), None)
+        self.assertIn(choose_encoding(parse_accept_encoding("*")), ENCODINGS)
+
+
+@override_settings(POSTS_COMPRESS_MIN_SIZE=200)
+class CompressionMiddlewareTest(APITestCase):
+
+    def setUp(self):
+
+        get_cache().clear()
+
+        self.posts = [
+            Post.objects.create(title=f"Compressed {number}", content="Repetitive content " * 20, category="Compression")
+            for number in range(5)
+        ]
+
+        self.url = reverse('post-list')
+
+    def test_compress_list(self):
+        """
+        Should send a gzip body with its own ETag, the same JSON once decompressed
+        """
+
+        plain = self.client.get(self.url)
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertLess(len(response.content), len(plain.content))
+        self.assertEqual(response["ETag"], plain["ETag"][:-1] + '-gzip"')
+
+    def test_small_not_compressed(self):
+        """
+        Should send small bodies as they are
+        """
+
+        response = self.client.get(reverse('post-autocomplete'), {"q": "zz"}, HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+    def test_compressed_body_cached(self):
+        """
+        Should compress a page once and reuse the bytes while its ETag is the same
+        """
+
+        compress = mock.Mock(side_effect=ENCODINGS["gzip"])
+
+        with mock.patch.dict(ENCODINGS, {"gzip": compress}):
+            first = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip")
+            second = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip")
+
+            self.assertEqual(compress.call_count, 1)
+            self.assertEqual(first.content, second.content)
+
+            # Another version of the page is compressed again
+            self.client.patch(reverse('post-update', kwargs={'pk': self.posts[0].pk}), {"title": "Changed"}, format='json')
+            self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip")
+            self.assertEqual(compress.call_count, 2)
+
+    def test_compressed_media_types(self):
+        """
+        Should not serve the compressed JSON of a page to the browsable API, nor answer it with a 304
+        """
+
+        plain = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip")
+        response = self.client.get(self.url, HTTP_ACCEPT="text/html", HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=plain["ETag"])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/html"))
+        self.assertNotEqual(response["ETag"], plain["ETag"])
+        self.assertIn(b"<html", gzip.decompress(response.content))
+
+    def test_not_modified_compressed_etag(self):
+        """
+        Should understand the ETag of a compressed body in If-None-Match and send it back with the 304
+        """
+
+        etag = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip")["ETag"]
+
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_if_match_compressed_etag(self):
+        """
+        Should accept the ETag of a compressed post in If-Match
+        """
+
+        url = reverse('post-get', kwargs={'pk': self.posts[0].pk})
+        etag = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip")["ETag"]
+        self.assertTrue(etag.endswith('-gzip"'))
+
+        response = self.client.patch(reverse('post-update', kwargs={'pk': self.posts[0].pk}), {"title": "Matched"}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_compress_export_stream(self):
+        """
+        Should gzip the export while it is streamed
+        """
+
+        response = self.client.get(reverse('post-export'), {"format": "ndjson"}, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+
+        lines = gzip.decompress(b"".join(response.streaming_content)).splitlines()
+        self.assertEqual(len(lines), 5)
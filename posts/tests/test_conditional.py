@@ -0,0 +1,101 @@
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.urls import reverse
+from posts.models import Post
+from posts.utils.cache import get_cache
+
+
+class PostConditionalRequestTest(APITestCase):
+
+    def setUp(self):
+
+        get_cache().clear()
+
+        self.post = Post.objects.create(
+            title = "Conditional title",
+            content = "Conditional content",
+            category = "HTTP"
+        )
+
+        self.url = reverse('post-get', kwargs={'pk': self.post.pk})
+        self.update_url = reverse('post-update', kwargs={'pk': self.post.pk})
+
+    def test_retrieve_post_validators(self):
+        """
+        Should send the ETag and Last-Modified of the post
+        """
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["ETag"].startswith('"'))
+        self.assertIn("Last-Modified", response)
+
+    def test_retrieve_post_not_modified(self):
+        """
+        Should return 304 with a single cheap query when the client copy is current
+        """
+
+        etag = self.client.get(self.url)["ETag"]
+        get_cache().clear()
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_retrieve_post_modified(self):
+        """
+        Should return the post again after it changed
+        """
+
+        etag = self.client.get(self.url)["ETag"]
+        self.client.patch(self.update_url, {"title": "Changed"}, format='json')
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_retrieve_post_media_type(self):
+        """
+        Should give the browsable API its own ETag, never a 304 for the JSON copy
+        """
+
+        etag = self.client.get(self.url)["ETag"]
+
+        response = self.client.get(self.url, HTTP_ACCEPT="text/html", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_update_post_if_match(self):
+        """
+        Should update only when If-Match is the current ETag, 412 otherwise
+        """
+
+        etag = self.client.get(self.url)["ETag"]
+
+        response = self.client.patch(self.update_url, {"title": "First"}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # The same ETag is now stale
+        response = self.client.patch(self.update_url, {"title": "Second"}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.title, "First")
+
+    def test_list_posts_not_modified(self):
+        """
+        Should return 304 for an unchanged page and 200 once a post of the page changed
+        """
+
+        url = reverse('post-list')
+        etag = self.client.get(url)["ETag"]
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.patch(self.update_url, {"title": "Changed"}, format='json')
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -0,0 +1,153 @@
+import time
+import unittest
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from core.db_router import PinPrimaryMiddleware, PrimaryReplicaRouter, _pinned
+from posts.models import Post
+
+# Two replicas next to the primary, only the aliases matter to the router
+REPLICA_DATABASES = {
+    'default': {},
+    'replica_0': {},
+    'replica_1': {},
+}
+
+
+class PrimaryReplicaRouterTest(SimpleTestCase):
+
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+
+    @override_settings(DATABASES=REPLICA_DATABASES)
+    def test_reads_go_to_replicas(self):
+        """
+        Should read from a replica and write to the primary
+        """
+
+        self.assertIn(self.router.db_for_read(Post), ('replica_0', 'replica_1'))
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+
+    @override_settings(DATABASES=REPLICA_DATABASES)
+    def test_pinned_reads_go_to_primary(self):
+        """
+        Should read from the primary while the request is pinned
+        """
+
+        token = _pinned.set(True)
+        try:
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+        finally:
+            _pinned.reset(token)
+
+    @override_settings(DATABASES={'default': {}})
+    def test_reads_without_replicas(self):
+        """
+        Should read from the primary when no replica is configured
+        """
+
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_migrate_only_primary(self):
+        """
+        Should only migrate the primary
+        """
+
+        self.assertTrue(self.router.allow_migrate('default', 'posts'))
+        self.assertFalse(self.router.allow_migrate('replica_0', 'posts'))
+
+
+class PinPrimaryMiddlewareTest(SimpleTestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def run_middleware(self, request, code=200):
+        """
+        Runs a request through the middleware, returns (pinned while handled, response)
+        """
+
+        seen = {}
+
+        def get_response(request):
+            seen['pinned'] = _pinned.get()
+            return HttpResponse(status=code)
+
+        response = PinPrimaryMiddleware(get_response)(request)
+        return seen['pinned'], response
+
+    def test_write_pins_client(self):
+        """
+        Should pin writes and set the cookie that pins the next reads
+        """
+
+        pinned, response = self.run_middleware(self.factory.post('/'))
+        self.assertTrue(pinned)
+
+        cookie = response.cookies[PinPrimaryMiddleware.cookie_name]
+        self.assertEqual(cookie['max-age'], settings.POSTS_PRIMARY_PIN_SECONDS)
+
+        # The next read of the same client goes to the primary
+        request = self.factory.get('/')
+        request.COOKIES[cookie.key] = cookie.value
+        pinned, response = self.run_middleware(request)
+        self.assertTrue(pinned)
+        self.assertNotIn(cookie.key, response.cookies)
+
+        # The pin only lasts for the request
+        self.assertFalse(_pinned.get())
+
+    def test_read_not_pinned(self):
+        """
+        Should not pin reads without a cookie or with an expired/invalid one
+        """
+
+        pinned, _ = self.run_middleware(self.factory.get('/'))
+        self.assertFalse(pinned)
+
+        for value in (str(time.time() - 1), 'not-a-number'):
+            request = self.factory.get('/')
+            request.COOKIES[PinPrimaryMiddleware.cookie_name] = value
+            pinned, _ = self.run_middleware(request)
+            self.assertFalse(pinned)
+
+    def test_failed_write_not_pinned(self):
+        """
+        Should not set the cookie when the write failed
+        """
+
+        _, response = self.run_middleware(self.factory.post('/'), code=400)
+        self.assertNotIn(PinPrimaryMiddleware.cookie_name, response.cookies)
+
+
+@unittest.skipUnless('replica_0' in settings.DATABASES, 'Set DB_REPLICA_HOSTS to run against a replica.')
+class ReadYourWritesTest(TransactionTestCase):
+
+    # Only the configured aliases, the runner sets up databases even for skipped tests
+    databases = {'default', 'replica_0'} & set(settings.DATABASES)
+
+    def test_read_after_write_uses_primary(self):
+        """
+        Should read a new post from the primary right after creating it, and from a replica later
+        """
+
+        client = APIClient()
+        response = client.post(reverse('post-create'), {"title": "Pinned", "content": "Content", "category": "Router"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        # The client holds the pin cookie, its read goes to the primary
+        with CaptureQueriesContext(connections['replica_0']) as replica:
+            response = client.get(reverse('post-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(replica), 0)
+
+        # Another client reads from the replica
+        with CaptureQueriesContext(connections['replica_0']) as replica:
+            APIClient().get(reverse('post-list'))
+        self.assertGreater(len(replica), 0)
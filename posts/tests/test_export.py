@@ -0,0 +1,107 @@
+import csv
+import io
+import json
+import tracemalloc
+
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.test import override_settings
+from django.urls import reverse
+from posts.models import Post
+from posts.renderers import StreamingRenderer
+
+
+class PostExportViewTest(APITestCase):
+
+    def setUp(self):
+
+        self.post = Post.objects.create(
+            title = "Python post",
+            content = "Some content",
+            category = "Backend",
+            tags = ["python", "web"]
+        )
+
+        self.post1 = Post.objects.create(
+            title = "Rust post",
+            content = "Other content",
+            category = "Backend",
+            tags = ["rust"]
+        )
+
+        self.url = reverse('post-export')
+
+    def test_export_ndjson(self):
+        """
+        Should stream one JSON document per post (NDJSON is the default format)
+        """
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertTrue(response["Content-Type"].startswith("application/x-ndjson"))
+
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        titles = [json.loads(line)["title"] for line in lines]
+        self.assertCountEqual(titles, ["Python post", "Rust post"])
+
+    def test_export_csv(self):
+        """
+        Should stream a CSV file with a header line when asked for CSV
+        """
+
+        response = self.client.get(self.url, {"format": "csv"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        content = b"".join(response.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]["category"], "Backend")
+        self.assertIn(json.loads(rows[0]["tags"]), [["python", "web"], ["rust"]])
+
+    def test_export_filters(self):
+        """
+        Should apply the same filters as the post list
+        """
+
+        response = self.client.get(self.url, {"tag": "rust"})
+        lines = b"".join(response.streaming_content).decode().splitlines()
+
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])["id"], self.post1.id)
+
+    @override_settings(POSTS_EXPORT_CHUNK_SIZE=50)
+    def test_export_bounded_memory(self):
+        """
+        Should keep the peak memory far below the size of the export
+        """
+
+        Post.objects.bulk_create([
+            Post(title = f"Post {number}", content = "x" * 4000, category = "Bulk")
+            for number in range(1000)
+        ])
+
+        response = self.client.get(self.url)
+
+        # Measure only while the rows are read and encoded
+        tracemalloc.start()
+        total = sum(len(chunk) for chunk in response.streaming_content)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        # About 4 MB are sent, a buffered response would need several times that
+        self.assertGreater(total, 4_000_000)
+        self.assertLess(peak, total / 4)
+
+    def test_streaming_renderer_needs_encode(self):
+        """
+        Should refuse a streaming renderer that does not implement encode
+        """
+
+        class IncompleteRenderer(StreamingRenderer):
+            media_type = "text/plain"
+            format = "txt"
+
+        with self.assertRaises(TypeError):
+            IncompleteRenderer()
@@ -0,0 +1,104 @@
+import io
+
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.core.management import call_command
+from django.urls import reverse
+from posts.models import Post, PostFacet
+
+
+def as_dict(facets):
+    """
+    Converts a list of facets to a {value: count} dict
+    """
+
+    return {facet["value"]: facet["count"] for facet in facets}
+
+
+class PostFacetsTest(APITestCase):
+
+    def setUp(self):
+
+        self.python = Post.objects.create(
+            title = "Python post",
+            content = "Some content",
+            category = "Backend",
+            tags = ["python", "web"]
+        )
+
+        self.rust = Post.objects.create(
+            title = "Rust post",
+            content = "Some content",
+            category = "Backend",
+            tags = ["rust", "web"]
+        )
+
+        self.css = Post.objects.create(
+            title = "CSS post",
+            content = "Some content",
+            category = "Frontend",
+            tags = ["web"]
+        )
+
+        self.url = reverse('post-facets')
+
+    def test_facets(self):
+        """
+        Should return the counts of every category and tag, the most common first
+        """
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(response.data["categories"], [{"value": "Backend", "count": 2}, {"value": "Frontend", "count": 1}])
+        self.assertEqual(response.data["tags"][0], {"value": "web", "count": 3})
+        self.assertEqual(as_dict(response.data["tags"]), {"web": 3, "python": 1, "rust": 1})
+
+    def test_facets_single_query(self):
+        """
+        Should read the counts from the summary table
+        """
+
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+
+    def test_facets_follow_writes(self):
+        """
+        Should update the counts on create, update, delete and bulk writes
+        """
+
+        self.client.patch(reverse('post-update', kwargs={'pk': self.rust.pk}), {"category": "Systems", "tags": ["rust"]}, format='json')
+        self.client.delete(reverse('post-delete', kwargs={'pk': self.css.pk}))
+        self.client.post(reverse('post-bulk'), [
+            {"title": "Go post", "content": "Content", "category": "Systems", "tags": ["go", "web"]},
+            {"title": "Zig post", "content": "Content", "category": "Systems", "tags": ["zig"]},
+        ], format='json')
+
+        response = self.client.get(self.url)
+        self.assertEqual(as_dict(response.data["categories"]), {"Systems": 3, "Backend": 1})
+        self.assertEqual(as_dict(response.data["tags"]), {"web": 2, "python": 1, "rust": 1, "go": 1, "zig": 1})
+
+    def test_facets_search(self):
+        """
+        Should only count the posts matching the search and tag filters
+        """
+
+        response = self.client.get(self.url, {"search": "python"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(as_dict(response.data["categories"]), {"Backend": 1})
+        self.assertEqual(as_dict(response.data["tags"]), {"python": 1, "web": 1})
+
+        response = self.client.get(self.url, {"tag": "web", "search": "post"})
+        self.assertEqual(as_dict(response.data["categories"]), {"Backend": 2, "Frontend": 1})
+
+    def test_rebuild_facets(self):
+        """
+        Should recount the summary table from the posts
+        """
+
+        PostFacet.objects.all().delete()
+        call_command('rebuild_facets', stdout=io.StringIO())
+
+        response = self.client.get(self.url)
+        self.assertEqual(as_dict(response.data["categories"]), {"Backend": 2, "Frontend": 1})
+        self.assertEqual(as_dict(response.data["tags"]), {"web": 3, "python": 1, "rust": 1})
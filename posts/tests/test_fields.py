@@ -0,0 +1,77 @@
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.models import Post
+from posts.utils.cache import get_cache
+
+
+class PostSparseFieldsTest(APITestCase):
+
+    def setUp(self):
+
+        get_cache().clear()
+
+        self.post = Post.objects.create(
+            title = "Sparse title",
+            content = "A very long content " * 100,
+            category = "Fields",
+            tags = ["sparse"]
+        )
+
+        self.url = reverse('post-list')
+
+    def test_list_posts_fields(self):
+        """
+        Should return only the requested fields and not read the other columns
+        """
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {"fields": "title,id"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(response.data[0]), ["id", "title"])
+
+        # The content column is not selected
+        self.assertNotIn('"content"', queries[-1]["sql"])
+
+    def test_list_posts_compact_view(self):
+        """
+        Should leave the content out in the compact view
+        """
+
+        response = self.client.get(self.url, {"view": "compact"})
+        self.assertNotIn("content", response.data[0])
+        self.assertEqual(response.data[0]["tags"], ["sparse"])
+
+    @override_settings(POSTS_LIST_DEFAULT_VIEW="compact")
+    def test_list_posts_default_view(self):
+        """
+        Should use the configured default view when no fields are requested
+        """
+
+        response = self.client.get(self.url)
+        self.assertNotIn("content", response.data[0])
+
+    def test_list_posts_unknown_field(self):
+        """
+        Should fail when an unknown field is requested
+        """
+
+        response = self.client.get(self.url, {"fields": "title,password"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_retrieve_post_fields(self):
+        """
+        Should return only the requested fields of a single post, with its own ETag
+        """
+
+        url = reverse('post-get', kwargs={'pk': self.post.pk})
+
+        full = self.client.get(url)
+        response = self.client.get(url, {"fields": "id,category"})
+
+        self.assertEqual(response.data, {"id": self.post.pk, "category": "Fields"})
+        self.assertNotEqual(response["ETag"], full["ETag"])
@@ -0,0 +1,169 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from posts.management.commands.import_posts import array_literal, read_csv, read_jsonl, validate_chunk
+from posts.models import Post, PostImport
+
+
+def write_file(directory, name, text):
+    """
+    Writes a file in a temporary directory and returns its path
+    """
+
+    path = os.path.join(directory, name)
+    with open(path, 'w', encoding='utf-8') as handle:
+        handle.write(text)
+    return path
+
+
+class ImportReadersTest(SimpleTestCase):
+
+    def test_read_jsonl(self):
+        """
+        Should parse each line and report the invalid ones, with the offset after each row
+        """
+
+        text = '{"title": "A"}\n\nnot json\n[1]\n'.encode()
+        rows = list(read_jsonl(io.BytesIO(text), 0))
+
+        self.assertEqual([item for _, item, _ in rows], [{"title": "A"}, None, None])
+        self.assertEqual(rows[-1][2], len(text))
+
+        # Resuming from an offset skips the rows before it
+        rows = list(read_jsonl(io.BytesIO(text), rows[0][2]))
+        self.assertEqual(len(rows), 2)
+
+    def test_read_csv(self):
+        """
+        Should read the header, multi-line values and tags written as JSON or comma separated
+        """
+
+        text = 'title,content,category,tags\nA,"two\nlines",Cat,"[""x"", ""y""]"\nB,Text,Cat,"x,y"\n'.encode()
+        rows = list(read_csv(io.BytesIO(text), 0))
+
+        self.assertEqual(rows[0][1], {"title": "A", "content": "two\nlines", "category": "Cat", "tags": ["x", "y"]})
+        self.assertEqual(rows[1][1]["tags"], ["x", "y"])
+
+        # Resuming after the first record keeps the header
+        rows = list(read_csv(io.BytesIO(text), rows[0][2]))
+        self.assertEqual([item["title"] for _, item, _ in rows], ["B"])
+
+    def test_validate_chunk(self):
+        """
+        Should build escaped COPY lines for the valid rows and report the others with their row number
+        """
+
+        chunk = [
+            (1, '{}', {"title": "Tab\tand\\", "content": "Two\nlines", "category": "Import", "tags": ["A"], "created_at": "2020-01-01T00:00:00Z"}),
+            (2, '{}', {"title": "", "content": "Content", "category": "Import"}),
+            (3, 'broken', None),
+        ]
+        lines, rejects = validate_chunk(chunk)
+
+        self.assertEqual(lines, ['Tab\\tand\\\\\tTwo\\nlines\tImport\t{"a"}\t2020-01-01T00:00:00+00:00\t2020-01-01T00:00:00+00:00\n'])
+        self.assertEqual([json.loads(reject)["row"] for reject in rejects], [2, 3])
+        self.assertIn("title", json.loads(rejects[0])["errors"])
+
+    def test_array_literal(self):
+        """
+        Should escape quotes and backslashes of the tags
+        """
+
+        self.assertEqual(array_literal([]), '{}')
+        self.assertEqual(array_literal(['a b', 'say "hi"', 'back\\slash']), '{"a b","say \\"hi\\"","back\\\\slash"}')
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'COPY needs PostgreSQL.')
+class ImportPostsCommandTest(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def test_import_jsonl(self):
+        """
+        Should import the valid rows, keep their dates and write the rejected ones to a file
+        """
+
+        rows = [
+            {"title": "First", "content": "Content", "category": "Import", "tags": [" Python ", "python"], "created_at": "2020-01-01T00:00:00Z"},
+            {"title": "", "content": "Content", "category": "Import"},
+            {"title": "Second", "content": "Content", "category": "Import"},
+        ]
+        path = write_file(self.directory, 'posts.jsonl', ''.join(json.dumps(row) + '\n' for row in rows) + 'broken\n')
+
+        call_command('import_posts', path, batch=2, workers=2, stdout=io.StringIO())
+
+        posts = Post.objects.order_by('created_at')
+        self.assertEqual([post.title for post in posts], ["First", "Second"])
+        self.assertEqual(posts[0].tags, ["python"])
+        self.assertEqual(posts[0].created_at.year, 2020)
+
+        with open(f'{path}.rejects.jsonl') as handle:
+            rejects = [json.loads(line) for line in handle]
+        self.assertEqual([reject["row"] for reject in rejects], [2, 4])
+        self.assertIn("title", rejects[0]["errors"])
+
+        # A finished import leaves no checkpoint
+        self.assertFalse(os.path.exists(f'{path}.checkpoint'))
+
+    def test_resume_import(self):
+        """
+        Should continue from the checkpoint of an interrupted import
+        """
+
+        path = write_file(self.directory, 'posts.csv', 'title,content,category\nOne,Text,Import\nTwo,Text,Import\n')
+        first_line = len('title,content,category\nOne,Text,Import\n')
+
+        # The first row was imported before the interruption
+        Post.objects.create(title="One", content="Text", category="Import")
+        write_file(self.directory, 'posts.csv.checkpoint', json.dumps(
+            {"position": first_line, "rows": 1, "imported": 1, "rejected": 0, "indexes": []}
+            ))
+
+        call_command('import_posts', path, resume=True, workers=1, stdout=io.StringIO())
+
+        self.assertEqual(sorted(Post.objects.values_list('title', flat=True)), ["One", "Two"])
+
+    def test_resume_after_commit(self):
+        """
+        Should continue from the progress committed with the rows, even if the checkpoint file is behind it
+        """
+
+        path = write_file(self.directory, 'posts.csv', 'title,content,category\nOne,Text,Import\nTwo,Text,Import\n')
+        first_line = len('title,content,category\nOne,Text,Import\n')
+
+        # Interrupted right after the commit of the first row, before anything else was saved
+        Post.objects.create(title="One", content="Text", category="Import")
+        PostImport.objects.create(source=os.path.abspath(path), position=first_line, rows=1, imported=1)
+        write_file(self.directory, 'posts.csv.checkpoint', json.dumps(
+            {"position": 0, "rows": 0, "imported": 0, "rejected": 0, "indexes": []}
+            ))
+
+        call_command('import_posts', path, resume=True, workers=1, stdout=io.StringIO())
+
+        self.assertEqual(sorted(Post.objects.values_list('title', flat=True)), ["One", "Two"])
+        self.assertFalse(PostImport.objects.exists())
+
+    def test_drop_and_rebuild_indexes(self):
+        """
+        Should rebuild the secondary indexes it dropped
+        """
+
+        path = write_file(self.directory, 'posts.jsonl', json.dumps({"title": "A", "content": "B", "category": "C"}) + '\n')
+
+        with connection.cursor() as cursor:
+            indexes = {name for name, index in connection.introspection.get_constraints(cursor, 'posts_post').items() if index['index']}
+
+        call_command('import_posts', path, drop_indexes=True, workers=1, stdout=io.StringIO())
+
+        with connection.cursor() as cursor:
+            rebuilt = {name for name, index in connection.introspection.get_constraints(cursor, 'posts_post').items() if index['index']}
+
+        self.assertEqual(indexes, rebuilt)
+        self.assertEqual(Post.objects.count(), 1)
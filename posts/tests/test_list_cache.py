@@ -0,0 +1,213 @@
+import itertools
+import unittest
+from unittest import mock
+
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase, APITransactionTestCase
+from rest_framework import status
+from posts.models import Post
+from posts.utils.cache import get_generation
+from posts.utils.list_cache import ListCache, get_list_cache
+
+
+class PostListCacheTest(APITestCase):
+
+    def setUp(self):
+
+        # Start every test with an empty cache
+        get_list_cache().clear()
+
+        self.posts = [
+            Post.objects.create(title=f"Listed {number}", content="Content", category="Lists")
+            for number in range(3)
+        ]
+
+        self.url = reverse('post-list')
+
+    def test_list_from_cache(self):
+        """
+        Should read an identical list from the database only once
+        """
+
+        first = self.client.get(self.url, {"limit": 2})
+
+        # Only the generation, from the database
+        with self.assertNumQueries(1):
+            second = self.client.get(self.url, {"limit": 2})
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(first["Link"], second["Link"])
+        self.assertEqual(first["ETag"], second["ETag"])
+
+    def test_list_params_normalized(self):
+        """
+        Should serve the same params in another order from the same entry
+        """
+
+        self.client.get(self.url + "?limit=2&view=compact")
+
+        with self.assertNumQueries(1):
+            self.client.get(self.url + "?view=compact&limit=2")
+
+    def test_list_not_modified_from_cache(self):
+        """
+        Should answer a conditional request on a cached list without reading the posts
+        """
+
+        etag = self.client.get(self.url)["ETag"]
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_writes_bump_generation(self):
+        """
+        Should show the new list after a create, an update or a delete
+        """
+
+        self.client.get(self.url)
+
+        self.client.post(reverse('post-create'), {"title": "Created", "content": "Content", "category": "Lists"}, format='json')
+        self.assertEqual(self.client.get(self.url).data[0]["title"], "Created")
+
+        self.client.patch(reverse('post-update', kwargs={'pk': self.posts[2].pk}), {"title": "Updated"}, format='json')
+        self.assertIn("Updated", [post["title"] for post in self.client.get(self.url).data])
+
+        self.client.delete(reverse('post-delete', kwargs={'pk': self.posts[0].pk}))
+        self.assertNotIn(self.posts[0].pk, [post["id"] for post in self.client.get(self.url).data])
+
+    def test_orm_write_bumps_generation(self):
+        """
+        Should outdate the lists after a write outside the API
+        """
+
+        generation = get_generation()
+        Post.objects.filter(pk=self.posts[0].pk).first().delete()
+
+        self.assertNotEqual(get_generation(), generation)
+
+    def test_sql_write_bumps_generation(self):
+        """
+        Should outdate the lists after a write that bypasses Django (another service, psql)
+        """
+
+        generation = get_generation()
+
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE posts_post SET title = 'Renamed' WHERE id = %s", [self.posts[1].pk])
+
+        self.assertNotEqual(get_generation(), generation)
+
+    def test_pinned_client_skips_cache(self):
+        """
+        Should read the list again for a client pinned to the primary after a write
+        """
+
+        self.client.get(self.url)
+        self.client.cookies["pin_primary"] = "9999999999"
+
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
+
+    def test_cached_list_read_with_generation(self):
+        """
+        Should build the cached list on the database its generation was read from
+        """
+
+        # The first read (the generation) picks the primary, a replica alias that does not exist fails the others
+        aliases = itertools.chain(['default'], itertools.repeat('replica_missing'))
+
+        with mock.patch('core.db_router.PrimaryReplicaRouter.db_for_read', side_effect=lambda *args, **kwargs: next(aliases)):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 3)
+
+    @override_settings(POSTS_LIST_CACHE_TIMEOUT=0)
+    def test_cache_disabled(self):
+        """
+        Should not cache anything when the timeout is 0
+        """
+
+        self.client.get(self.url)
+
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'The generation is bumped by a PostgreSQL trigger.')
+class ListGenerationCommitTest(APITransactionTestCase):
+
+    def test_generation_moves_on_commit(self):
+        """
+        Should outdate the lists when a write commits, not before: a list read in between would be cached as new
+        """
+
+        # Another worker, reading outside the transaction of the write
+        other = connections.create_connection(DEFAULT_DB_ALIAS)
+        self.addCleanup(other.close)
+
+        def read_generation():
+            with other.cursor() as cursor:
+                cursor.execute('SELECT coalesce(sum(value), 0) FROM posts_postgeneration')
+                return cursor.fetchone()[0]
+
+        generation = get_generation()
+
+        with transaction.atomic():
+            Post.objects.create(title="Pending", content="Content", category="Lists")
+            self.assertEqual(read_generation(), generation)
+
+        self.assertNotEqual(read_generation(), generation)
+
+
+class ListCacheStampedeTest(APITestCase):
+
+    def setUp(self):
+
+        get_list_cache().clear()
+
+        self.cache = ListCache(Request(APIRequestFactory().get('/posts/')))
+        self.build = mock.Mock(return_value=([], {}, ('"etag"', None)))
+
+    def test_wait_for_other_request(self):
+        """
+        Should use the entry computed by the request holding the lock instead of computing it again
+        """
+
+        get_list_cache().add(f"{self.cache.key}:lock", 1)
+        entry = ([{"id": 1}], {}, ('"other"', None))
+
+        # The other request finishes while this one waits
+        with mock.patch('posts.utils.list_cache.time.sleep', side_effect=lambda _: self.cache.set(entry)):
+            self.assertEqual(self.cache.get_or_build(self.build), entry)
+
+        self.build.assert_not_called()
+
+    @override_settings(POSTS_LIST_CACHE_LOCK_TIMEOUT=0)
+    def test_lock_timeout(self):
+        """
+        Should compute the entry itself when the lock is held for too long
+        """
+
+        get_list_cache().add(f"{self.cache.key}:lock", 1)
+
+        with mock.patch('posts.utils.list_cache.time.sleep'):
+            self.assertEqual(self.cache.get_or_build(self.build), self.build.return_value)
+
+        self.build.assert_called_once()
+
+    def test_lock_released(self):
+        """
+        Should cache the entry and release the lock after computing it
+        """
+
+        self.cache.get_or_build(self.build)
+
+        self.assertEqual(self.cache.get(), self.build.return_value)
+        self.assertIsNone(get_list_cache().get(f"{self.cache.key}:lock"))
@@ -0,0 +1,111 @@
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework import status
+from posts.models import Post
+from posts.utils.cache import get_cache
+
+
+class PostManyViewTest(APITestCase):
+
+    def setUp(self):
+
+        # Start every test with an empty cache
+        get_cache().clear()
+
+        self.posts = [
+            Post.objects.create(title=f"Many {number}", content="Content", category="Many")
+            for number in range(3)
+        ]
+
+        self.url = reverse('post-many')
+
+    def test_many_in_request_order(self):
+        """
+        Should return the posts in the order of the IDs, with a single query
+        """
+
+        ids = [self.posts[2].pk, self.posts[0].pk, self.posts[1].pk]
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {"ids": ",".join(map(str, ids))})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([post["id"] for post in response.data["results"]], ids)
+        self.assertEqual(response.data["missing"], [])
+
+    def test_many_missing(self):
+        """
+        Should report the IDs of the posts that do not exist
+        """
+
+        response = self.client.get(self.url, {"ids": f"{self.posts[0].pk},9999"})
+
+        self.assertEqual([post["id"] for post in response.data["results"]], [self.posts[0].pk])
+        self.assertEqual(response.data["missing"], [9999])
+
+    def test_many_from_cache(self):
+        """
+        Should only query the posts the cache does not have
+        """
+
+        self.client.get(reverse('post-get', kwargs={'pk': self.posts[0].pk}))
+        ids = f"{self.posts[0].pk},{self.posts[1].pk},9999"
+
+        with self.assertNumQueries(1):
+            self.client.get(self.url, {"ids": ids})
+
+        # Everything is cached now, including the missing post
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, {"ids": ids})
+
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertEqual(response.data["missing"], [9999])
+
+    def test_many_fields(self):
+        """
+        Should only return the requested fields
+        """
+
+        response = self.client.get(self.url, {"ids": str(self.posts[0].pk), "fields": "id,title"})
+        self.assertEqual(response.data["results"], [{"id": self.posts[0].pk, "title": "Many 0"}])
+
+    def test_many_post_body(self):
+        """
+        Should read the IDs from the body of a POST, without pinning the client to the primary
+        """
+
+        response = self.client.post(self.url, {"ids": [self.posts[1].pk, self.posts[1].pk]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([post["id"] for post in response.data["results"]], [self.posts[1].pk])
+        self.assertNotIn("pin_primary", response.cookies)
+
+    def test_many_invalid_ids(self):
+        """
+        Should fail when the IDs are missing or not integers
+        """
+
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {"ids": "1,abc"}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.post(self.url, {"ids": "1"}, format='json').status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_many_out_of_range_ids(self):
+        """
+        Should refuse IDs that are not ASCII digits or do not fit a bigint, in the query and in the body
+        """
+
+        for ids in ("1,\u00b2", "\u0661", "0", str(2 ** 63), "9" * 5000):
+            self.assertEqual(self.client.get(self.url, {"ids": ids}).status_code, status.HTTP_400_BAD_REQUEST, ids[:20])
+
+        for ids in ([0], [-1], [2 ** 63]):
+            self.assertEqual(self.client.post(self.url, {"ids": ids}, format='json').status_code, status.HTTP_400_BAD_REQUEST, ids)
+
+    @override_settings(POSTS_MANY_MAX_IDS=2)
+    def test_many_too_many_ids(self):
+        """
+        Should refuse more IDs than the configured maximum
+        """
+
+        response = self.client.get(self.url, {"ids": "1,2,3"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
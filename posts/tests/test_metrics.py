@@ -0,0 +1,132 @@
+import re
+
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from core.metrics import Histogram, registry
+from posts.models import Post
+
+
+def get_timing(response, phase):
+    """
+    Returns the duration and description of a phase of the Server-Timing header
+    """
+
+    match = re.search(r'%s;dur=([\d.]+)(?:;desc="([^"]*)")?' % phase, response['Server-Timing'])
+    return float(match.group(1)), match.group(2)
+
+
+class MetricsMiddlewareTest(APITestCase):
+
+    def setUp(self):
+
+        registry.clear()
+
+        Post.objects.create(
+            title = "Timed title",
+            content = "Timed content",
+            category = "Metrics"
+        )
+
+    # The list cache would add the query of its generation
+    @override_settings(POSTS_LIST_CACHE_TIMEOUT=0)
+    def test_server_timing_header(self):
+        """
+        Should send the time of each phase and the number of queries
+        """
+
+        response = self.client.get(reverse('post-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        _, description = get_timing(response, "db")
+        self.assertEqual(description, "1 queries")
+
+        # The list is serialized and rendered, and the total includes everything
+        total, _ = get_timing(response, "total")
+        for phase in ("db", "serialize", "render"):
+            duration, _ = get_timing(response, phase)
+            self.assertGreater(duration, 0)
+            self.assertLessEqual(duration, total)
+
+    @override_settings(POSTS_SERVER_TIMING=False)
+    def test_server_timing_disabled(self):
+        """
+        Should not send the header when it is disabled
+        """
+
+        response = self.client.get(reverse('post-list'))
+        self.assertNotIn("Server-Timing", response)
+
+    @override_settings(POSTS_METRICS_TOKEN="secret")
+    def test_metrics_endpoint(self):
+        """
+        Should aggregate the requests by route pattern, not by path
+        """
+
+        post = Post.objects.get()
+        self.client.get(reverse('post-get', kwargs={'pk': post.pk}))
+        self.client.get(reverse('post-get', kwargs={'pk': post.pk + 1}))
+
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith("text/plain"))
+
+        text = response.content.decode()
+        self.assertIn('http_requests_total{method="GET",route="post/<int:pk>/",status="200"} 1', text)
+        self.assertIn('http_requests_total{method="GET",route="post/<int:pk>/",status="404"} 1', text)
+        self.assertIn('http_request_duration_seconds_count{method="GET",route="post/<int:pk>/"} 2', text)
+        self.assertIn('http_request_phase_seconds_bucket{method="GET",route="post/<int:pk>/",phase="db",le="+Inf"} 2', text)
+
+    def test_metrics_endpoint_token(self):
+        """
+        Should not serve the metrics without a configured token, nor without the right one
+        """
+
+        with override_settings(POSTS_METRICS_TOKEN=""):
+            response = self.client.get(reverse('metrics'))
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        with override_settings(POSTS_METRICS_TOKEN="secret"):
+            for header in ({}, {"HTTP_AUTHORIZATION": "Bearer wrong"}, {"HTTP_AUTHORIZATION": "Bearer sécret"}):
+                response = self.client.get(reverse('metrics'), **header)
+                self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+                self.assertNotIn(b"http_requests_total", response.content)
+
+    @override_settings(POSTS_SLOW_QUERY_MS=0.000001, POSTS_SLOW_QUERY_SAMPLE_RATE=1.0, POSTS_LIST_CACHE_TIMEOUT=0)
+    def test_slow_query_log(self):
+        """
+        Should log the slow reads with their plan when enabled
+        """
+
+        with self.assertLogs('core.metrics', level='WARNING') as logs:
+            response = self.client.get(reverse('post-list'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn("posts_post", logs.records[0].sql)
+        self.assertTrue(logs.records[0].plan)
+
+    def test_slow_query_log_disabled(self):
+        """
+        Should not log anything by default
+        """
+
+        with self.assertNoLogs('core.metrics'):
+            self.client.get(reverse('post-list'))
+
+
+class HistogramTest(SimpleTestCase):
+
+    def test_cumulative_buckets(self):
+        """
+        Should count each observation in its bucket and every larger one
+        """
+
+        histogram = Histogram((1, 5))
+        for value in (0.5, 1, 3, 10):
+            histogram.observe(value)
+
+        self.assertEqual(list(histogram.samples()), [(1, 2), (5, 3), ('+Inf', 4)])
+        self.assertEqual(histogram.sum, 14.5)
+        self.assertEqual(histogram.count, 4)
@@ -0,0 +1,204 @@
+import re
+
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.urls import reverse
+from posts.models import Post
+
+
+def get_link(response, rel):
+    """
+    Extracts the URL of a relation from the Link header
+    """
+
+    match = re.search(r'<([^>]+)>; rel="%s"' % rel, response.get('Link', ''))
+    return match.group(1) if match else None
+
+
+class PostListPaginationTest(APITestCase):
+
+    def setUp(self):
+
+        # Create five posts, the newest one is listed first
+        self.posts = [
+            Post.objects.create(
+                title = f"Title {number}",
+                content = f"Content {number}",
+                category = "Pagination"
+            )
+            for number in range(5)
+        ]
+
+        self.url = reverse('post-list')
+
+    def test_list_posts_limit(self):
+        """
+        Should return only `limit` posts and a link to the next page
+        """
+
+        response = self.client.get(self.url, {"limit": 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        titles = [post["title"] for post in response.data]
+        self.assertEqual(titles, ["Title 4", "Title 3"])
+
+        # The first page has no previous page
+        self.assertIsNotNone(get_link(response, "next"))
+        self.assertIsNone(get_link(response, "prev"))
+
+    def test_list_posts_follow_cursors(self):
+        """
+        Should walk forward through every post without repeating any, and back again
+        """
+
+        response = self.client.get(self.url, {"limit": 2})
+        seen = [post["id"] for post in response.data]
+
+        while get_link(response, "next"):
+            response = self.client.get(get_link(response, "next"))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen += [post["id"] for post in response.data]
+
+        # Verify that all posts were returned newest first
+        self.assertEqual(seen, [post.id for post in reversed(self.posts)])
+
+        # The previous page of the last one is the second page
+        response = self.client.get(get_link(response, "prev"))
+        self.assertEqual([post["title"] for post in response.data], ["Title 2", "Title 1"])
+
+    def test_list_posts_invalid_cursor(self):
+        """
+        Should fail when the cursor was not generated by the API
+        """
+
+        response = self.client.get(self.url, {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_list_posts_count(self):
+        """
+        Should only count the posts when asked to
+        """
+
+        response = self.client.get(self.url, {"limit": 2})
+        self.assertNotIn("X-Total-Count", response)
+
+        response = self.client.get(self.url, {"limit": 2, "count": "exact"})
+        self.assertEqual(response["X-Total-Count"], "5")
+
+        # The estimate comes from the planner, it only has to be a number
+        response = self.client.get(self.url, {"limit": 2, "count": "estimate"})
+        self.assertTrue(response["X-Total-Count"].isdigit())
+
+    def test_list_posts_search_paginated(self):
+        """
+        Should paginate the search results too
+        """
+
+        response = self.client.get(self.url, {"search": "Content", "limit": 3})
+        self.assertEqual(len(response.data), 3)
+        self.assertIsNotNone(get_link(response, "next"))
+
+
+class PostCategoryOrderingTest(APITestCase):
+
+    def setUp(self):
+
+        # Titles in another order than the creation order
+        self.posts = [
+            Post.objects.create(title = title, content = "Content", category = category)
+            for title, category in [
+                ("Banana", "Fruit"),
+                ("Apple", "Fruit"),
+                ("Carrot", "Vegetable"),
+                ("Date", "Fruit"),
+                ("Eggplant", "Dried Fruit"),
+            ]
+        ]
+
+        self.url = reverse('post-list')
+
+    def titles(self, params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [post["title"] for post in response.data]
+
+    def test_filter_category_exact(self):
+        """
+        Should only return the posts of the category, not those containing it
+        """
+
+        self.assertEqual(self.titles({"category": "Fruit"}), ["Date", "Apple", "Banana"])
+
+    def test_filter_many_categories(self):
+        """
+        Should return the posts of any of the categories
+        """
+
+        self.assertEqual(self.titles({"category": ["Vegetable", "Dried Fruit"]}), ["Eggplant", "Carrot"])
+
+    def test_filter_category_normalized(self):
+        """
+        Should normalize the filter value like the stored categories
+        """
+
+        self.assertEqual(self.titles({"category": "  Dried   Fruit "}), ["Eggplant"])
+
+    def test_category_normalized_on_write(self):
+        """
+        Should store the category trimmed with single spaces, keeping its case
+        """
+
+        response = self.client.post(reverse('post-create'), {"title": "New", "content": "Content", "category": " Dried \t Fruit "}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["category"], "Dried Fruit")
+
+        self.assertEqual(self.titles({"category": "Dried Fruit"}), ["New", "Eggplant"])
+
+    def test_ordering_title(self):
+        """
+        Should order by title in both directions
+        """
+
+        self.assertEqual(self.titles({"ordering": "title"}), ["Apple", "Banana", "Carrot", "Date", "Eggplant"])
+        self.assertEqual(self.titles({"ordering": "-title", "category": "Fruit"}), ["Date", "Banana", "Apple"])
+
+    def test_ordering_created_at(self):
+        """
+        Should list the oldest posts first
+        """
+
+        self.assertEqual(self.titles({"ordering": "created_at"}), ["Banana", "Apple", "Carrot", "Date", "Eggplant"])
+
+    def test_ordering_update_at(self):
+        """
+        Should list the last modified posts first
+        """
+
+        self.client.patch(reverse('post-update', kwargs={'pk': self.posts[0].pk}), {"title": "Banana split"}, format='json')
+        self.assertEqual(self.titles({"ordering": "-update_at"})[0], "Banana split")
+
+    def test_ordering_follow_cursors(self):
+        """
+        Should walk through the pages of another ordering without repeating any post, and back again
+        """
+
+        response = self.client.get(self.url, {"ordering": "title", "limit": 2})
+        seen = [post["title"] for post in response.data]
+
+        while get_link(response, "next"):
+            response = self.client.get(get_link(response, "next"))
+            seen += [post["title"] for post in response.data]
+
+        self.assertEqual(seen, ["Apple", "Banana", "Carrot", "Date", "Eggplant"])
+
+        response = self.client.get(get_link(response, "prev"))
+        self.assertEqual([post["title"] for post in response.data], ["Carrot", "Date"])
+
+    def test_ordering_invalid(self):
+        """
+        Should reject an ordering that is not indexed
+        """
+
+        response = self.client.get(self.url, {"ordering": "content"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("ordering", response.data)
@@ -0,0 +1,147 @@
+import datetime
+import io
+import unittest
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework import status
+from posts.models import Post, PostFacet, PostTombstone
+from posts.utils.cache import get_generation
+from posts.utils.partitions import DEFAULT_PARTITION, add_months, archive_name, get_partitions, is_partitioned, month_start, partition_name
+
+UTC = datetime.timezone.utc
+
+
+class PartitionMonthsTest(SimpleTestCase):
+
+    def test_month_start(self):
+        """
+        Should return the first instant of the month in UTC
+        """
+
+        value = datetime.datetime(2026, 3, 1, 0, 30, tzinfo=datetime.timezone(datetime.timedelta(hours=2)))
+        self.assertEqual(month_start(value), datetime.datetime(2026, 2, 1, tzinfo=UTC))
+
+    def test_add_months(self):
+        """
+        Should move across years in both directions
+        """
+
+        start = datetime.datetime(2026, 11, 1, tzinfo=UTC)
+
+        self.assertEqual(add_months(start, 2), datetime.datetime(2027, 1, 1, tzinfo=UTC))
+        self.assertEqual(add_months(start, -11), datetime.datetime(2025, 12, 1, tzinfo=UTC))
+
+    def test_names(self):
+        """
+        Should name the partitions and the archives after their month
+        """
+
+        start = datetime.datetime(2026, 1, 1, tzinfo=UTC)
+
+        self.assertEqual(partition_name(start), "posts_post_p2026_01")
+        self.assertEqual(archive_name(start), "posts_post_archive_2026_01")
+
+
+@unittest.skipIf(connection.vendor == 'postgresql', 'Checks the refusal on other databases.')
+class PartitionCommandOtherDatabaseTest(SimpleTestCase):
+
+    def test_needs_postgresql(self):
+        """
+        Should refuse to run without PostgreSQL
+        """
+
+        with self.assertRaises(CommandError):
+            call_command('partition_posts', stdout=io.StringIO())
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Declarative partitioning needs PostgreSQL.')
+class PartitionPostsTest(APITestCase):
+
+    def setUp(self):
+
+        self.now = datetime.datetime.now(UTC)
+        self.old_month = add_months(month_start(self.now), -24)
+
+        self.recent = Post.objects.create(title="Recent", content="Content", category="Partitions", tags=["recent"])
+        self.old = Post.objects.create(title="Old", content="Content", category="Partitions", tags=["old"])
+
+        # created_at is set on insert only, move the old post two years back
+        Post.objects.filter(pk=self.old.pk).update(created_at=self.old_month + datetime.timedelta(days=3))
+
+    def test_convert(self):
+        """
+        Should keep the posts, the API and the triggers working on the partitioned table
+        """
+
+        call_command('partition_posts', '--convert', '--months-ahead', '2', stdout=io.StringIO())
+
+        self.assertTrue(is_partitioned())
+        self.assertIn(self.old_month, get_partitions())
+        self.assertIn(add_months(month_start(self.now), 2), get_partitions())
+
+        response = self.client.get(reverse('post-list'))
+        self.assertEqual([post["id"] for post in response.data], [self.recent.pk, self.old.pk])
+        self.assertEqual(self.client.get(reverse('post-get', kwargs={'pk': self.old.pk})).status_code, status.HTTP_200_OK)
+
+        # The sequence continues and the search vector trigger still runs
+        created = Post.objects.create(title="Partitioned python", content="Content", category="Partitions")
+        self.assertGreater(created.pk, self.old.pk)
+        self.assertEqual(Post.objects.filter(pk=created.pk).exclude(search_vector=None).count(), 1)
+
+    def test_create_month_with_posts_in_default(self):
+        """
+        Should create a month whose posts were already in the default partition, and move them there
+        """
+
+        call_command('partition_posts', '--convert', '--months-ahead', '0', stdout=io.StringIO())
+
+        # Dated two months ahead, before that month has a partition
+        ahead = add_months(month_start(self.now), 2)
+        Post.objects.filter(pk=self.recent.pk).update(created_at=ahead + datetime.timedelta(days=1))
+        facets = list(PostFacet.objects.order_by('kind', 'value').values_list('kind', 'value', 'count'))
+
+        call_command('partition_posts', '--months-ahead', '2', stdout=io.StringIO())
+
+        self.assertIn(ahead, get_partitions())
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT tableoid::regclass::text FROM posts_post WHERE id = %s', [self.recent.pk])
+            self.assertEqual(cursor.fetchone()[0], partition_name(ahead))
+            cursor.execute(f'SELECT count(*) FROM {DEFAULT_PARTITION}')
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+        # Moved, not deleted nor created again
+        self.assertEqual(list(PostFacet.objects.order_by('kind', 'value').values_list('kind', 'value', 'count')), facets)
+        self.assertFalse(PostTombstone.objects.exists())
+        self.assertEqual(self.client.get(reverse('post-get', kwargs={'pk': self.recent.pk})).status_code, status.HTTP_200_OK)
+
+    def test_archive(self):
+        """
+        Should detach the old months, their posts leave the API like deleted ones
+        """
+
+        call_command('partition_posts', '--convert', stdout=io.StringIO())
+
+        generation = get_generation()
+        call_command('partition_posts', '--archive-before', f'{add_months(self.old_month, 1):%Y-%m}', stdout=io.StringIO())
+
+        # The detach fires no trigger, the cached lists are outdated all the same
+        self.assertNotEqual(get_generation(), generation)
+
+        self.assertNotIn(self.old_month, get_partitions())
+        self.assertEqual(list(Post.objects.values_list('pk', flat=True)), [self.recent.pk])
+
+        self.assertTrue(PostTombstone.objects.filter(post_id=self.old.pk).exists())
+        self.assertEqual(PostFacet.objects.get(kind=PostFacet.TAG, value="old").count, 0)
+        self.assertEqual(PostFacet.objects.get(kind=PostFacet.CATEGORY, value="Partitions").count, 1)
+
+    def test_not_converted(self):
+        """
+        Should ask for --convert before maintaining the partitions
+        """
+
+        with self.assertRaises(CommandError):
+            call_command('partition_posts', stdout=io.StringIO())
@@ -0,0 +1,76 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from django.urls import reverse
+from posts.models import Post
+from posts.renderers import FastJSONRenderer
+from posts.serializers import PostSerializer
+from posts.utils.cache import get_cache
+
+
+class PostFastReadPathTest(APITestCase):
+
+    def setUp(self):
+
+        get_cache().clear()
+
+        # Values that exercise the JSON escaping and the unicode handling
+        self.post = Post.objects.create(
+            title = 'Quotes " and \\ backslashes',
+            content = "Line\nbreaks\ttabs, café ☕, separators \u2028 \u2029 and \x01",
+            category = "Unicode ñ",
+            tags = ["emoji \U0001F600", "plain"]
+        )
+
+        self.post1 = Post.objects.create(
+            title = "Plain title",
+            content = "Plain content",
+            category = "Plain"
+        )
+
+    def expected(self, data):
+        """
+        Renders data the way the ModelSerializer + JSONRenderer path does
+        """
+
+        return JSONRenderer().render(data)
+
+    def test_list_parity(self):
+        """
+        Should render the list byte for byte like PostSerializer and JSONRenderer
+        """
+
+        posts = Post.objects.order_by('-created_at', '-id')
+
+        response = self.client.get(reverse('post-list'))
+        self.assertEqual(response.content, self.expected(PostSerializer(posts, many=True).data))
+
+    def test_list_fields_parity(self):
+        """
+        Should render a sparse list byte for byte like PostSerializer with the same fields
+        """
+
+        posts = Post.objects.order_by('-created_at', '-id')
+        fields = ['id', 'tags', 'update_at']
+
+        response = self.client.get(reverse('post-list'), {"fields": "update_at,tags,id"})
+        self.assertEqual(response.content, self.expected(PostSerializer(posts, many=True, fields=fields).data))
+
+    def test_detail_parity(self):
+        """
+        Should render a single post byte for byte like PostSerializer, cached or not
+        """
+
+        url = reverse('post-get', kwargs={'pk': self.post.pk})
+        expected = self.expected(PostSerializer(self.post).data)
+
+        # Once from the database and once from the cache
+        self.assertEqual(self.client.get(url).content, expected)
+        self.assertEqual(self.client.get(url).content, expected)
+
+    def test_renderer_parity(self):
+        """
+        Should produce the same bytes as JSONRenderer for plain data
+        """
+
+        data = {"text": "a b\"c\\", "numbers": [1, 2.5, -3], "empty": None, "flag": True, "nested": {"k": []}}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
@@ -0,0 +1,62 @@
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.urls import reverse
+from posts.models import Post
+
+
+class PostSearchTest(APITestCase):
+
+    def setUp(self):
+
+        self.in_title = Post.objects.create(
+            title = "Django performance tips",
+            content = "Some content",
+            category = "Backend"
+        )
+
+        self.in_content = Post.objects.create(
+            title = "Weekly notes",
+            content = "This week I tuned the performance of a Django project",
+            category = "Notes"
+        )
+
+        self.unrelated = Post.objects.create(
+            title = "Gardening",
+            content = "Tomatoes and peppers",
+            category = "Hobbies"
+        )
+
+        self.url = reverse('post-list')
+
+    def test_search_orders_by_rank(self):
+        """
+        Should return the posts matching in the title before the ones matching in the content
+        """
+
+        response = self.client.get(self.url, {"search": "django performance"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        ids = [post["id"] for post in response.data]
+        self.assertEqual(ids, [self.in_title.id, self.in_content.id])
+
+    def test_search_websearch_syntax(self):
+        """
+        Should understand the web search syntax (quotes, OR, exclusion)
+        """
+
+        response = self.client.get(self.url, {"search": "django -weekly"})
+        ids = [post["id"] for post in response.data]
+        self.assertEqual(ids, [self.in_title.id])
+
+        response = self.client.get(self.url, {"search": "tomatoes or tips"})
+        ids = [post["id"] for post in response.data]
+        self.assertCountEqual(ids, [self.in_title.id, self.unrelated.id])
+
+    def test_search_partial_term(self):
+        """
+        Should find posts by a partial word of the title through the trigram fallback
+        """
+
+        response = self.client.get(self.url, {"search": "Gardenin"})
+        ids = [post["id"] for post in response.data]
+        self.assertEqual(ids, [self.unrelated.id])
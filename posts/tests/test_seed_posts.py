@@ -0,0 +1,65 @@
+import collections
+import io
+
+from django.core.management import call_command
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase
+from posts.management.commands.seed_posts import PostGenerator
+from posts.models import Post
+
+
+class PostGeneratorTest(SimpleTestCase):
+
+    def test_same_seed_same_posts(self):
+        """
+        Should generate the same posts for the same seed
+        """
+
+        first = list(PostGenerator(seed=1).posts(20))
+        second = list(PostGenerator(seed=1).posts(20))
+
+        # Only the timestamps depend on the current time
+        self.assertEqual([post[:4] for post in first], [post[:4] for post in second])
+        self.assertNotEqual([post[:4] for post in first], [post[:4] for post in PostGenerator(seed=2).posts(20)])
+
+    def test_zipf_categories(self):
+        """
+        Should make the first categories much more common than the last ones
+        """
+
+        generator = PostGenerator(seed=0, categories=20)
+        counts = collections.Counter(post[2] for post in generator.posts(2000))
+
+        self.assertGreater(counts[generator.categories[0]], 5 * counts[generator.categories[-1]])
+        self.assertLessEqual(len(counts), 20)
+
+    def test_valid_posts(self):
+        """
+        Should generate values the API accepts
+        """
+
+        generator = PostGenerator(seed=0, tags=10, days=30)
+
+        for title, content, category, tags, created_at, update_at in generator.posts(200):
+            self.assertTrue(0 < len(title) <= 100)
+            self.assertTrue(content)
+            self.assertEqual(tags, sorted(set(tags)))
+            self.assertTrue(set(tags) <= set(generator.tags))
+            self.assertLessEqual(created_at, update_at)
+            self.assertLessEqual(update_at, generator.now)
+
+
+class SeedPostsCommandTest(TestCase):
+
+    def test_seed_posts(self):
+        """
+        Should insert the requested number of posts, in batches
+        """
+
+        call_command('seed_posts', rows=45, batch=20, stdout=io.StringIO())
+
+        self.assertEqual(Post.objects.count(), 45)
+
+        # The generated timestamps are kept, not replaced by the time of the insert
+        self.assertFalse(Post.objects.filter(created_at__gt=F('update_at')).exists())
+        self.assertGreater(Post.objects.values('created_at').distinct().count(), 1)
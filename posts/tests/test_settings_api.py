@@ -0,0 +1,57 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+# Loads the API-only profile in a new interpreter (the settings of this one are already configured)
+PROFILE_SCRIPT = """
+import json
+import django
+from django.conf import settings
+from django.core.management import call_command
+from django.urls import Resolver404, resolve
+
+django.setup()
+call_command('check', fail_level='ERROR')
+
+try:
+    resolve('/admin/')
+    admin = True
+except Resolver404:
+    admin = False
+
+print(json.dumps({
+    'debug': settings.DEBUG,
+    'apps': settings.INSTALLED_APPS,
+    'middleware': settings.MIDDLEWARE,
+    'conn_max_age': settings.DATABASES['default']['CONN_MAX_AGE'],
+    'health_checks': settings.DATABASES['default']['CONN_HEALTH_CHECKS'],
+    'admin': admin,
+    'post_list': resolve('/posts/').url_name,
+}))
+"""
+
+
+class ApiSettingsTest(SimpleTestCase):
+
+    def test_api_profile(self):
+        """
+        Should pass the system checks without the unused apps, middleware and admin URLs
+        """
+
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'core.settings_api', 'SECRET_KEY': 'test', 'DEBUG': 'False'}
+        result = subprocess.run([sys.executable, '-c', PROFILE_SCRIPT], env=env, cwd=settings.BASE_DIR, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+        profile = json.loads(result.stdout.splitlines()[-1])
+
+        self.assertFalse(profile["debug"])
+        self.assertNotIn("django.contrib.admin", profile["apps"])
+        self.assertNotIn("django.contrib.sessions.middleware.SessionMiddleware", profile["middleware"])
+        self.assertGreater(profile["conn_max_age"], 0)
+        self.assertTrue(profile["health_checks"])
+        self.assertFalse(profile["admin"])
+        self.assertEqual(profile["post_list"], "post-list")
@@ -0,0 +1,77 @@
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.urls import reverse
+from posts.models import Post
+
+
+class PostTagFilterTest(APITestCase):
+
+    def setUp(self):
+
+        self.python = Post.objects.create(
+            title = "Python post",
+            content = "Some content",
+            category = "Backend",
+            tags = ["python", "web"]
+        )
+
+        self.rust = Post.objects.create(
+            title = "Rust post",
+            content = "Some content",
+            category = "Backend",
+            tags = ["rust", "web"]
+        )
+
+        self.untagged = Post.objects.create(
+            title = "Untagged post",
+            content = "Some content",
+            category = "Backend"
+        )
+
+        self.url = reverse('post-list')
+
+    def test_filter_any_tag(self):
+        """
+        Should return the posts having at least one of the tags
+        """
+
+        response = self.client.get(self.url, {"tag": "python,rust"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        ids = [post["id"] for post in response.data]
+        self.assertCountEqual(ids, [self.python.id, self.rust.id])
+
+    def test_filter_all_tags(self):
+        """
+        Should return only the posts having every tag, tags are matched normalized
+        """
+
+        response = self.client.get(self.url + "?tag=WEB&tag=%20python&tag_match=all")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        ids = [post["id"] for post in response.data]
+        self.assertEqual(ids, [self.python.id])
+
+    def test_filter_invalid_match(self):
+        """
+        Should fail when the match mode is unknown
+        """
+
+        response = self.client.get(self.url, {"tag": "web", "tag_match": "some"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_tags_normalized_on_create(self):
+        """
+        Should store the tags trimmed, lowercase and without duplicates
+        """
+
+        data = {
+            "title": "Tagged post",
+            "content": "Some content",
+            "category": "Backend",
+            "tags": ["  Django ", "django", "REST   framework"]
+        }
+
+        response = self.client.post(reverse('post-create'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["tags"], ["django", "rest framework"])
@@ -0,0 +1,208 @@
+import threading
+from unittest import mock
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework import status
+from core.load_shedding import LoadSheddingMiddleware, current_window, get_shedding_cache, in_flight_key
+from posts.models import Post
+from posts.throttling import TokenBucketThrottle, get_throttle_cache
+
+
+@override_settings(POSTS_THROTTLE_RATE=1, POSTS_THROTTLE_BURST=3, POSTS_THROTTLE_SEARCH_COST=2)
+class PostThrottleTest(APITestCase):
+
+    def setUp(self):
+
+        get_throttle_cache().clear()
+        self.addCleanup(get_throttle_cache().clear)
+
+        self.post = Post.objects.create(title="Throttled", content="Content", category="Limits")
+        self.url = reverse('post-get', kwargs={'pk': self.post.pk})
+
+    def test_throttle_burst(self):
+        """
+        Should accept a burst up to the bucket size, then answer 429 with Retry-After
+        """
+
+        for _ in range(3):
+            self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response["Retry-After"], "1")
+
+    def test_throttle_search_cost(self):
+        """
+        Should take more tokens for a search than for a read
+        """
+
+        url = reverse('post-list')
+
+        for _ in range(2):
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+        # One token is left, a search needs two
+        response = self.client.get(url, {"search": "throttled"})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        # A read still fits in what is left
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+    def test_throttle_per_route_and_client(self):
+        """
+        Should keep one bucket per route and per client address
+        """
+
+        for _ in range(3):
+            self.client.get(self.url)
+
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(self.client.get(reverse('post-list')).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(self.url, REMOTE_ADDR="10.0.0.2").status_code, status.HTTP_200_OK)
+
+    def test_throttle_ignores_forwarded_for(self):
+        """
+        Should not let a client pick another bucket with X-Forwarded-For when no proxy is trusted
+        """
+
+        for number in range(3):
+            self.client.get(self.url, HTTP_X_FORWARDED_FOR=f"10.0.1.{number}")
+
+        response = self.client.get(self.url, HTTP_X_FORWARDED_FOR="10.0.1.9")
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_throttle_behind_proxy(self):
+        """
+        Should key on the address added by the trusted proxy, not on the ones sent by the client
+        """
+
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}):
+            for _ in range(3):
+                self.client.get(self.url, HTTP_X_FORWARDED_FOR="1.2.3.4, 10.0.1.1")
+
+            # Same client behind the proxy, whatever it put first
+            response = self.client.get(self.url, HTTP_X_FORWARDED_FOR="5.6.7.8, 10.0.1.1")
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+            # Another client behind the same proxy
+            response = self.client.get(self.url, HTTP_X_FORWARDED_FOR="10.0.1.2")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_throttle_async_views(self):
+        """
+        Should throttle the async views the same way
+        """
+
+        url = reverse('async-post-get', kwargs={'pk': self.post.pk})
+
+        for _ in range(3):
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", response)
+
+    def test_throttle_async_views_thread(self):
+        """
+        Should not run the throttle of the async views in the thread shared by the ORM calls
+        """
+
+        threads = []
+        allow_request = TokenBucketThrottle.allow_request
+
+        def record_thread(throttle, request, view):
+            threads.append(threading.get_ident())
+            return allow_request(throttle, request, view)
+
+        with mock.patch.object(TokenBucketThrottle, 'allow_request', record_thread):
+            self.client.get(reverse('async-post-get', kwargs={'pk': self.post.pk}))
+
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], threading.get_ident())
+
+    @override_settings(POSTS_THROTTLE_RATE=0)
+    def test_throttle_disabled(self):
+        """
+        Should not throttle when the rate is 0
+        """
+
+        for _ in range(5):
+            self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+
+
+@override_settings(POSTS_MAX_IN_FLIGHT=2, POSTS_SHED_RETRY_AFTER=3)
+class LoadSheddingTest(APITestCase):
+
+    def setUp(self):
+
+        get_shedding_cache().clear()
+        self.addCleanup(get_shedding_cache().clear)
+
+        self.url = reverse('post-list')
+
+    def test_counts_requests_out(self):
+        """
+        Should serve requests below the limit and count them out once answered
+        """
+
+        for _ in range(3):
+            self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+
+        self.assertEqual(get_shedding_cache().get(in_flight_key(current_window())), 0)
+
+    def test_shed_when_overloaded(self):
+        """
+        Should answer 503 with Retry-After without running the view when too much is in flight
+        """
+
+        key = in_flight_key(current_window())
+        get_shedding_cache().set(key, 2)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response["Retry-After"], "3")
+        self.assertEqual(get_shedding_cache().get(key), 2)
+
+    def test_counts_previous_window(self):
+        """
+        Should count the requests of the previous window still in flight
+        """
+
+        get_shedding_cache().set(in_flight_key(current_window() - 1), 2)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    def test_counts_out_of_own_window(self):
+        """
+        Should count a request out of the window it started in, never below 0 in the next one
+        """
+
+        middleware = LoadSheddingMiddleware(lambda request: HttpResponse())
+        request = RequestFactory().get(self.url)
+
+        with mock.patch('core.load_shedding.current_window', return_value=10):
+            self.assertIsNone(middleware.enter(request))
+
+        # The request ends after the window changed
+        with mock.patch('core.load_shedding.current_window', return_value=11):
+            middleware.leave(request)
+
+        self.assertEqual(get_shedding_cache().get(in_flight_key(10)), 0)
+        self.assertIsNone(get_shedding_cache().get(in_flight_key(11)))
+
+    def test_exempt_routes(self):
+        """
+        Should still serve the routes that do not use the database
+        """
+
+        get_shedding_cache().set(in_flight_key(current_window()), 2)
+
+        response = self.client.get(reverse('post-autocomplete'), {"q": "zz"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
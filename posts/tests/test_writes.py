@@ -0,0 +1,217 @@
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.urls import reverse
+from django.utils.http import http_date
+from posts.models import Post
+from posts.utils.cache import get_cache
+from posts.utils.conditional import post_etag, post_version, version_datetime
+
+
+class PostSingleQueryWriteTest(APITestCase):
+
+    def setUp(self):
+
+        get_cache().clear()
+
+        self.post = Post.objects.create(
+            title = "Write title",
+            content = "Write content",
+            category = "Writes",
+            tags = ["sql"]
+        )
+
+        self.update_url = reverse('post-update', kwargs={'pk': self.post.pk})
+        self.delete_url = reverse('post-delete', kwargs={'pk': self.post.pk})
+        self.missing_update_url = reverse('post-update', kwargs={'pk': self.post.pk + 1000})
+        self.missing_delete_url = reverse('post-delete', kwargs={'pk': self.post.pk + 1000})
+
+    def test_patch_post_single_query(self):
+        """
+        Should update the post with a single query and return its new version
+        """
+
+        with self.assertNumQueries(1):
+            response = self.client.patch(self.update_url, {"title": "Patched"}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["title"], "Patched")
+        self.assertEqual(response.data["content"], "Write content")
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.title, "Patched")
+        self.assertEqual(response["ETag"], post_etag(self.post.pk, self.post.update_at))
+
+    def test_put_post_single_query(self):
+        """
+        Should replace the post with a single query, normalizing the data like the serializer
+        """
+
+        data = {"title": "Put", "content": "Put content", "category": "Other", "tags": [" SQL ", "sql", "Fast"]}
+
+        with self.assertNumQueries(1):
+            response = self.client.put(self.update_url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["tags"], ["sql", "fast"])
+        self.assertEqual(response.data["created_at"], self.client.get(reverse('post-get', kwargs={'pk': self.post.pk})).data["created_at"])
+
+    def test_update_post_invalid_no_query(self):
+        """
+        Should reject invalid data before touching the database
+        """
+
+        with self.assertNumQueries(0):
+            response = self.client.put(self.update_url, {"title": "Missing fields"}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_update_post_category_too_long(self):
+        """
+        Should reject a category longer than the indexed column allows
+        """
+
+        with self.assertNumQueries(0):
+            response = self.client.patch(self.update_url, {"category": "x" * 3000}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("category", response.data)
+
+    def test_update_post_not_found_single_query(self):
+        """
+        Should return 404 with a single query when the post does not exist
+        """
+
+        with self.assertNumQueries(1):
+            response = self.client.patch(self.missing_update_url, {"title": "Nobody"}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_update_post_if_match_current(self):
+        """
+        Should update the post when the If-Match ETag is the current one
+        """
+
+        etag = post_etag(self.post.pk, self.post.update_at)
+
+        with self.assertNumQueries(1):
+            response = self.client.patch(self.update_url, {"title": "Matched"}, format='json', HTTP_IF_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_update_post_if_match_stale(self):
+        """
+        Should return 412 and leave the post alone when it changed since the client read it
+        """
+
+        etag = post_etag(self.post.pk, self.post.update_at)
+        self.client.patch(self.update_url, {"title": "Someone else"}, format='json')
+
+        response = self.client.patch(self.update_url, {"title": "Lost update"}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.title, "Someone else")
+
+    def test_update_post_if_match_other_post(self):
+        """
+        Should not accept the ETag of another post, nor of a subset of the fields
+        """
+
+        other = Post.objects.create(title="Other", content="Other", category="Writes")
+
+        for etag in (post_etag(other.pk, other.update_at), post_etag(self.post.pk, self.post.update_at, ("id", "title"))):
+            response = self.client.patch(self.update_url, {"title": "Wrong"}, format='json', HTTP_IF_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+
+    def test_update_post_if_match_any(self):
+        """
+        Should update an existing post with `If-Match: *`, and return 412 for a missing one
+        """
+
+        response = self.client.patch(self.update_url, {"title": "Any"}, format='json', HTTP_IF_MATCH="*")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.patch(self.missing_update_url, {"title": "Any"}, format='json', HTTP_IF_MATCH="*")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_update_post_if_unmodified_since(self):
+        """
+        Should check If-Unmodified-Since with the precision of Last-Modified
+        """
+
+        modified = self.post.update_at.timestamp()
+
+        response = self.client.patch(self.update_url, {"title": "Too old"}, format='json', HTTP_IF_UNMODIFIED_SINCE=http_date(modified - 10))
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+
+        response = self.client.patch(self.update_url, {"title": "Fresh"}, format='json', HTTP_IF_UNMODIFIED_SINCE=http_date(modified))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_update_post_forgets_cached_copy(self):
+        """
+        Should not serve the cached version of the post after the update
+        """
+
+        url = reverse('post-get', kwargs={'pk': self.post.pk})
+        self.client.get(url)
+        self.client.patch(self.update_url, {"title": "Fresh title"}, format='json')
+
+        self.assertEqual(self.client.get(url).data["title"], "Fresh title")
+
+    def test_delete_post_single_query(self):
+        """
+        Should delete the post with a single query
+        """
+
+        with self.assertNumQueries(1):
+            response = self.client.delete(self.delete_url)
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Post.objects.filter(pk=self.post.pk).exists())
+
+    def test_delete_post_not_found_single_query(self):
+        """
+        Should return 404 with a single query when the post does not exist
+        """
+
+        with self.assertNumQueries(1):
+            response = self.client.delete(self.missing_delete_url)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_delete_post_if_match_stale(self):
+        """
+        Should keep the post when it changed since the client read it
+        """
+
+        etag = post_etag(self.post.pk, self.post.update_at)
+        self.client.patch(self.update_url, {"title": "Changed"}, format='json')
+
+        response = self.client.delete(self.delete_url, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertTrue(Post.objects.filter(pk=self.post.pk).exists())
+
+    def test_async_update_and_delete(self):
+        """
+        Should write through the async views the same way
+        """
+
+        etag = post_etag(self.post.pk, self.post.update_at)
+
+        response = self.client.patch(reverse('async-post-update', kwargs={'pk': self.post.pk}), {"title": "Async"}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["title"], "Async")
+
+        response = self.client.delete(reverse('async-post-delete', kwargs={'pk': self.post.pk}), HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+
+        response = self.client.delete(reverse('async-post-delete', kwargs={'pk': self.post.pk}))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_version_round_trip(self):
+        """
+        Should turn a version back into the exact modification date
+        """
+
+        self.assertEqual(version_datetime(post_version(self.post.update_at)), self.post.update_at)
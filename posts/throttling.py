@@ -0,0 +1,80 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+
+def get_throttle_cache():
+    """
+    Returns the cache backend holding the token buckets (shared by the workers with Redis/Memcached)
+    """
+
+    return caches[settings.POSTS_THROTTLE_CACHE_ALIAS]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token bucket per client and per route.
+
+    Each bucket holds up to POSTS_THROTTLE_BURST tokens and refills at
+    POSTS_THROTTLE_RATE tokens per second. A request takes one token, a
+    search takes POSTS_THROTTLE_SEARCH_COST of them as it costs the database
+    much more than a read by ID. A request that finds too few tokens gets a
+    429 with the seconds to wait in `Retry-After`.
+
+    Like DRF's throttles, the bucket is read and written without a lock, so
+    concurrent requests of the same client may get a few more tokens than due.
+    """
+
+    def get_cost(self, request, view):
+        """
+        Returns the tokens a request takes
+        """
+
+        if request.query_params.get('search'):
+            return settings.POSTS_THROTTLE_SEARCH_COST
+        return 1
+
+    def get_cache_key(self, request, view):
+        """
+        Returns the key of the bucket of the client (user or address) for the route
+        """
+
+        match = getattr(request, 'resolver_match', None)
+        route = match.route if match is not None else request.path
+
+        user = getattr(request, 'user', None)
+        ident = f'user:{user.pk}' if user is not None and user.is_authenticated else self.get_ident(request)
+
+        return f'posts:throttle:{route}:{ident}'
+
+    def allow_request(self, request, view):
+        rate, burst = settings.POSTS_THROTTLE_RATE, settings.POSTS_THROTTLE_BURST
+
+        if not rate:
+            return True
+
+        cache = get_throttle_cache()
+        key = self.get_cache_key(request, view)
+
+        # A request costlier than the bucket would never pass
+        cost = min(self.get_cost(request, view), burst)
+        now = time.time()
+
+        # Refill the bucket for the time since the last request, a missing bucket is full
+        tokens, updated = cache.get(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        else:
+            self.wait_seconds = (cost - tokens) / rate
+
+        # The bucket is full again (same as missing) once this time has passed
+        cache.set(key, (tokens, now), timeout=int((burst - tokens) / rate) + 1)
+        return allowed
+
+    def wait(self):
+        return getattr(self, 'wait_seconds', None)
@@ -1,10 +1,25 @@
 from django.urls import path
-from .views import PostListView, PostCreateView, PostGetView, PostUpdateView, PostDeleteView
+from .async_views import AsyncPostListView, AsyncPostCreateView, AsyncPostGetView, AsyncPostUpdateView, AsyncPostDeleteView
+from .views import PostListView, PostExportView, PostCreateView, PostGetView, PostManyView, PostUpdateView, PostDeleteView, PostBulkView, PostCacheStatsView, PostFacetsView, PostAutocompleteView, PostChangesView
 
 urlpatterns = [
     path('posts/', PostListView.as_view(), name='post-list'),
+    path('posts/export/', PostExportView.as_view(), name='post-export'),
     path('post/create/', PostCreateView.as_view(), name='post-create'),
     path('post/<int:pk>/', PostGetView.as_view(), name='post-get'),
+    path('posts/many/', PostManyView.as_view(), name='post-many'),
     path('post/<int:pk>/update/', PostUpdateView.as_view(), name='post-update'),
     path('post/<int:pk>/delete/', PostDeleteView.as_view(), name='post-delete'),
+    path('posts/bulk/', PostBulkView.as_view(), name='post-bulk'),
+    path('posts/cache/stats/', PostCacheStatsView.as_view(), name='post-cache-stats'),
+    path('posts/facets/', PostFacetsView.as_view(), name='post-facets'),
+    path('posts/autocomplete/', PostAutocompleteView.as_view(), name='post-autocomplete'),
+    path('posts/changes/', PostChangesView.as_view(), name='post-changes'),
+
+    # Async versions of the CRUD views, for ASGI servers (uvicorn, daphne...)
+    path('async/posts/', AsyncPostListView.as_view(), name='async-post-list'),
+    path('async/post/create/', AsyncPostCreateView.as_view(), name='async-post-create'),
+    path('async/post/<int:pk>/', AsyncPostGetView.as_view(), name='async-post-get'),
+    path('async/post/<int:pk>/update/', AsyncPostUpdateView.as_view(), name='async-post-update'),
+    path('async/post/<int:pk>/delete/', AsyncPostDeleteView.as_view(), name='async-post-delete'),
 ]
\ No newline at end of file
@@ -0,0 +1,314 @@
+import bisect
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connection
+
+from posts.models import Post
+
+logger = logging.getLogger(__name__)
+
+# Kinds of suggestions, `?kind=` restricts the response to one of them
+KINDS = ('title', 'tag')
+
+
+def normalize_prefix(text):
+    """
+    Returns the key a title, a tag or a typed prefix is indexed and looked up with (case and spacing ignored)
+    """
+
+    return ' '.join(text.split()).casefold()
+
+
+class PrefixIndex:
+    """
+    Sorted array of distinct keys, with the display value and number of posts of each.
+
+    A prefix lookup is a binary search followed by a scan of the matching keys
+    (O(log n + limit)), adding or removing a key moves the end of the array.
+    """
+
+    __slots__ = ('keys', 'terms')
+
+    def __init__(self, terms=None):
+        # key -> [display value, number of posts]
+        self.terms = terms or {}
+        self.keys = sorted(self.terms)
+
+    def add(self, key, value):
+        term = self.terms.get(key)
+
+        if term is None:
+            self.terms[key] = [value, 1]
+            bisect.insort(self.keys, key)
+        else:
+            # The latest spelling of a title is the one suggested
+            term[0] = value
+            term[1] += 1
+
+    def remove(self, key):
+        term = self.terms.get(key)
+
+        if term is None:
+            return
+
+        term[1] -= 1
+        if term[1] <= 0:
+            del self.terms[key]
+            del self.keys[bisect.bisect_left(self.keys, key)]
+
+    def search(self, prefix, limit):
+        """
+        Returns up to `limit` (value, count) pairs whose key starts with the prefix, in key order
+        """
+
+        results = []
+        index = bisect.bisect_left(self.keys, prefix)
+
+        while len(results) < limit and index < len(self.keys) and self.keys[index].startswith(prefix):
+            results.append(tuple(self.terms[self.keys[index]]))
+            index += 1
+
+        return results
+
+
+class AutocompleteIndex:
+    """
+    Titles and tags of the most recent posts (at most POSTS_AUTOCOMPLETE_MAX_POSTS),
+    held in memory so suggestions need no database round trip.
+
+    The indexed values of each post are kept, so an update or a delete
+    removes exactly what the post added.
+    """
+
+    def __init__(self, rows=(), max_posts=None):
+        self.max_posts = settings.POSTS_AUTOCOMPLETE_MAX_POSTS if max_posts is None else max_posts
+        self.built_at = time.monotonic()
+
+        # id -> (title, tags), oldest first so the first one is evicted when full
+        self.posts = {}
+        titles, tags = {}, {}
+
+        for pk, title, post_tags in rows:
+            self.posts[pk] = (title, tuple(post_tags))
+            add_term(titles, normalize_prefix(title), title)
+            for tag in post_tags:
+                add_term(tags, normalize_prefix(tag), tag)
+
+        self.indexes = {'title': PrefixIndex(titles), 'tag': PrefixIndex(tags)}
+
+    def __len__(self):
+        return len(self.posts)
+
+    def add(self, pk, title, tags):
+        """
+        Indexes a new or updated post
+        """
+
+        self.remove(pk)
+
+        self.posts[pk] = (title, tuple(tags))
+        self.indexes['title'].add(normalize_prefix(title), title)
+        for tag in tags:
+            self.indexes['tag'].add(normalize_prefix(tag), tag)
+
+        # Bounded memory: forget the oldest post
+        if len(self.posts) > self.max_posts:
+            self.remove(next(iter(self.posts)))
+
+    def remove(self, pk):
+        """
+        Forgets a post, if it is indexed
+        """
+
+        post = self.posts.pop(pk, None)
+
+        if post is None:
+            return
+
+        title, tags = post
+        self.indexes['title'].remove(normalize_prefix(title))
+        for tag in tags:
+            self.indexes['tag'].remove(normalize_prefix(tag))
+
+    def search(self, prefix, kinds=KINDS, limit=10):
+        """
+        Returns the suggestions for a prefix, by kind
+        """
+
+        key = normalize_prefix(prefix)
+
+        if not key:
+            return {kind: [] for kind in kinds}
+
+        return {kind: self.indexes[kind].search(key, limit) for kind in kinds}
+
+
+def add_term(terms, key, value):
+    """
+    Adds a post to the term of a key, while building an index
+    """
+
+    term = terms.get(key)
+
+    if term is None:
+        terms[key] = [value, 1]
+    else:
+        term[0] = value
+        term[1] += 1
+
+def build_index():
+    """
+    Builds the index from the most recent posts (one query)
+    """
+
+    max_posts = settings.POSTS_AUTOCOMPLETE_MAX_POSTS
+    rows = Post.objects.order_by('-created_at', '-id').values_list('id', 'title', 'tags')[:max_posts]
+
+    # Oldest first, like the posts added afterwards
+    return AutocompleteIndex(reversed(list(rows)), max_posts)
+
+
+# Index of this process (each worker has its own, like the metrics), built on first use
+_index = None
+_lock = threading.Lock()
+
+# Writes made while the index is rebuilt in the background, replayed on the new one
+_pending = None
+
+
+def get_index():
+    """
+    Returns the index of this process, builds it on first use and refreshes it
+    in the background when older than POSTS_AUTOCOMPLETE_MAX_AGE (to pick up
+    the writes of the other workers and of imports)
+    """
+
+    global _index, _pending
+
+    index = _index
+
+    if index is None:
+        with _lock:
+            if _index is None:
+                _index = build_index()
+            return _index
+
+    max_age = settings.POSTS_AUTOCOMPLETE_MAX_AGE
+
+    if max_age and time.monotonic() - index.built_at > max_age:
+        with _lock:
+            if _pending is None and _index is index:
+                _pending = []
+                threading.Thread(target=refresh_index, name='autocomplete-refresh', daemon=True).start()
+
+    return index
+
+def warm_index():
+    """
+    Builds the index in the background, so the lookups do not wait for it
+    """
+
+    def build():
+        try:
+            get_index()
+        except Exception:
+            # The first lookup tries again
+            logger.exception('Could not build the autocomplete index')
+        finally:
+            connection.close()
+
+    threading.Thread(target=build, name='autocomplete-warm', daemon=True).start()
+
+def warm_on_first_request(**kwargs):
+    """
+    Warms the index when the first request of a worker process starts (connected by core.wsgi
+    and core.asgi). Not at import: the application may be loaded before the workers are forked
+    (gunicorn --preload), which would build it in the master where no thread survives the fork.
+    """
+
+    request_started.disconnect(warm_on_first_request)
+    warm_index()
+
+def refresh_index():
+    """
+    Rebuilds the index and swaps it in, with the writes made meanwhile
+    """
+
+    global _index, _pending
+
+    try:
+        index = build_index()
+    except Exception:
+        # The current index keeps serving
+        logger.exception('Could not rebuild the autocomplete index')
+        index = None
+    finally:
+        # The thread has its own connection
+        connection.close()
+
+    with _lock:
+        if index is not None:
+            for method, args in _pending:
+                getattr(index, method)(*args)
+            _index = index
+        elif _index is not None:
+            # Try again after another max age
+            _index.built_at = time.monotonic()
+
+        _pending = None
+
+def _apply(method, *args):
+    """
+    Applies a write to the index, if it was built, and to the one being rebuilt
+    """
+
+    with _lock:
+        if _index is None:
+            return
+
+        getattr(_index, method)(*args)
+
+        if _pending is not None:
+            _pending.append((method, args))
+
+def index_post(pk, title, tags):
+    """
+    Indexes a created or updated post (called by the write views)
+    """
+
+    _apply('add', pk, title, tags)
+
+def unindex_posts(*pks):
+    """
+    Forgets deleted posts (called by the write views)
+    """
+
+    for pk in pks:
+        _apply('remove', pk)
+
+def clear_index():
+    """
+    Drops the index, the next lookup rebuilds it
+    """
+
+    global _index
+
+    with _lock:
+        _index = None
+
+def autocomplete(prefix, kinds=KINDS, limit=10):
+    """
+    Returns the title and tag suggestions for a prefix
+    """
+
+    index = get_index()
+
+    with _lock:
+        results = index.search(prefix, kinds, limit)
+
+    # Same shape as the facets, under `titles` and `tags`
+    return {f'{kind}s': [{'value': value, 'count': count} for value, count in suggestions] for kind, suggestions in results.items()}
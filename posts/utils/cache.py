@@ -0,0 +1,279 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections, router
+from django.db.models import Sum
+from django.utils.dateparse import parse_datetime
+
+from posts.models import Post, PostGeneration
+from posts.utils.fields import POST_FIELDS
+from posts.utils.representation import represent_row
+
+# Stored for posts that do not exist, so repeated 404s skip the database too
+MISSING = 'missing'
+
+# Same bump as the trigger of migration 0011, for the changes that do not fire it (e.g. a detached partition)
+BUMP_GENERATION_SQL = """
+INSERT INTO posts_postgeneration (slot, value)
+VALUES (pg_backend_pid() % 16, (extract(epoch FROM clock_timestamp()) * 1000000)::bigint)
+ON CONFLICT (slot) DO UPDATE SET value = posts_postgeneration.value + 1
+"""
+
+# Hit/miss counters of this process
+_stats = {'hits': 0, 'misses': 0}
+_stats_lock = threading.Lock()
+
+
+def get_cache():
+    """
+    Returns the cache backend configured for posts
+    """
+
+    return caches[settings.POSTS_CACHE_ALIAS]
+
+def post_key(pk):
+    """
+    Returns the cache key of a post
+    """
+
+    return f'posts:post:{pk}'
+
+def version_key(pk):
+    """
+    Returns the cache key of the version of a post, a cached post is only read while it has the same one
+    """
+
+    return f'posts:post:{pk}:version'
+
+def _new_version():
+    # Negative for a post cached without a write seen yet, the writes set the time of the write (see invalidate_posts)
+    return -time.time_ns()
+
+def _cached(entry, version):
+    # The data of a cached post, None if missing or cached under another version (filled before the last write)
+    if entry is None or version is None or entry[0] != version:
+        return None
+    return entry[1]
+
+def _may_fill(alias, version):
+    # A replica may not have applied a write of the last POSTS_PRIMARY_PIN_SECONDS (the lag
+    # read-your-writes allows for, see PinPrimaryMiddleware): what it returns is not cached
+    if alias == router.db_for_write(Post) or version < 0:
+        return True
+    return time.time_ns() - version > settings.POSTS_PRIMARY_PIN_SECONDS * 10 ** 9
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+def get_post_data(pk):
+    """
+    Gets the serialized representation of a post, from the cache when possible.
+    Returns None if the post does not exist.
+    """
+
+    cache = get_cache()
+    key, versioned = post_key(pk), version_key(pk)
+    cached = cache.get_many([key, versioned])
+
+    version = cached.get(versioned)
+    data = _cached(cached.get(key), version)
+
+    if data is not None:
+        _count('hits')
+        return None if data == MISSING else data
+
+    _count('misses')
+
+    # The version is set before the row is read: a write committed after the
+    # read sets another one, and the post cached below is never read
+    if version is None:
+        version = _new_version()
+        cache.set(versioned, version, timeout=None)
+
+    # Not cached yet, read it as a plain tuple
+    alias = router.db_for_read(Post)
+    row = Post.objects.using(alias).filter(pk=pk).values_list(*POST_FIELDS).first()
+
+    if row is None:
+        data, timeout = MISSING, settings.POSTS_CACHE_NEGATIVE_TIMEOUT
+    else:
+        data, timeout = represent_row(row, POST_FIELDS), settings.POSTS_CACHE_TIMEOUT
+
+    if _may_fill(alias, version):
+        cache.set(key, (version, data), timeout)
+
+    return None if data == MISSING else data
+
+def get_many_posts_data(pks):
+    """
+    Gets the serialized representation of many posts: the cached ones with a
+    single cache round trip, the others with a single query.
+    Returns a dict by ID, the posts that do not exist are left out.
+    """
+
+    cache = get_cache()
+    cached = cache.get_many([*(post_key(pk) for pk in pks), *(version_key(pk) for pk in pks)])
+
+    found = {}
+    versions = {}
+
+    for pk in pks:
+        version = cached.get(version_key(pk))
+        data = _cached(cached.get(post_key(pk)), version)
+
+        if data is None:
+            versions[pk] = version
+        elif data != MISSING:
+            found[pk] = data
+
+    with _stats_lock:
+        _stats['hits'] += len(pks) - len(versions)
+        _stats['misses'] += len(versions)
+
+    if not versions:
+        return found
+
+    # Versions before rows, like get_post_data
+    new = {pk: _new_version() for pk, version in versions.items() if version is None}
+    if new:
+        cache.set_many({version_key(pk): version for pk, version in new.items()}, timeout=None)
+        versions.update(new)
+
+    # One `id IN (...)` query for everything the cache did not have
+    alias = router.db_for_read(Post)
+    rows = Post.objects.using(alias).filter(pk__in=list(versions)).values_list(*POST_FIELDS)
+    fetched = {data['id']: data for data in (represent_row(row, POST_FIELDS) for row in rows)}
+
+    versions = {pk: version for pk, version in versions.items() if _may_fill(alias, version)}
+
+    cache.set_many({post_key(pk): (versions[pk], data) for pk, data in fetched.items() if pk in versions}, settings.POSTS_CACHE_TIMEOUT)
+    cache.set_many(
+        {post_key(pk): (version, MISSING) for pk, version in versions.items() if pk not in fetched},
+        settings.POSTS_CACHE_NEGATIVE_TIMEOUT
+        )
+
+    found.update(fetched)
+    return found
+
+def invalidate_posts(*pks):
+    """
+    Outdates the cached posts, call it after every write, once committed
+    (the lists move to a new generation with the write itself)
+    """
+
+    # A new version rather than a delete: a read that started before the write
+    # would put the old post back, under the old version that is no longer read
+    version = time.time_ns()
+    get_cache().set_many({version_key(pk): version for pk in pks}, timeout=None)
+
+def get_generation(using=None):
+    """
+    Returns the current generation of the posts, it changes with every write.
+
+    It is kept in the database and bumped by a trigger in the transaction of
+    each write, so every worker and command sees it change when the write commits.
+    """
+
+    alias = using or router.db_for_read(PostGeneration)
+    return PostGeneration.objects.using(alias).aggregate(generation=Sum('value'))['generation'] or 0
+
+def bump_generation():
+    """
+    Moves to a new generation: every cached list is outdated at once, without looking for their keys
+    """
+
+    with connections[router.db_for_write(PostGeneration)].cursor() as cursor:
+        cursor.execute(BUMP_GENERATION_SQL)
+
+def get_cache_stats():
+    """
+    Returns the hit/miss counters of the post cache in this process
+    """
+
+    with _stats_lock:
+        hits, misses = _stats['hits'], _stats['misses']
+
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else None,
+    }
+
+def get_post_update_at(pk):
+    """
+    Gets only the last modification date of a post, from the cache when possible.
+    Returns None if the post does not exist.
+    """
+
+    cached = get_cache().get_many([post_key(pk), version_key(pk)])
+    data = _cached(cached.get(post_key(pk)), cached.get(version_key(pk)))
+
+    if data == MISSING:
+        return None
+    if data is not None:
+        return parse_datetime(data['update_at'])
+
+    # Read a single column, the row is not loaded nor serialized
+    return Post.objects.filter(pk=pk).values_list('update_at', flat=True).first()
+
+async def aget_post_data(pk):
+    """
+    Async version of get_post_data
+    """
+
+    cache = get_cache()
+    key, versioned = post_key(pk), version_key(pk)
+    cached = await cache.aget_many([key, versioned])
+
+    version = cached.get(versioned)
+    data = _cached(cached.get(key), version)
+
+    if data is not None:
+        _count('hits')
+        return None if data == MISSING else data
+
+    _count('misses')
+
+    if version is None:
+        version = _new_version()
+        await cache.aset(versioned, version, timeout=None)
+
+    alias = router.db_for_read(Post)
+    row = await Post.objects.using(alias).filter(pk=pk).values_list(*POST_FIELDS).afirst()
+
+    if row is None:
+        data, timeout = MISSING, settings.POSTS_CACHE_NEGATIVE_TIMEOUT
+    else:
+        data, timeout = represent_row(row, POST_FIELDS), settings.POSTS_CACHE_TIMEOUT
+
+    if _may_fill(alias, version):
+        await cache.aset(key, (version, data), timeout)
+
+    return None if data == MISSING else data
+
+async def aget_post_update_at(pk):
+    """
+    Async version of get_post_update_at
+    """
+
+    cached = await get_cache().aget_many([post_key(pk), version_key(pk)])
+    data = _cached(cached.get(post_key(pk)), cached.get(version_key(pk)))
+
+    if data == MISSING:
+        return None
+    if data is not None:
+        return parse_datetime(data['update_at'])
+
+    return await Post.objects.filter(pk=pk).values_list('update_at', flat=True).afirst()
+
+async def ainvalidate_posts(*pks):
+    """
+    Async version of invalidate_posts
+    """
+
+    version = time.time_ns()
+    await get_cache().aset_many({version_key(pk): version for pk in pks}, timeout=None)
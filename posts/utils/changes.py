@@ -0,0 +1,134 @@
+import datetime
+import heapq
+
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import APIException, ValidationError
+
+from posts.models import Post, PostTombstone
+from posts.utils.fields import get_columns
+from posts.utils.pagination import decode_cursor, encode_cursor
+from posts.utils.representation import format_datetime, represent_rows, row_getter
+
+# Order of the feed: the transaction of the change (Post.change_id), then the id
+CHANGES_ORDERING = ('change_id', 'id')
+
+# A cursor holds the position in the feed and the time it was read at (for its expiry)
+CURSOR_FIELDS = (*CHANGES_ORDERING, 'read_at')
+
+
+class CursorExpired(APIException):
+    status_code = 410
+    default_detail = 'The cursor is older than the kept deletions, fetch the whole list again.'
+    default_code = 'cursor_expired'
+
+
+def after(change_field, id_field, values):
+    """
+    Builds the condition that selects the rows after a (change, id) position
+    """
+
+    change, pk = values
+
+    # Redundant bound on the change so the (change, id) index range can be used directly
+    return Q(**{f'{change_field}__gte': change}) & (Q(**{f'{change_field}__gt': change}) | Q(**{change_field: change, f'{id_field}__gt': pk}))
+
+def get_limit(params):
+    """
+    Reads the batch size from `?limit=`, same rules as the page size of the list
+    """
+
+    try:
+        limit = int(params['limit'])
+    except (KeyError, ValueError):
+        return settings.POSTS_PAGE_SIZE
+
+    if limit < 1:
+        return settings.POSTS_PAGE_SIZE
+    return min(limit, settings.POSTS_MAX_PAGE_SIZE)
+
+def decode_position(since):
+    """
+    Returns the (change, id) position and the read time stored in a cursor of the feed
+    """
+
+    values, _ = decode_cursor(since, CURSOR_FIELDS)
+    read_at = parse_datetime(values[2]) if isinstance(values[2], str) else None
+
+    if read_at is None or not all(isinstance(value, int) for value in values[:2]):
+        raise ValidationError({'cursor': 'Invalid cursor.'})
+    return values[:2], read_at
+
+def get_horizon(alias):
+    """
+    Returns the oldest transaction still running on a database (the changes of the
+    older ones are committed or rolled back, none can appear before it) and the time.
+    """
+
+    with connections[alias].cursor() as cursor:
+        cursor.execute('SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint, statement_timestamp()')
+        return cursor.fetchone()
+
+def get_changes(params, fields):
+    """
+    Returns the posts created, updated or deleted after the `since` cursor, in
+    (change_id, id) order, at most `limit` of them, and the cursor to continue from.
+
+    Deleted posts come from the tombstones, as `{"id": ..., "deleted": true, "deleted_at": ...}`.
+    The changes of the transactions still running are left for a later call (their
+    change_id is not below the horizon), so a late commit is never skipped.
+    """
+
+    since = params.get('since')
+    position, read_at = decode_position(since) if since else (None, None)
+    limit = get_limit(params)
+
+    # Every read of a call on the same database, the horizon from its transactions
+    alias = router.db_for_read(Post)
+    horizon, now = get_horizon(alias)
+
+    if read_at is not None and read_at < now - datetime.timedelta(days=settings.POSTS_TOMBSTONE_RETENTION_DAYS):
+        # Deletions older than that may have been pruned (prune_tombstones), the client could miss some
+        raise CursorExpired()
+
+    posts = Post.objects.using(alias).filter(change_id__lt=horizon)
+    tombstones = PostTombstone.objects.using(alias).filter(change_id__lt=horizon)
+
+    if position is not None:
+        posts = posts.filter(after('change_id', 'id', position))
+        tombstones = tombstones.filter(after('change_id', 'post_id', position))
+
+    # Both are index range scans, at most limit + 1 rows each (one more tells if there is more)
+    columns = get_columns(fields, CHANGES_ORDERING)
+    key = row_getter(columns, CHANGES_ORDERING)
+    rows = list(posts.order_by(*CHANGES_ORDERING).values_list(*columns)[:limit + 1])
+    deleted = list(tombstones.order_by('change_id', 'post_id').values_list('change_id', 'post_id', 'deleted_at')[:limit + 1])
+
+    # Merge both streams in (change, id) order
+    changes = list(heapq.merge(
+        ((tuple(key(row)), False, row) for row in rows),
+        (((change, pk), True, deleted_at) for change, pk, deleted_at in deleted),
+        key=lambda change: change[0],
+        ))
+
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    # An empty batch moves the cursor to the horizon: nothing before it is left to
+    # read, and a client that is caught up does not keep a cursor that expires
+    since = encode_cursor([*(changes[-1][0] if changes else (horizon, 0)), now])
+
+    updated = iter(represent_rows([row for _, is_deleted, row in changes if not is_deleted], fields, columns))
+    tz = timezone.get_current_timezone()
+
+    results = []
+    for (_, pk), is_deleted, row in changes:
+        if is_deleted:
+            results.append({'id': pk, 'deleted': True, 'deleted_at': format_datetime(row, tz)})
+        else:
+            results.append({**next(updated), 'deleted': False})
+
+    return {'results': results, 'cursor': since, 'has_more': has_more}
@@ -0,0 +1,163 @@
+import datetime
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+
+# Request headers that make a request conditional
+CONDITIONAL_HEADERS = (
+    'HTTP_IF_MATCH',
+    'HTTP_IF_NONE_MATCH',
+    'HTTP_IF_MODIFIED_SINCE',
+    'HTTP_IF_UNMODIFIED_SINCE',
+)
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+def has_conditions(request):
+    """
+    Returns True if the request sent any conditional header
+    """
+
+    return any(header in request.META for header in CONDITIONAL_HEADERS)
+
+def post_version(update_at):
+    """
+    Returns the version of a post, its modification date in microseconds
+    """
+
+    # Integer arithmetic, a float timestamp can be off by a microsecond
+    return (update_at - EPOCH) // MICROSECOND
+
+def version_datetime(version):
+    """
+    Returns the modification date of a post version (inverse of post_version)
+    """
+
+    return EPOCH + version * MICROSECOND
+
+def media_type(request):
+    """
+    Returns the media type negotiated for the response, None for JSON (the representation
+    the ETags are computed for by default)
+    """
+
+    renderer = getattr(request, 'accepted_renderer', None)
+
+    if renderer is None or renderer.format == 'json':
+        return None
+    return renderer.media_type
+
+def post_etag(pk, update_at, fields=None, media_type=None):
+    """
+    Returns the strong ETag of a post, it changes with every write of the post.
+    A subset of the fields or another media type (e.g. the browsable API) is
+    another representation, so it gets its own ETag.
+    """
+
+    if fields is None and media_type is None:
+        return f'"{pk}-{post_version(update_at)}"'
+
+    parts = [','.join(fields)] if fields is not None else []
+    if media_type is not None:
+        parts.append(media_type)
+
+    variant = hashlib.sha1('|'.join(parts).encode()).hexdigest()[:8]
+    return f'"{pk}-{post_version(update_at)}-{variant}"'
+
+def list_etag(request, versions):
+    """
+    Returns the strong ETag of a page of posts, built from the query params,
+    the media type and the (id, update_at) pair of every post in the page
+    """
+
+    digest = hashlib.sha1()
+
+    # The same params in another order are the same page
+    for name, values in sorted(request.query_params.lists()):
+        digest.update(f'{name}={values}&'.encode())
+
+    # The same page rendered otherwise is another representation
+    representation = media_type(request)
+    if representation is not None:
+        digest.update(f'media_type={representation}&'.encode())
+
+    for pk, update_at in versions:
+        digest.update(f'{pk}-{post_version(update_at)};'.encode())
+
+    return f'"{digest.hexdigest()}"'
+
+def page_validators(request, rows, columns):
+    """
+    Returns the ETag and the latest modification date of a page of rows
+    fetched with `values_list(*columns)`
+    """
+
+    id_index, update_index = columns.index('id'), columns.index('update_at')
+    versions = [(row[id_index], row[update_index]) for row in rows]
+
+    latest = max((update_at for _, update_at in versions), default=None)
+    return list_etag(request, versions), latest
+
+def validator_headers(etag, update_at):
+    """
+    Returns the ETag and Last-Modified headers of a response
+    """
+
+    headers = {'ETag': etag}
+
+    if update_at is not None:
+        headers['Last-Modified'] = http_date(update_at.timestamp())
+
+    return headers
+
+def check_conditions(request, etag, update_at):
+    """
+    Evaluates the conditional headers of a request against the current version.
+    Returns the 304 or 412 response to send, or None to handle the request normally.
+    """
+
+    last_modified = int(update_at.timestamp()) if update_at is not None else None
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+    if response is not None and response.status_code == 304:
+        # A 304 repeats the validators of the response it replaces
+        for header, value in validator_headers(etag, update_at).items():
+            response[header] = value
+
+    return response
+
+def write_lookups(request, pk):
+    """
+    Turns the preconditions of a write (If-Match, If-Unmodified-Since) into
+    lookups on update_at, so the write itself checks them (optimistic concurrency).
+    Returns None when the request has no preconditions.
+    """
+
+    if_match = request.META.get('HTTP_IF_MATCH')
+
+    if if_match is not None:
+        etags = parse_etags(if_match)
+
+        if etags == ['*']:
+            # Any existing post
+            return {}
+
+        # Only the ETags of the full representation of this post can match
+        versions = []
+        for etag in etags:
+            etag_pk, _, version = etag.strip('"').partition('-')
+            if etag_pk == str(pk) and version.isdigit():
+                versions.append(version_datetime(int(version)))
+
+        return {'update_at__in': versions}
+
+    if_unmodified_since = parse_http_date_safe(request.META.get('HTTP_IF_UNMODIFIED_SINCE', ''))
+
+    if if_unmodified_since is not None:
+        # Last-Modified has a precision of one second
+        return {'update_at__lt': EPOCH + datetime.timedelta(seconds=if_unmodified_since + 1)}
+
+    return None
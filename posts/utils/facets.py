@@ -0,0 +1,76 @@
+from django.db import connection, transaction
+from django.db.models import Count
+
+from posts.models import Post, PostFacet
+from posts.utils.filters import filter_posts
+
+# Query params that restrict the counted posts, the summary table only holds the totals
+FILTER_PARAMS = ('search', 'category', 'tag')
+
+# Same aggregation as the triggers of migration 0005, over every post
+REBUILD_SQL = """
+INSERT INTO posts_postfacet (kind, value, count)
+SELECT 'category', category, count(*) FROM posts_post GROUP BY category
+UNION ALL
+SELECT 'tag', tag, count(*) FROM posts_post, LATERAL (SELECT DISTINCT unnest(posts_post.tags)) AS tags (tag) GROUP BY tag
+"""
+
+
+def represent_facets(rows):
+    """
+    Returns the (value, count) pairs as a list of dicts, the most common first
+    """
+
+    return [{'value': value, 'count': count} for value, count in sorted(rows, key=lambda row: (-row[1], row[0]))]
+
+def count_facets(posts):
+    """
+    Counts the categories and tags of a queryset of posts with GROUP BY (O(#posts))
+    """
+
+    categories = posts.order_by().values_list('category').annotate(count=Count('id'))
+
+    # The tags of each post are unnested, a tag repeated in a post counts once
+    sql, params = posts.order_by().values('tags').query.sql_with_params()
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT tag, count(*) FROM ({sql}) AS posts, LATERAL (SELECT DISTINCT unnest(posts.tags)) AS tags (tag) GROUP BY tag',
+            params
+            )
+        tags = cursor.fetchall()
+
+    return {'categories': represent_facets(categories), 'tags': represent_facets(tags)}
+
+def get_facets(params):
+    """
+    Returns the post counts per category and per tag.
+
+    Without filters they are read from the summary table (O(#facets)),
+    with `search`, `category` or `tag` they are counted over the matching posts.
+    """
+
+    if any(params.get(name) for name in FILTER_PARAMS):
+        posts, _ = filter_posts(params)
+        return count_facets(posts)
+
+    facets = {PostFacet.CATEGORY: [], PostFacet.TAG: []}
+
+    # Facets whose posts were all deleted keep a row with a count of 0
+    for kind, value, count in PostFacet.objects.filter(count__gt=0).values_list('kind', 'value', 'count'):
+        facets[kind].append((value, count))
+
+    return {'categories': represent_facets(facets[PostFacet.CATEGORY]), 'tags': represent_facets(facets[PostFacet.TAG])}
+
+def rebuild_facets():
+    """
+    Recounts the summary table from the posts, returns the number of facets
+    """
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            # Writes wait until the recount is done, so no change is lost or counted twice
+            cursor.execute(f'LOCK TABLE {Post._meta.db_table} IN SHARE MODE')
+            cursor.execute(f'DELETE FROM {PostFacet._meta.db_table}')
+            cursor.execute(REBUILD_SQL)
+            return cursor.rowcount
@@ -0,0 +1,61 @@
+from rest_framework.exceptions import ValidationError
+
+from posts.serializers import PostSerializer
+
+# Every field of a post, in the order they are represented
+POST_FIELDS = tuple(PostSerializer.Meta.fields)
+
+# Named field sets for `?view=`, the compact one leaves out the content
+VIEWS = {
+    'full': POST_FIELDS,
+    'compact': ('id', 'title', 'category', 'tags', 'created_at', 'update_at'),
+}
+
+# Columns always read: the ID and the values used by pagination and ETags
+KEY_COLUMNS = ('id', 'created_at', 'update_at')
+
+
+def get_fields(params, default_view='full'):
+    """
+    Returns the fields requested with `?fields=a,b` or `?view=compact|full`
+    """
+
+    requested = params.get('fields')
+
+    if requested:
+        names = {name.strip() for name in requested.split(',') if name.strip()}
+        unknown = names - set(POST_FIELDS)
+
+        if not names or unknown:
+            raise ValidationError({'fields': f"Unknown fields: {', '.join(sorted(unknown))}. Available: {', '.join(POST_FIELDS)}."})
+
+        # Keep the usual order of the fields whatever the order of the param
+        return tuple(name for name in POST_FIELDS if name in names)
+
+    view = params.get('view', default_view)
+
+    if view not in VIEWS:
+        raise ValidationError({'view': f"Must be one of: {', '.join(VIEWS)}."})
+
+    return VIEWS[view]
+
+def get_columns(fields, keys=()):
+    """
+    Returns the columns to fetch for the given fields, for `values_list()`.
+    The fields come first, then the key columns and the extra ordering keys.
+    """
+
+    columns = list(fields)
+
+    for name in (*KEY_COLUMNS, *keys):
+        if name not in columns:
+            columns.append(name)
+
+    return columns
+
+def is_full(fields):
+    """
+    Returns True if the fields are the complete representation of a post
+    """
+
+    return tuple(fields) == POST_FIELDS
@@ -0,0 +1,103 @@
+from rest_framework.exceptions import ValidationError
+
+from posts.models import Post
+from posts.utils.helpers import normalize_category, normalize_tags
+from posts.utils.pagination import DEFAULT_ORDERING
+from posts.utils.search import SEARCH_ORDERING, search_posts
+
+# `any` returns posts with at least one of the tags, `all` posts with every tag
+TAG_MATCH_MODES = ('any', 'all')
+
+# Values of `?ordering=`, the id breaks ties in the same direction.
+# Each one (and its reverse) is served by a B-tree index of the post table.
+ORDERINGS = {
+    'created_at': ('created_at', 'id'),
+    '-created_at': DEFAULT_ORDERING,
+    'update_at': ('update_at', 'id'),
+    '-update_at': ('-update_at', '-id'),
+    'title': ('title', 'id'),
+    '-title': ('-title', '-id'),
+}
+
+
+def get_tags(params):
+    """
+    Reads the tags to filter by, sent as `?tag=a&tag=b` or `?tag=a,b`
+    """
+
+    tags = []
+    for value in params.getlist('tag'):
+        tags += value.split(',')
+
+    # Same normalization as on write, so the values match the stored ones
+    return normalize_tags(tags)
+
+def get_categories(params):
+    """
+    Reads the categories to filter by, sent as `?category=a&category=b`
+    """
+
+    categories = []
+    for value in params.getlist('category'):
+        # Same normalization as on write, commas are allowed inside a category
+        category = normalize_category(value)
+        if category and category not in categories:
+            categories.append(category)
+
+    return categories
+
+def get_ordering(params, default=DEFAULT_ORDERING):
+    """
+    Reads the ordering of the list from `?ordering=`, falls back to the default one
+    """
+
+    ordering = params.get('ordering')
+
+    if not ordering:
+        return default
+
+    if ordering not in ORDERINGS:
+        raise ValidationError({'ordering': f"Must be one of: {', '.join(ORDERINGS)}."})
+
+    return ORDERINGS[ordering]
+
+def filter_posts(params, queryset=None):
+    """
+    Applies the filters of the post list (search, category, tags) to a queryset.
+    Returns the filtered queryset and the ordering to paginate it with.
+    """
+
+    posts = Post.objects.all() if queryset is None else queryset
+    ordering = get_ordering(params)
+
+    search = params.get('search')
+
+    if search:
+        # Try to retrieve posts using a word as filter, the most relevant first (unless another ordering was asked)
+        posts = search_posts(posts, search)
+        ordering = get_ordering(params, SEARCH_ORDERING)
+
+    categories = get_categories(params)
+
+    if categories:
+        # Exact match, served by the (category, created_at, id) index
+        if len(categories) == 1:
+            posts = posts.filter(category=categories[0])
+        else:
+            posts = posts.filter(category__in=categories)
+
+    tags = get_tags(params)
+
+    if tags:
+        match = params.get('tag_match', 'any')
+
+        if match not in TAG_MATCH_MODES:
+            raise ValidationError({'tag_match': f"Must be one of: {', '.join(TAG_MATCH_MODES)}."})
+
+        # Both lookups are served by the GIN index on tags
+        if match == 'all':
+            posts = posts.filter(tags__contains=tags)
+        else:
+            posts = posts.filter(tags__overlap=tags)
+
+    return posts, ordering
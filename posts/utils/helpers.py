@@ -1,13 +1,23 @@
-from posts.models import Post
+def normalize_category(category):
+    """
+    Normalizes a category (trimmed, inner whitespace collapsed), case is kept
+    """
+    
+    return ' '.join(category.split())
 
-def get_object(pk):
+def normalize_tags(tags):
     """
-    Gets a specific post by ID
+    Normalizes a list of tags (trimmed, lowercase, without duplicates)
     """
     
-    try:
-        # Tries to return the object if it exists
-        return Post.objects.get(pk=pk) 
-    except Post.DoesNotExist:
-        # Returns None if the object does not exist.
-        return None  
\ No newline at end of file
+    normalized = []
+    
+    for tag in tags:
+        # Collapse inner whitespace and ignore case
+        tag = ' '.join(tag.split()).lower()
+        
+        # Keep the first occurrence of each tag, in the order they were sent
+        if tag and tag not in normalized:
+            normalized.append(tag)
+    
+    return normalized
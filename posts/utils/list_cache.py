@@ -0,0 +1,109 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import router
+
+from core.db_router import is_pinned
+from posts.models import Post
+from posts.utils.cache import get_generation
+from posts.utils.conditional import media_type
+
+# Seconds between two looks at the cache while another worker computes the same list
+WAIT_INTERVAL = 0.02
+
+
+def get_list_cache():
+    """
+    Returns the cache backend holding the list responses
+    """
+
+    return caches[settings.POSTS_LIST_CACHE_ALIAS]
+
+def list_key(request, generation):
+    """
+    Returns the cache key of a list request: its normalized query params in the given generation
+    """
+
+    digest = hashlib.sha1()
+
+    # The pagination links are absolute URLs, another host is another response
+    digest.update(f'{request.scheme}://{request.get_host()}{request.path}?'.encode())
+
+    # The same params in another order are the same list
+    for name, values in sorted(request.query_params.lists()):
+        digest.update(f'{name}={values}&'.encode())
+
+    # The validators of the entry depend on the negotiated representation (see list_etag)
+    digest.update(f'media_type={media_type(request)}'.encode())
+
+    return f'posts:list:{generation}:{digest.hexdigest()}'
+
+
+class ListCache:
+    """
+    Cache of the list (and search) responses of a request.
+
+    The keys contain the generation of the posts (see get_generation), every
+    committed write moves to a new one, so the outdated lists are never read
+    again and expire on their own. When a key is missing, a single request
+    computes it while the others with the same key wait for its result.
+    """
+
+    def __init__(self, request):
+        self.enabled = settings.POSTS_LIST_CACHE_TIMEOUT > 0
+        self.cache = get_list_cache()
+        # Where the generation is read and the cached list is built (see PostListView.get)
+        self.alias = router.db_for_read(Post)
+        self.key = list_key(request, get_generation(self.alias)) if self.enabled else None
+
+    def get(self):
+        """
+        Returns the cached entry of the request, None on a miss
+        """
+
+        # A client pinned to the primary reads its own writes, not a list computed from a replica
+        if not self.enabled or is_pinned():
+            return None
+
+        return self.cache.get(self.key)
+
+    def get_or_build(self, build):
+        """
+        Returns the cached entry of the request, or the one computed by `build()`,
+        cached for the next requests
+        """
+
+        if not self.enabled:
+            return build()
+
+        if is_pinned():
+            return self.set(build())
+
+        lock_key = f'{self.key}:lock'
+        timeout = settings.POSTS_LIST_CACHE_LOCK_TIMEOUT
+        deadline = time.monotonic() + timeout
+
+        # Only the request that takes the lock computes the list (no stampede on a cold key)
+        while not self.cache.add(lock_key, 1, timeout=timeout):
+            time.sleep(WAIT_INTERVAL)
+
+            entry = self.cache.get(self.key)
+            if entry is not None:
+                return entry
+
+            # The request holding the lock is too slow (or gone), do not wait any longer
+            if time.monotonic() >= deadline:
+                return build()
+
+        try:
+            # It may have been cached between the miss and the lock
+            entry = self.cache.get(self.key)
+            return entry if entry is not None else self.set(build())
+        finally:
+            self.cache.delete(lock_key)
+
+    def set(self, entry):
+        self.cache.set(self.key, entry, settings.POSTS_LIST_CACHE_TIMEOUT)
+        return entry
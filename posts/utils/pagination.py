@@ -0,0 +1,236 @@
+import base64
+import binascii
+import datetime
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils.urls import replace_query_param
+
+from posts.models import Post
+
+# Newest posts first, the id breaks ties between posts created at the same instant
+DEFAULT_ORDERING = ('-created_at', '-id')
+
+
+def _to_json(value):
+    """
+    Converts a key value to something JSON can hold without losing precision
+    """
+
+    if isinstance(value, datetime.datetime):
+        # Keep the microseconds, the keyset comparison needs the exact value
+        return value.isoformat()
+    return value
+
+def encode_cursor(values, reverse=False):
+    """
+    Builds an opaque cursor from the ordering values of a row
+    """
+
+    payload = json.dumps({'v': [_to_json(value) for value in values], 'r': reverse}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor, fields):
+    """
+    Returns the (values, reverse) pair stored in a cursor, validated against the ordering fields
+    """
+
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values, reverse = payload['v'], bool(payload['r'])
+
+        if not isinstance(values, list) or len(values) != len(fields):
+            raise ValueError(cursor)
+
+        # Convert the JSON values back to the Python type of each model field
+        decoded = []
+        for name, value in zip(fields, values):
+            try:
+                field = Post._meta.get_field(name)
+            except FieldDoesNotExist:
+                # Annotations (e.g. a search rank) are stored as plain JSON numbers
+                decoded.append(value)
+                continue
+            decoded.append(field.to_python(value))
+        return decoded, reverse
+    except (binascii.Error, ValueError, TypeError, KeyError, DjangoValidationError):
+        raise ValidationError({'cursor': 'Invalid cursor.'})
+
+def estimate_count(queryset):
+    """
+    Returns the planner's row estimate for a queryset, avoids running a COUNT(*)
+    """
+
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    if isinstance(plan, list):
+        plan = plan[0]
+    return int(plan['Plan']['Plan Rows'])
+
+
+class KeysetPaginator:
+    """
+    Paginates a queryset by the values of its ordering columns (keyset pagination).
+
+    Each page is fetched with a `WHERE (created_at, id) < (...)` style condition,
+    so it is an index range scan no matter how deep the client pages.
+    """
+
+    cursor_query_param = 'cursor'
+    limit_query_param = 'limit'
+    count_query_param = 'count'
+
+    def __init__(self, request, ordering=DEFAULT_ORDERING):
+        self.request = request
+        self.ordering = tuple(ordering)
+        self.fields = [name.lstrip('-') for name in self.ordering]
+        self.next_values = None
+        self.previous_values = None
+        self.count = None
+
+    def get_limit(self):
+        """
+        Reads the page size from the query params, falls back to the default one
+        """
+
+        try:
+            limit = int(self.request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return settings.POSTS_PAGE_SIZE
+
+        if limit < 1:
+            return settings.POSTS_PAGE_SIZE
+        return min(limit, settings.POSTS_MAX_PAGE_SIZE)
+
+    def get_count(self, queryset):
+        """
+        Counts the rows when the client asked for it (exact or planner estimate)
+        """
+
+        mode = self.request.query_params.get(self.count_query_param)
+
+        if mode == 'exact':
+            return queryset.count()
+        if mode == 'estimate':
+            return estimate_count(queryset)
+        return None
+
+    def get_key(self, row):
+        """
+        Returns the ordering values of a row
+        """
+
+        return [getattr(row, field) for field in self.fields]
+
+    def keyset_filter(self, values, reverse):
+        """
+        Builds the condition that selects the rows after (or before) the cursor
+        """
+
+        condition = Q()
+
+        for index, name in enumerate(self.ordering):
+            descending = name.startswith('-') != reverse
+            lookup = 'lt' if descending else 'gt'
+
+            equal = dict(zip(self.fields[:index], values[:index]))
+            condition |= Q(**equal, **{f'{self.fields[index]}__{lookup}': values[index]})
+
+        # Redundant bound on the leading column so the index range can be used directly
+        descending = self.ordering[0].startswith('-') != reverse
+        bound = Q(**{f"{self.fields[0]}__{'lte' if descending else 'gte'}": values[0]})
+        return bound & condition
+
+    def get_page_queryset(self, queryset):
+        """
+        Returns the queryset of the requested page (plus one row to detect the next one)
+        """
+
+        self.limit = self.get_limit()
+        cursor = self.request.query_params.get(self.cursor_query_param)
+        self.values, self.reverse = decode_cursor(cursor, self.fields) if cursor else (None, False)
+
+        # A previous page is read backwards from the cursor and then flipped
+        ordering = self.ordering
+        if self.reverse:
+            ordering = [name[1:] if name.startswith('-') else f'-{name}' for name in ordering]
+
+        if self.values is not None:
+            queryset = queryset.filter(self.keyset_filter(self.values, self.reverse))
+
+        return queryset.order_by(*ordering)[:self.limit + 1]
+
+    def set_page(self, rows, key=None):
+        """
+        Keeps the rows of the page out of the fetched ones and remembers the next/previous cursors
+        """
+
+        key = key or self.get_key
+        has_more = len(rows) > self.limit
+        rows = rows[:self.limit]
+
+        if self.reverse:
+            rows.reverse()
+
+        if rows:
+            first, last = key(rows[0]), key(rows[-1])
+            if self.reverse:
+                self.previous_values = first if has_more else None
+                self.next_values = last
+            else:
+                self.previous_values = first if self.values is not None else None
+                self.next_values = last if has_more else None
+
+        return rows
+
+    def paginate_queryset(self, queryset, key=None, count=True):
+        """
+        Returns the rows of the requested page and remembers the next/previous cursors
+        """
+
+        if count:
+            self.count = self.get_count(queryset)
+
+        return self.set_page(list(self.get_page_queryset(queryset)), key)
+
+    async def apaginate_queryset(self, queryset, key=None, count=True):
+        """
+        Async version of paginate_queryset, for the async views
+        """
+
+        if count:
+            self.count = await sync_to_async(self.get_count)(queryset)
+
+        return self.set_page([row async for row in self.get_page_queryset(queryset)], key)
+
+    def get_link(self, values, reverse):
+        """
+        Returns the absolute URL of the page starting at the given values
+        """
+
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encode_cursor(values, reverse))
+
+    def get_headers(self):
+        """
+        Returns the `Link` (next/prev) and `X-Total-Count` headers for the response
+        """
+
+        headers = {}
+        links = []
+
+        if self.next_values is not None:
+            links.append(f'<{self.get_link(self.next_values, False)}>; rel="next"')
+        if self.previous_values is not None:
+            links.append(f'<{self.get_link(self.previous_values, True)}>; rel="prev"')
+
+        if links:
+            headers['Link'] = ', '.join(links)
+        if self.count is not None:
+            headers['X-Total-Count'] = str(self.count)
+
+        return headers
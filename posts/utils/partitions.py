@@ -0,0 +1,298 @@
+import datetime
+import re
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from posts.models import Post, PostFacet, PostTombstone
+from posts.utils.cache import bump_generation
+
+TABLE = Post._meta.db_table
+
+# Monthly partitions are named after their first month, e.g. posts_post_p2026_10
+PARTITION_RE = re.compile(rf'^{TABLE}_p(\d{{4}})_(\d{{2}})$')
+
+# Catches the rows outside every monthly partition (an import of old posts, a date far ahead)
+DEFAULT_PARTITION = f'{TABLE}_default'
+
+# Same aggregation as the facet triggers (migrations 0005 and 0010), subtracting the posts of a partition,
+# with the facets locked in the same (kind, value) order
+SUBTRACT_FACETS_SQL = """
+INSERT INTO {facets} (kind, value, count)
+SELECT kind, value, delta FROM (
+    SELECT 'category', category, -count(*) FROM {partition} GROUP BY category
+    UNION ALL
+    SELECT 'tag', tag, -count(*) FROM {partition}, LATERAL (SELECT DISTINCT unnest({partition}.tags)) AS tags (tag) GROUP BY tag
+) AS changes (kind, value, delta)
+ORDER BY kind, value
+ON CONFLICT (kind, value) DO UPDATE SET count = {facets}.count + EXCLUDED.count
+"""
+
+
+def month_start(value):
+    """
+    Returns the first instant (UTC) of the month of a datetime
+    """
+
+    value = value.astimezone(datetime.timezone.utc)
+    return datetime.datetime(value.year, value.month, 1, tzinfo=datetime.timezone.utc)
+
+def add_months(start, months):
+    """
+    Returns the first instant of the month `months` after the month starting at `start`
+    """
+
+    index = start.year * 12 + start.month - 1 + months
+    return start.replace(year=index // 12, month=index % 12 + 1)
+
+def partition_name(start):
+    """
+    Returns the name of the partition of the month starting at `start`
+    """
+
+    return f'{TABLE}_p{start:%Y_%m}'
+
+def archive_name(start):
+    """
+    Returns the name a partition takes once detached from the posts table
+    """
+
+    return f'{TABLE}_archive_{start:%Y_%m}'
+
+def is_partitioned():
+    """
+    Returns True if the posts table is a partitioned table
+    """
+
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT relkind FROM pg_class WHERE oid = %s::regclass', [TABLE])
+        return cursor.fetchone()[0] == 'p'
+
+def get_partitions():
+    """
+    Returns the first month of each monthly partition of the posts table, oldest first
+    """
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            '''
+            SELECT child.relname FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = %s::regclass
+            ''',
+            [TABLE]
+            )
+        names = [name for name, in cursor.fetchall()]
+
+    months = []
+    for name in names:
+        match = PARTITION_RE.match(name)
+        if match:
+            months.append(datetime.datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=datetime.timezone.utc))
+
+    return sorted(months)
+
+def create_partition(cursor, start):
+    """
+    Creates the partition of the month starting at `start`, if it does not exist yet
+    """
+
+    quote = connection.ops.quote_name
+
+    # The bounds come from datetimes, not from user input
+    cursor.execute(
+        f'CREATE TABLE IF NOT EXISTS {quote(partition_name(start))} PARTITION OF {quote(TABLE)} '
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{add_months(start, 1).isoformat()}')"
+        )
+
+def move_from_default(cursor, start):
+    """
+    Creates the partition of the month starting at `start` when the default partition already
+    holds posts of that month, which PostgreSQL refuses: detaches the default partition,
+    creates the month, moves its posts there and attaches the default partition back
+    """
+
+    quote = connection.ops.quote_name
+    end = add_months(start, 1)
+
+    # Reads and writes of the posts wait until the partitions are in place again
+    cursor.execute(f'LOCK TABLE {quote(TABLE)} IN ACCESS EXCLUSIVE MODE')
+    cursor.execute(f'ALTER TABLE {quote(TABLE)} DETACH PARTITION {quote(DEFAULT_PARTITION)}')
+
+    create_partition(cursor, start)
+
+    # Straight from table to table, the statement triggers of the posts table (facets, tombstones, generation)
+    # do not run: only the partition changes. The row triggers give the posts a new change_id, the change
+    # feed lists them again with the same data.
+    cursor.execute(
+        f'WITH moved AS (DELETE FROM {quote(DEFAULT_PARTITION)} WHERE created_at >= %s AND created_at < %s RETURNING *) '
+        f'INSERT INTO {quote(partition_name(start))} SELECT * FROM moved',
+        [start, end]
+        )
+
+    cursor.execute(f'ALTER TABLE {quote(TABLE)} ATTACH PARTITION {quote(DEFAULT_PARTITION)} DEFAULT')
+
+def create_partitions(months_ahead):
+    """
+    Creates the missing partitions from the current month to `months_ahead` months later,
+    returns the first month of the created ones
+    """
+
+    quote = connection.ops.quote_name
+    existing = set(get_partitions())
+    start = month_start(timezone.now())
+    created = []
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        for offset in range(months_ahead + 1):
+            month = add_months(start, offset)
+
+            if month in existing:
+                continue
+
+            # e.g. posts dated in the future, inserted before their month had a partition
+            cursor.execute(
+                f'SELECT EXISTS (SELECT 1 FROM {quote(DEFAULT_PARTITION)} WHERE created_at >= %s AND created_at < %s)',
+                [month, add_months(month, 1)]
+                )
+
+            if cursor.fetchone()[0]:
+                move_from_default(cursor, month)
+            else:
+                create_partition(cursor, month)
+            created.append(month)
+
+    return created
+
+def convert_table(months_ahead):
+    """
+    Turns the posts table into a table partitioned by month of `created_at`, with the
+    same columns, indexes and triggers, and copies the posts into it.
+    Returns the number of copied posts.
+
+    Everything happens in one transaction that locks the table: reads and writes
+    wait until it is done, and a failure leaves the original table as it was.
+    """
+
+    quote = connection.ops.quote_name
+    old = f'{TABLE}_unpartitioned'
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {quote(TABLE)} IN ACCESS EXCLUSIVE MODE')
+
+        # The definitions name the posts table, they are run again on the new one
+        cursor.execute(
+            '''
+            SELECT indexdef FROM pg_indexes
+            WHERE schemaname = current_schema() AND tablename = %s
+            AND indexname NOT IN (SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass)
+            ''',
+            [TABLE, TABLE]
+            )
+        indexes = [definition for definition, in cursor.fetchall()]
+
+        cursor.execute('SELECT pg_get_triggerdef(oid) FROM pg_trigger WHERE tgrelid = %s::regclass AND NOT tgisinternal', [TABLE])
+        triggers = [definition for definition, in cursor.fetchall()]
+
+        cursor.execute(f'SELECT min(created_at) FROM {quote(TABLE)}')
+        first = cursor.fetchone()[0] or timezone.now()
+
+        # Index and constraint names are unique per schema, the old table gives them up
+        cursor.execute(f'ALTER TABLE {quote(TABLE)} RENAME TO {quote(old)}')
+        cursor.execute(
+            '''
+            SELECT indexname FROM pg_indexes
+            WHERE schemaname = current_schema() AND tablename = %s
+            AND indexname NOT IN (SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass)
+            ''',
+            [old, old]
+            )
+        for name, in cursor.fetchall():
+            cursor.execute(f'DROP INDEX {quote(name)}')
+        cursor.execute(f'ALTER TABLE {quote(old)} DROP CONSTRAINT {quote(TABLE + "_pkey")}')
+
+        # The partition key must be part of the primary key, the IDs still come from one sequence
+        cursor.execute(
+            f'CREATE TABLE {quote(TABLE)} ('
+            f'LIKE {quote(old)} INCLUDING DEFAULTS INCLUDING IDENTITY INCLUDING CONSTRAINTS INCLUDING STORAGE INCLUDING COMMENTS, '
+            f'PRIMARY KEY (id, created_at)'
+            f') PARTITION BY RANGE (created_at)'
+            )
+
+        cursor.execute(f'CREATE TABLE {quote(DEFAULT_PARTITION)} PARTITION OF {quote(TABLE)} DEFAULT')
+
+        month = month_start(first)
+        end = add_months(month_start(timezone.now()), months_ahead)
+        while month <= end:
+            create_partition(cursor, month)
+            month = add_months(month, 1)
+
+        # Copied before the triggers exist: the facets and the search vectors are already right
+        cursor.execute(f'INSERT INTO {quote(TABLE)} SELECT * FROM {quote(old)}')
+        copied = cursor.rowcount
+
+        # Built once over the copied rows, on every partition
+        cursor.execute("SET LOCAL maintenance_work_mem = '512MB'")
+        for definition in indexes:
+            cursor.execute(definition)
+        for definition in triggers:
+            cursor.execute(definition)
+
+        cursor.execute(f'DROP TABLE {quote(old)}')
+
+        # The new identity continues after the copied IDs, under the usual name
+        cursor.execute('SELECT pg_get_serial_sequence(%s, %s)', [TABLE, 'id'])
+        sequence = cursor.fetchone()[0]
+        cursor.execute(f"SELECT setval(%s, coalesce((SELECT max(id) FROM {quote(TABLE)}), 0) + 1, false)", [sequence])
+
+        if sequence.split('.')[-1] != f'{TABLE}_id_seq':
+            cursor.execute(f'ALTER SEQUENCE {sequence} RENAME TO {quote(TABLE + "_id_seq")}')
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'ANALYZE {quote(TABLE)}')
+
+    return copied
+
+def archive_partitions(before, drop=False):
+    """
+    Detaches the monthly partitions that end before `before` from the posts table,
+    renamed to posts_post_archive_YYYY_MM (or dropped). Returns their first month.
+
+    Their posts leave the API like deleted ones: the facets are decremented,
+    the change feed gets their tombstones and the cached lists are outdated.
+    """
+
+    quote = connection.ops.quote_name
+    archived = []
+
+    for month in get_partitions():
+        if add_months(month, 1) > before:
+            break
+
+        partition = quote(partition_name(month))
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            # The detach needs this lock on the posts table: taken first, before the partition, like the
+            # writes take theirs (the other way around, a write to the partition would deadlock with it).
+            # The counts and tombstones then match what is detached.
+            cursor.execute(f'LOCK TABLE {quote(TABLE)} IN ACCESS EXCLUSIVE MODE')
+
+            cursor.execute(SUBTRACT_FACETS_SQL.format(facets=quote(PostFacet._meta.db_table), partition=partition))
+            cursor.execute(
+                f'INSERT INTO {quote(PostTombstone._meta.db_table)} (post_id, deleted_at, change_id) '
+                f'SELECT id, clock_timestamp(), pg_current_xact_id()::text::bigint FROM {partition}'
+                )
+
+            cursor.execute(f'ALTER TABLE {quote(TABLE)} DETACH PARTITION {partition}')
+
+            if drop:
+                cursor.execute(f'DROP TABLE {partition}')
+            else:
+                cursor.execute(f'ALTER TABLE {partition} RENAME TO {quote(archive_name(month))}')
+
+            # A detach fires no trigger, the generation moves in the same transaction (like a delete)
+            bump_generation()
+
+        archived.append(month)
+
+    return archived
@@ -0,0 +1,71 @@
+from operator import itemgetter
+
+from django.utils import timezone
+
+from core.metrics import timed
+
+# Fields represented as ISO 8601 strings, like DRF's DateTimeField
+DATETIME_FIELDS = frozenset({'created_at', 'update_at'})
+
+
+def format_datetime(value, tz):
+    """
+    Formats a datetime exactly like DRF's DateTimeField (ISO 8601, `Z` for UTC)
+    """
+
+    text = value.astimezone(tz).isoformat()
+
+    if text.endswith('+00:00'):
+        text = text[:-6] + 'Z'
+
+    return text
+
+def row_getter(columns, names):
+    """
+    Returns a function that reads the given names from a row of `values_list(*columns)`
+    """
+
+    getter = itemgetter(*[columns.index(name) for name in names])
+
+    if len(names) == 1:
+        return lambda row: [getter(row)]
+    return lambda row: list(getter(row))
+
+@timed('serialize')
+def represent_rows(rows, fields, columns=None):
+    """
+    Builds the representation of rows fetched with `values_list(*columns)`.
+
+    The result is the same PostSerializer gives for the given fields, but it
+    is built from plain tuples without going through the serializer fields.
+    """
+
+    columns = list(columns or fields)
+    tz = timezone.get_current_timezone()
+
+    # Position of each field in the row, and whether it needs formatting
+    plan = [(name, columns.index(name), name in DATETIME_FIELDS) for name in fields]
+
+    data = []
+
+    for row in rows:
+        item = {}
+
+        for name, index, is_datetime in plan:
+            value = row[index]
+
+            if is_datetime and value is not None:
+                value = format_datetime(value, tz)
+
+            item[name] = value
+
+        data.append(item)
+
+    return data
+
+def represent_row(row, fields, columns=None):
+    """
+    Builds the representation of a single row, see represent_rows
+    """
+
+    return represent_rows([row], fields, columns)[0]
@@ -0,0 +1,35 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import Cast, Greatest
+
+# Text search configuration, the trigger of migration 0003 builds the vectors with the same one
+SEARCH_CONFIG = 'english'
+
+# Search results are ordered by relevance, the rest keeps the list order for ties
+SEARCH_ORDERING = ('-rank', '-created_at', '-id')
+
+
+def search_posts(queryset, term):
+    """
+    Filters posts by a search term and annotates them with their relevance (`rank`).
+
+    The term is parsed with `websearch_to_tsquery` and matched against the
+    stored search vector. Title and category also match by trigram word
+    similarity, which catches short or partial words the parser cannot stem.
+    """
+
+    query = SearchQuery(term, search_type='websearch', config=SEARCH_CONFIG)
+
+    # Both conditions are served by GIN indexes (BitmapOr), never by a sequential scan
+    matches = queryset.filter(
+        Q(search_vector=query) |
+        Q(title__trigram_word_similar=term) |
+        Q(category__trigram_word_similar=term)
+        )
+
+    # Cast the rank to double precision, so it survives the round trip through a cursor
+    rank = SearchRank(F('search_vector'), query) + Greatest(
+        TrigramWordSimilarity(term, 'title'),
+        TrigramWordSimilarity(term, 'category'),
+        )
+    return matches.annotate(rank=Cast(rank, FloatField()))
@@ -0,0 +1,107 @@
+from asgiref.sync import sync_to_async
+from django.core.exceptions import EmptyResultSet
+from django.db import connection
+from django.utils import timezone
+from rest_framework import status
+
+from posts.models import Post
+from posts.utils.fields import POST_FIELDS
+
+
+def _where(pk, lookups):
+    """
+    Compiles the WHERE clause that selects a post (and checks its version), None if nothing can match
+    """
+
+    query = Post.objects.filter(pk=pk, **(lookups or {})).query
+    compiler = query.get_compiler(connection=connection)
+
+    try:
+        return compiler.compile(query.where)
+    except EmptyResultSet:
+        # e.g. If-Match without any ETag of this post
+        return None
+
+def _convert(row):
+    """
+    Turns the raw database values of POST_FIELDS into Python ones, like the ORM does (e.g. aware datetimes on SQLite)
+    """
+
+    values = []
+
+    for name, value in zip(POST_FIELDS, row):
+        column = Post._meta.get_field(name).get_col(Post._meta.db_table)
+
+        for converter in [*connection.ops.get_db_converters(column), *column.field.get_db_converters(connection)]:
+            value = converter(value, column, connection)
+        values.append(value)
+
+    return tuple(values)
+
+def update_post(pk, data, lookups=None):
+    """
+    Writes the given fields of a post with a single `UPDATE ... RETURNING`.
+
+    `lookups` are extra conditions on the row (e.g. its version for If-Match).
+    Returns the updated row as the values of POST_FIELDS, or None if no post matched.
+    """
+
+    where = _where(pk, lookups)
+    if where is None:
+        return None
+
+    # auto_now is applied by save(), a raw UPDATE sets it itself
+    data = {**data, 'update_at': timezone.now()}
+    quote = connection.ops.quote_name
+
+    assignments, params = [], []
+    for name, value in data.items():
+        field = Post._meta.get_field(name)
+        assignments.append(f'{quote(field.column)} = %s')
+        params.append(field.get_db_prep_save(value, connection))
+
+    returning = ', '.join(quote(Post._meta.get_field(name).column) for name in POST_FIELDS)
+    where_sql, where_params = where
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {quote(Post._meta.db_table)} SET {", ".join(assignments)} WHERE {where_sql} RETURNING {returning}',
+            [*params, *where_params]
+            )
+        row = cursor.fetchone()
+
+    if row is None:
+        return None
+
+    return _convert(row)
+
+def delete_post(pk, lookups=None):
+    """
+    Deletes a post with a single `DELETE`, returns True if it existed (and matched the lookups)
+    """
+
+    where = _where(pk, lookups)
+    if where is None:
+        return False
+
+    where_sql, where_params = where
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {connection.ops.quote_name(Post._meta.db_table)} WHERE {where_sql}', where_params)
+        return cursor.rowcount > 0
+
+def failed_write_status(pk, lookups):
+    """
+    Returns the status of a write that matched no row: 412 if the post exists
+    but is not the expected version, 404 if it does not exist
+    """
+
+    # Without preconditions only the ID was checked, no need to ask again
+    if lookups is not None and Post.objects.filter(pk=pk).exists():
+        return status.HTTP_412_PRECONDITION_FAILED
+    return status.HTTP_404_NOT_FOUND
+
+# Versions for the async views
+aupdate_post = sync_to_async(update_post)
+adelete_post = sync_to_async(delete_post)
+afailed_write_status = sync_to_async(failed_write_status)
@@ -1,11 +1,35 @@
+import re
+
+from django.conf import settings
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import render
+from django.utils.dateparse import parse_datetime
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser
 from .models import Post
+from .renderers import CSVRenderer, NDJSONRenderer
 from .serializers import PostSerializer
-from .utils.helpers import get_object
-from django.db.models import Q
+from .utils.autocomplete import KINDS as AUTOCOMPLETE_KINDS, autocomplete, index_post, unindex_posts
+from .utils.cache import get_cache_stats, get_many_posts_data, get_post_data, get_post_update_at, invalidate_posts
+from .utils.changes import get_changes
+from .utils.conditional import check_conditions, has_conditions, media_type, page_validators, post_etag, validator_headers, write_lookups
+from .utils.facets import get_facets
+from .utils.fields import POST_FIELDS, get_columns, get_fields, is_full
+from .utils.filters import filter_posts
+from .utils.list_cache import ListCache
+from .utils.pagination import KeysetPaginator
+from .utils.representation import represent_row, represent_rows, row_getter
+from .utils.writes import delete_post, failed_write_status, update_post
+
+# IDs are positive bigints, the others cannot exist (and fail in the database)
+MAX_POST_ID = 2 ** 63 - 1
+
+# An ID in `?ids=`: ASCII digits only (str.isdigit also accepts e.g. '²'), not more than a bigint has
+ID_PATTERN = re.compile(r'[0-9]{1,19}')
 
 # Create your views here.
 class PostListView(APIView):
@@ -15,31 +39,97 @@ class PostListView(APIView):
     
     def get(self, request):
         """
-        Handles GET requests (list all posts).
+        Handles GET requests (list posts one page at a time).
         """
         
-        # Access the query param 
-        search = request.query_params.get('search')
+        # Identical lists and searches are served from the cache until the next write
+        cache = ListCache(request)
+        entry = cache.get()
         
-        if search:
+        if entry is None:
             
-            # Try to retrieve posts using a word as filter
-            posts = Post.objects.filter(
-                Q(title__icontains=search) | 
-                Q(content__icontains=search) | 
-                Q(category__icontains=search)
-                )
+            # Fields to represent (`?fields=` or `?view=`)
+            fields = get_fields(request.query_params, settings.POSTS_LIST_DEFAULT_VIEW)
+            
+            # Apply the query params (search, tag) to the posts
+            posts, ordering = filter_posts(request.query_params)
+            
+            if has_conditions(request):
+                
+                # Compare the versions of the page rows first, without loading nor serializing them
+                paginator = KeysetPaginator(request, ordering)
+                columns = get_columns(('id', 'update_at'), paginator.fields)
+                versions = paginator.paginate_queryset(
+                    posts.values_list(*columns), key=row_getter(columns, paginator.fields), count=False
+                    )
+                
+                response = check_conditions(request, *page_validators(request, versions, columns))
+                if response is not None:
+                    return response
             
-            # Serialize data (convert Django object to JSON) and return the post
-            serializer = PostSerializer(posts, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            # The cached page is read from the database the generation of its key was
+            # read from: a replica has both from before or both from after a write
+            if cache.enabled:
+                posts = posts.using(cache.alias)
+            
+            entry = cache.get_or_build(lambda: self.build(request, fields, posts, ordering))
+        
+        data, headers, validators = entry
+        
+        if has_conditions(request):
+            response = check_conditions(request, *validators)
+            if response is not None:
+                return response
         
-        # Obtain data from the database
-        posts = Post.objects.all()
+        return Response(data, status=status.HTTP_200_OK, headers=headers)
+    
+    def build(self, request, fields, posts, ordering):
+        """
+        Builds the cache entry of a page: its data, headers and validators.
+        """
         
-        # Serialize data (convert Django object to JSON) and return the post
-        serializer = PostSerializer(posts, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        paginator = KeysetPaginator(request, ordering)
+        
+        # Only read the requested page and the columns of the requested fields,
+        # as plain tuples (large text columns stay on disk when not requested)
+        columns = get_columns(fields, paginator.fields)
+        rows = paginator.paginate_queryset(posts.values_list(*columns), key=row_getter(columns, paginator.fields))
+        
+        # The cursors go in the Link header, next to the validators
+        validators = page_validators(request, rows, columns)
+        headers = paginator.get_headers()
+        headers.update(validator_headers(*validators))
+        
+        # Build the same representation as PostSerializer, straight from the tuples
+        return represent_rows(rows, fields, columns), headers, validators
+
+class PostExportView(APIView):
+    """
+    View to export posts as a stream (NDJSON or CSV).
+    """
+    
+    # The format is negotiated with the Accept header or `?format=ndjson|csv`
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+    
+    def get(self, request):
+        """
+        Handles GET requests (stream every post matching the list filters).
+        """
+        
+        # Apply the same query params as the post list
+        fields = get_fields(request.query_params)
+        posts, ordering = filter_posts(request.query_params)
+        
+        # Read the rows through a server-side cursor, a chunk at a time
+        rows = posts.values_list(*fields).order_by(*ordering).iterator(chunk_size=settings.POSTS_EXPORT_CHUNK_SIZE)
+        
+        # Represent and encode each row while it is sent, nothing is accumulated
+        data = (represent_row(row, fields) for row in rows)
+        
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(renderer.stream(data), content_type=f'{renderer.media_type}; charset={renderer.charset}')
+        response['Content-Disposition'] = f'attachment; filename="posts.{renderer.format}"'
+        return response
 
 class PostCreateView(APIView):
     """
@@ -57,6 +147,10 @@ class PostCreateView(APIView):
         # Verify that it is valid, save in the database and return the post 
         if serializer.is_valid():
             serializer.save()
+            
+            # Forget a cached 404 for the new ID, suggest the new title and tags
+            invalidate_posts(serializer.instance.pk)
+            index_post(serializer.instance.pk, serializer.instance.title, serializer.instance.tags)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         
         # Returns what failed
@@ -72,67 +166,148 @@ class PostGetView(APIView):
         Handles GET request to return a single post.
         """
         
-        # Try to retrieve the post by ID
-        post = get_object(pk)
+        # Fields to represent (`?fields=` or `?view=`), a subset (or another media type) has its own ETag
+        fields = get_fields(request.query_params)
+        variant = None if is_full(fields) else fields
         
-        if post is None:
+        if has_conditions(request):
+            
+            # Compare the version of the post first, without loading nor serializing it
+            update_at = get_post_update_at(pk)
+            
+            if update_at is not None:
+                response = check_conditions(request, post_etag(pk, update_at, variant, media_type(request)), update_at)
+                if response is not None:
+                    return response
+        
+        # Try to retrieve the serialized post by ID (from the cache when possible)
+        data = get_post_data(pk)
+        
+        if data is None:
             # Return 404 if not found
             return Response(status=status.HTTP_404_NOT_FOUND)
         
-        # Serialize data (convert Django object to JSON) and return the post
-        serializer = PostSerializer(post)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        update_at = parse_datetime(data['update_at'])
+        
+        if variant is not None:
+            data = {name: data[name] for name in fields}
+        
+        return Response(data, status=status.HTTP_200_OK, headers=validator_headers(post_etag(pk, update_at, variant, media_type(request)), update_at))
     
-class PostUpdateView(APIView):
+class PostManyView(APIView):
     """
-    View to update a post by primary key (pk).
+    View to retrieve many posts by ID in one request.
+    
+    The IDs come from `?ids=1,2,3` (GET) or `{"ids": [1, 2, 3]}` (POST, for
+    long lists), the posts are returned in the same order.
     """
     
-    def put(self, request, pk):
+    def get_ids(self, request):
         """
-        Handles PUT request to update a post.
+        Returns the requested IDs without duplicates, or raises a ValidationError
         """
         
-        # Try to retrieve the post by ID
-        post = get_object(pk)
+        if request.method == 'GET':
+            values = [value.strip() for param in request.query_params.getlist('ids') for value in param.split(',') if value.strip()]
+            
+            if not all(ID_PATTERN.fullmatch(value) for value in values):
+                raise ValidationError({'ids': ['Expected a comma-separated list of integers.']})
+            ids = [int(value) for value in values]
+        else:
+            ids = request.data.get('ids') if isinstance(request.data, dict) else None
+            
+            if not isinstance(ids, list) or not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in ids):
+                raise ValidationError({'ids': ['Expected a list of integers.']})
         
-        if post is None:
-            # Returns 404 if not found
-            return Response(status=status.HTTP_404_NOT_FOUND)
+        if not all(0 < pk <= MAX_POST_ID for pk in ids):
+            raise ValidationError({'ids': [f'Expected IDs between 1 and {MAX_POST_ID}.']})
         
-        # Deserialize data (convert JSON to Django object)
-        serializer = PostSerializer(post, data=request.data)
+        # Keep the first occurrence of each ID
+        ids = list(dict.fromkeys(ids))
         
-        # Verify that it is valid, updates the object in the database, and return the post. 
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_200_OK)
+        if not ids:
+            raise ValidationError({'ids': ['At least one ID is required.']})
         
-        # Returns what failed
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > settings.POSTS_MANY_MAX_IDS:
+            raise ValidationError({'ids': [f'At most {settings.POSTS_MANY_MAX_IDS} IDs are accepted per request.']})
+        
+        return ids
+    
+    def get(self, request):
+        """
+        Handles GET requests (return the posts listed in `?ids=`).
+        """
+        
+        return self.retrieve(request)
+    
+    def post(self, request):
+        """
+        Handles POST requests (return the posts listed in the `ids` of the body), nothing is written.
+        """
+        
+        return self.retrieve(request)
+    
+    def retrieve(self, request):
+        """
+        Reads the posts from the cache, and the missing ones with a single query.
+        """
+        
+        ids = self.get_ids(request)
+        fields = get_fields(request.query_params)
+        
+        posts = get_many_posts_data(ids)
+        
+        results = [posts[pk] if is_full(fields) else {name: posts[pk][name] for name in fields} for pk in ids if pk in posts]
+        missing = [pk for pk in ids if pk not in posts]
+        
+        return Response({'results': results, 'missing': missing}, status=status.HTTP_200_OK)
+    
+class PostUpdateView(APIView):
+    """
+    View to update a post by primary key (pk).
+    """
+    
+    def put(self, request, pk):
+        """
+        Handles PUT request to update a post.
+        """
+        
+        return self.update(request, pk, partial=False)
     
     def patch(self, request, pk):
         """
         Handles PATCH request to partially update a post.
         """
         
-        # Try to retrieve the post by ID
-        post = get_object(pk)
+        return self.update(request, pk, partial=True)
+    
+    def update(self, request, pk, partial):
+        """
+        Validates the data, then writes it with a single UPDATE that also checks the preconditions.
+        """
+        
+        # Deserialize data (convert JSON to Django object), the post is not read first
+        serializer = PostSerializer(data=request.data, partial=partial)
         
-        if post is None:
-            # Returns 404 if not found
-            return Response(status=status.HTTP_404_NOT_FOUND)
+        if not serializer.is_valid():
+            # Returns what failed
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
-        # Deserialize data (convert JSON to Django object)
-        serializer = PostSerializer(post, data=request.data, partial=True)
+        # The client's copy (If-Match) must still be the current one when the row is written
+        lookups = write_lookups(request, pk)
+        row = update_post(pk, serializer.validated_data, lookups)
         
-        # Verify that it is valid, updates the object in the database, and return the post. 
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_200_OK)
+        if row is None:
+            # Returns 412 if the post exists but is not the expected version, 404 otherwise
+            return Response(status=failed_write_status(pk, lookups))
         
-        # Returns what failed
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        # Forget the cached copy, suggest the new title and tags
+        data = represent_row(row, POST_FIELDS)
+        invalidate_posts(pk)
+        index_post(pk, data['title'], data['tags'])
+        
+        update_at = row[POST_FIELDS.index('update_at')]
+        return Response(data, status=status.HTTP_200_OK, headers=validator_headers(post_etag(pk, update_at, media_type=media_type(request)), update_at))
 
 class PostDeleteView(APIView):
     """
@@ -144,13 +319,230 @@ class PostDeleteView(APIView):
         Handles DELETE request to delete a post.
         """
         
-        # Try to retrieve the post by ID
-        post = get_object(pk)
+        # Delete the post with a single query, only if it is the client's copy (If-Match)
+        lookups = write_lookups(request, pk)
         
-        if post is None:
-            # Returns 404 if not found
-            return Response(status=status.HTTP_404_NOT_FOUND)
+        if not delete_post(pk, lookups):
+            # Returns 412 if the post exists but is not the expected version, 404 otherwise
+            return Response(status=failed_write_status(pk, lookups))
+        
+        # Return to status 204
+        invalidate_posts(pk)
+        unindex_posts(pk)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class PostBulkView(APIView):
+    """
+    View to create, update or delete many posts in one request.
+    
+    Every operation runs a single write query in one transaction and
+    answers with one result per item, in the order they were sent.
+    """
+    
+    def check_batch(self, items):
+        """
+        Returns an error response if the body is not a list of acceptable size
+        """
+        
+        if not isinstance(items, list):
+            return Response({'detail': 'Expected a list of items.'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if len(items) > settings.POSTS_BULK_MAX_SIZE:
+            return Response(
+                {'detail': f'At most {settings.POSTS_BULK_MAX_SIZE} items are accepted per request.'},
+                status=status.HTTP_400_BAD_REQUEST
+                )
+        
+        return None
+    
+    def post(self, request):
+        """
+        Handles POST requests (create a list of posts).
+        """
+        
+        error = self.check_batch(request.data)
+        if error is not None:
+            return error
+        
+        # Validate each post, the invalid ones are reported and the rest is created
+        serializer = PostSerializer(data=request.data, many=True)
+        valid, errors = serializer.validate_items()
+        created = serializer.create(list(valid.values())) if valid else []
+        
+        results = {index: {'status': status.HTTP_400_BAD_REQUEST, 'errors': detail} for index, detail in errors.items()}
+        
+        for index, post in zip(valid, created):
+            results[index] = {'status': status.HTTP_201_CREATED, 'data': PostSerializer(post).data}
+        
+        # Forget cached 404s for the new IDs
+        invalidate_posts(*[post.pk for post in created])
+        for post in created:
+            index_post(post.pk, post.title, post.tags)
+        
+        code = status.HTTP_201_CREATED if not errors else status.HTTP_207_MULTI_STATUS
+        return Response([results[index] for index in sorted(results)], status=code)
+    
+    def put(self, request):
+        """
+        Handles PUT requests (update a list of posts, each one with its `id`).
+        """
+        
+        return self.update(request, partial=False)
+    
+    def patch(self, request):
+        """
+        Handles PATCH requests (partially update a list of posts, each one with its `id`).
+        """
+        
+        return self.update(request, partial=True)
+    
+    def update(self, request, partial):
+        """
+        Validates the items, updates the existing posts and reports the rest.
+        """
+        
+        error = self.check_batch(request.data)
+        if error is not None:
+            return error
+        
+        # Read, validate and write in one transaction, the posts stay locked until the commit
+        # (a concurrent update of the same posts waits instead of being overwritten)
+        with transaction.atomic(savepoint=False):
+            
+            serializer = PostSerializer(data=request.data, many=True, partial=partial)
+            valid, errors = serializer.validate_items()
+            results = {index: {'status': status.HTTP_400_BAD_REQUEST, 'errors': detail} for index, detail in errors.items()}
+            
+            # Every valid item needs the ID of the post it updates
+            ids = {}
+            for index in list(valid):
+                pk = request.data[index].get('id')
+                
+                if not isinstance(pk, int) or isinstance(pk, bool):
+                    results[index] = {'status': status.HTTP_400_BAD_REQUEST, 'errors': {'id': ['A valid integer is required.']}}
+                    del valid[index]
+                else:
+                    ids[index] = pk
+            
+            # Load and lock all the posts with one query, the missing ones are reported as 404
+            posts = Post.objects.select_for_update().in_bulk(set(ids.values()))
+            
+            for index in list(valid):
+                if ids[index] not in posts:
+                    results[index] = {'status': status.HTTP_404_NOT_FOUND, 'errors': {'id': ['Not found.']}}
+                    del valid[index]
+            
+            instances = [posts[ids[index]] for index in valid]
+            if instances:
+                serializer.update(instances, list(valid.values()))
+        
+        if instances:
+            for index, post in zip(valid, instances):
+                results[index] = {'status': status.HTTP_200_OK, 'data': PostSerializer(post).data}
+            
+            # After the commit, a read in between would cache the previous version again
+            invalidate_posts(*[post.pk for post in instances])
+            for post in instances:
+                index_post(post.pk, post.title, post.tags)
+        
+        code = status.HTTP_200_OK if len(valid) == len(request.data) else status.HTTP_207_MULTI_STATUS
+        return Response([results[index] for index in sorted(results)], status=code)
+    
+    def delete(self, request):
+        """
+        Handles DELETE requests (delete the posts listed in `ids`).
+        """
+        
+        ids = request.data.get('ids') if isinstance(request.data, dict) else None
+        
+        error = self.check_batch(ids)
+        if error is not None:
+            return error
+        
+        if not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in ids):
+            return Response({'ids': ['Expected a list of integers.']}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # One DELETE for every post, it returns the IDs that existed
+        deleted = PostSerializer(many=True).delete(ids)
+        invalidate_posts(*deleted)
+        unindex_posts(*deleted)
+        
+        results = [
+            {'id': pk, 'status': status.HTTP_204_NO_CONTENT if pk in deleted else status.HTTP_404_NOT_FOUND}
+            for pk in ids
+        ]
+        
+        code = status.HTTP_200_OK if len(deleted) == len(set(ids)) else status.HTTP_207_MULTI_STATUS
+        return Response(results, status=code)
+
+class PostCacheStatsView(APIView):
+    """
+    View to inspect the post cache of this process.
+    """
+    
+    # Operational data, for the staff only
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        """
+        Handles GET request to return the cache hit/miss counters.
+        """
+        
+        return Response(get_cache_stats(), status=status.HTTP_200_OK)
+
+class PostFacetsView(APIView):
+    """
+    View to count the posts per category and per tag.
+    """
+    
+    def get(self, request):
+        """
+        Handles GET request to return the category and tag counts (of the posts matching `search`/`category`/`tag`).
+        """
+        
+        return Response(get_facets(request.query_params), status=status.HTTP_200_OK)
+
+class PostAutocompleteView(APIView):
+    """
+    View to suggest titles and tags starting with what the user typed.
+    """
+    
+    def get(self, request):
+        """
+        Handles GET request to return the suggestions for `q` (from memory, no query).
+        """
+        
+        kind = request.query_params.get('kind')
+        
+        if kind is not None and kind not in AUTOCOMPLETE_KINDS:
+            return Response({'kind': [f"Must be one of: {', '.join(AUTOCOMPLETE_KINDS)}."]}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Same rules as the page size of the list
+        try:
+            limit = int(request.query_params['limit'])
+        except (KeyError, ValueError):
+            limit = settings.POSTS_AUTOCOMPLETE_LIMIT
+        
+        if limit < 1:
+            limit = settings.POSTS_AUTOCOMPLETE_LIMIT
+        limit = min(limit, settings.POSTS_AUTOCOMPLETE_MAX_LIMIT)
+        
+        kinds = (kind,) if kind else AUTOCOMPLETE_KINDS
+        return Response(autocomplete(request.query_params.get('q', ''), kinds, limit), status=status.HTTP_200_OK)
+
+class PostChangesView(APIView):
+    """
+    View to sync the posts created, updated or deleted since a cursor (change feed).
+    """
+    
+    def get(self, request):
+        """
+        Handles GET request to return the next batch of changes after `since`.
+        """
+        
+        # The id tells the client which post changed, whatever the requested fields
+        fields = get_fields(request.query_params)
+        if 'id' not in fields:
+            fields = ('id', *fields)
         
-        # Delete post and return to status 204
-        post.delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
+        return Response(get_changes(request.query_params, fields), status=status.HTTP_200_OK)